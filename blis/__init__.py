@@ -22,6 +22,8 @@ OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 from .power_plant import emptyInputs
 from .power_plant import defaultInputs
 from .power_plant import PowerPlant
+from .power_plant import calcEfficiency
+from .fleet import Fleet
 from .solar import Solar
 from .fuel import Fuel
 from .grid import Grid
@@ -29,5 +31,23 @@ from .storage import Storage
 from .storage import Battery
 from .hres import HRES
 from .hres import SBGS
+from .hres import reprice
+from .batch import HRESBatch
+from .cache import ResultsCache
+from .checkpoint import Checkpoint
+from .results_store import ResultsStore
+from .load_data import loadData
+from .resample import resampleData
+from .screening import screenDesigns
+from .representative_days import clusterDays
+from .representative_days import runRepresentativeDays
+from .representative_days import compareResults
+from .parallel_time import runParallelTime
+from .sweep import runSweep
+from .work_queue import WorkQueue, workQueue
+from .daily_reset import runDailyReset
+from .commitment import HRESCommitment
+from .commitment import planCommitment
+from .cyclic_state import findCyclicState
 from .monte_carlo_inputs import monteCarloInputs
 from .monte_carlo_inputs import baselineInputs
\ No newline at end of file
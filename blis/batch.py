@@ -0,0 +1,490 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Hardcoded Inputs:
+debug = False  # If True, additional information is presented to the console
+
+# General Imports:
+import pandas as pd
+import numpy as np
+
+# BLIS Imports:
+from blis import emptyInputs, PowerPlant, Solar, Fuel, Storage, Battery, Grid, HRES
+from blis.hres import attributes_totals, tod_hrs, todName, attributes_costs, calcResults, omitPeriod, threshold
+from blis.hres import attributes_time_series
+from blis.power_plant import plant_state, calcEfficiency, OFF, STARTING, ON
+from blis.storage import storage_state, calcExactDischargeRate
+
+# ========================================================================
+# Batch parameters
+# Each column of the parameter table overrides one input of the template components
+# ========================================================================
+plant_params = ['capacity', 'maxEfficiency', 'rampRate', 'minRange', 'startTime', 'stopTime', 'Eff_A', 'Eff_B',
+                'Eff_C', 'cost_install', 'cost_OM_fix', 'cost_OM_var', 'co2CaptureEff']
+solar_params = ['capacity', 'cost_install', 'cost_OM_fix',
+                'scale']  # scale multiplies the solar column of data (MW) for that scenario
+batt_params = ['capacity', 'chargeRateMax', 'dischargeRateMax', 'roundTripEff', 'tau', 'cost_install', 'cost_OM_fix',
+               'initCharge',
+               'rateMax']  # rateMax sets both chargeRateMax and dischargeRateMax (same as Battery)
+fuel_params = ['cost', 'emissions']
+grid_params = ['capacity', 'maxEmissions', 'cost_OM_var']
+finance_params = ['i', 'n']
+attributes_batch = ['plant_' + x for x in plant_params] + ['solar_' + x for x in solar_params] + \
+                   ['batt_' + x for x in batt_params] + ['fuel_' + x for x in fuel_params] + \
+                   ['grid_' + x for x in grid_params] + finance_params
+
+# Columns of the time series used for results
+col_solarUsed = attributes_time_series.index('solarUsed')
+col_loadShed = attributes_time_series.index('loadShed')
+col_deficit = attributes_time_series.index('deficit')
+col_gridUsed = attributes_time_series.index('gridUsed')
+col_emissions = attributes_time_series.index('Emissions')
+
+
+# ========================================================================
+# Class to simulate many HRES scenarios that share the same data
+# All scenarios are advanced together, with the state of each component stored as arrays (one entry per scenario)
+# Results are identical to running HRES separately for each scenario (to floating point summation order)
+# ========================================================================
+class HRESBatch:
+
+    # ========================================================================
+    # Initialize Batch Simulation
+    # params is a pandas DataFrame with one row per scenario and columns from attributes_batch,
+    # inputs that are not provided are taken from the template components
+    # ========================================================================
+    def __init__(self, data, params, plant, solar=None, batt=None, fuel=None, grid=None, i=0.02, n=20):
+        # Create default components
+        if solar is None:
+            solar = Solar()
+        if batt is None:
+            batt = Battery()
+        if fuel is None:
+            fuel = Fuel()
+        if grid is None:
+            grid = Grid()
+
+        # Check parameters
+        unknown = [col for col in params.columns if col not in attributes_batch]
+        if len(unknown) > 0:
+            raise ValueError("Unknown batch parameters: " + str(unknown))
+
+        # Store Inputs
+        self.data = data
+        self.params = params
+        self.plant = plant
+        self.solar = solar
+        self.batt = batt
+        self.fuel = fuel
+        self.grid = grid
+        self.i = i  # (fraction) Interst rate
+        self.n = n  # (years) System lifetime
+
+        # Record number of datapoints and scenarios
+        self.steps = len(data)
+        self.cases = len(params)
+
+        # Create the components of each scenario
+        self.components = [self.getComponents(index) for index in params.index]
+
+        # ----
+        # Create pandas dataframes to store energy totals and results
+        # ----
+        self.totals = pd.DataFrame(index=params.index, columns=attributes_totals, dtype=float)
+        self.results = None
+
+    # ========================================================================
+    # Create the components of a single scenario
+    # ========================================================================
+    def getComponents(self, index):
+        row = self.params.loc[index]
+
+        def get(name, default):
+            if name in row.index:
+                return row[name]
+            else:
+                return default
+
+        # Power Plant
+        plant_inputs = emptyInputs()
+        plant_inputs.plantType = self.plant.type
+        for param in plant_params:
+            plant_inputs[param] = get('plant_' + param, getattr(self.plant, param))
+        plant = PowerPlant(plant_inputs)
+        plant.effTable = self.plant.effTable
+
+        # Solar
+        solar = Solar(plantType=self.solar.plantType, capacity=get('solar_capacity', self.solar.capacity),
+                      cost_install=get('solar_cost_install', self.solar.cost_install),
+                      cost_OM_fix=get('solar_cost_OM_fix', self.solar.cost_OM_fix))
+        solar.scale = get('solar_scale', 1.0)
+
+        # Storage
+        rateMax = get('batt_rateMax', None)
+        if rateMax is None:
+            chargeRateMax = get('batt_chargeRateMax', self.batt.chargeRateMax)
+            dischargeRateMax = get('batt_dischargeRateMax', self.batt.dischargeRateMax)
+        else:
+            chargeRateMax = rateMax
+            dischargeRateMax = rateMax
+        batt = Storage(capacity=get('batt_capacity', self.batt.capacity), chargeRateMax=chargeRateMax,
+                       dischargeRateMax=dischargeRateMax, roundTripEff=get('batt_roundTripEff', self.batt.roundTripEff),
+                       tau=get('batt_tau', self.batt.tau), cost_install=get('batt_cost_install', self.batt.cost_install),
+                       cost_OM_fix=get('batt_cost_OM_fix', self.batt.cost_OM_fix),
+                       initCharge=get('batt_initCharge', self.batt.initCharge), integration=self.batt.integration)
+
+        # Fuel
+        fuel = Fuel(fuelType=self.fuel.fuelType, cost=get('fuel_cost', self.fuel.cost),
+                    emissions=get('fuel_emissions', self.fuel.emissions))
+
+        # Grid
+        grid = Grid(capacity=get('grid_capacity', self.grid.capacity),
+                    maxEmissions=get('grid_maxEmissions', self.grid.maxEmissions),
+                    emissionCurve_hr=self.grid.emissionCurve_hr, emissionCurve_pct=self.grid.emissionCurve_pct,
+                    cost_OM_var=get('grid_cost_OM_var', self.grid.cost_OM_var))
+
+        # Finance
+        i = get('i', self.i)
+        n = get('n', self.n)
+
+        return plant, solar, batt, fuel, grid, i, n
+
+    # ========================================================================
+    # Create an equivalent HRES for a single scenario (e.g. to save or plot its time series)
+    # ========================================================================
+    def getHRES(self, index):
+        plant, solar, batt, fuel, grid, i, n = self.getComponents(index)
+        data = self.data
+        if solar.scale != 1.0:
+            data = data.copy()
+            data.loc[:, 'solar'] = data.loc[:, 'solar'] * solar.scale
+        return HRES(data, plant, solar=solar, batt=batt, fuel=fuel, grid=grid, i=i, n=n)
+
+    # ========================================================================
+    # Collect cost and financing inputs of each scenario
+    # ========================================================================
+    def getCosts(self):
+        rows = []
+        for plant, solar, batt, fuel, grid, i, n in self.components:
+            rows.append([plant.capacity, plant.cost_install, plant.cost_OM_fix, plant.cost_OM_var,
+                         solar.capacity, solar.cost_install, solar.cost_OM_fix,
+                         batt.capacity, batt.initCharge, batt.cost_install, batt.cost_OM_fix,
+                         fuel.cost, grid.cost_OM_var, i, n])
+        return pd.DataFrame(rows, index=self.params.index, columns=attributes_costs, dtype=float)
+
+    # ========================================================================
+    # Initialize arrays that hold the inputs and state of every scenario
+    # ========================================================================
+    def initArrays(self):
+        def collect(position, attr):
+            return np.array([getattr(c[position], attr) for c in self.components], dtype=float)
+
+        # Power plant - inputs
+        self.capacity = collect(0, 'capacity')
+        self.maxEfficiency = collect(0, 'maxEfficiency')
+        self.rampRate = collect(0, 'rampRate')
+        self.startTime = collect(0, 'startTime')
+        self.Eff_A = collect(0, 'Eff_A')
+        self.Eff_B = collect(0, 'Eff_B')
+        self.Eff_C = collect(0, 'Eff_C')
+        self.co2CaptureEff = collect(0, 'co2CaptureEff')
+        self.minPowerRequest = collect(0, 'minPowerRequest')
+        self.partLoadMin = np.array([c[0].partLoadRange[0] for c in self.components], dtype=float)
+        self.partLoadMax = np.array([c[0].partLoadRange[1] for c in self.components], dtype=float)
+        self.hasPlant = self.capacity > 0.0
+        # Power plant - state
+        state = np.array([c[0].getState() for c in self.components], dtype=plant_state)
+        self.status = state['status'].astype(int)
+        self.range = state['range']
+        self.efficiency = state['efficiency']
+        self.powerRequest = state['powerRequest']
+        self.powerOutput = state['powerOutput']
+        self.powerRamp = state['powerRamp']
+        self.heatInput = state['heatInput']
+        self.timeSinceStart = state['timeSinceStart']
+        self.timeSinceStop = state['timeSinceStop']
+
+        # Solar
+        self.solarScale = collect(1, 'scale')
+
+        # Storage - inputs
+        self.chargeMin = collect(2, 'chargeMin')
+        self.chargeMax = collect(2, 'chargeMax')
+        self.chargeRateMax = collect(2, 'chargeRateMax')
+        self.dischargeRateMax = collect(2, 'dischargeRateMax')
+        self.roundTripEff = collect(2, 'roundTripEff')
+        self.tau = collect(2, 'tau')
+        # Storage - state
+        self.charge = np.array([c[2].getState() for c in self.components], dtype=storage_state)['charge']
+
+        # Fuel and grid
+        self.fuelEmissions = collect(3, 'emissions')
+        self.gridCapacity = collect(4, 'capacity')
+        self.gridEmissions = np.array([[c[4].getEmissions(hr) for c in self.components] for hr in tod_hrs],
+                                      dtype=float)  # (hour x scenario)
+
+    # ========================================================================
+    # Calculate power plant efficiency (vectorized PowerPlant.calcEff)
+    # ========================================================================
+    def calcEff(self, pwr):
+        return calcEfficiency(pwr, self.capacity, self.maxEfficiency, self.Eff_A, self.Eff_B, self.Eff_C,
+                              self.partLoadMin, self.partLoadMax, self.plant.effTable)
+
+    # ========================================================================
+    # Update power plant status (vectorized PowerPlant.update)
+    # ========================================================================
+    def updatePlant(self, pwr, dt):
+        active = self.hasPlant
+        self.powerRequest = np.where(active, pwr, self.powerRequest)
+
+        isOff = active & (self.status == OFF)
+        isStarting = active & (self.status == STARTING)
+        isOn = active & (self.status == ON)
+
+        # OFF - Increase counter since stop ( if it has been previously stopped)
+        self.timeSinceStop = np.where(isOff & (self.timeSinceStop > 0.0), self.timeSinceStop + dt, self.timeSinceStop)
+
+        # STARTING and ON - Increase counter since start
+        self.timeSinceStart = np.where(isStarting | isOn, self.timeSinceStart + dt, self.timeSinceStart)
+
+        # STARTING - Switch to ON state and initialize performance (PowerPlant.initPwr)
+        switch = isStarting & (self.timeSinceStart > self.startTime)
+        if switch.any():
+            self.status = np.where(switch, ON, self.status)
+            self.timeSinceStop = np.where(switch, -1.0, self.timeSinceStop)
+            init_range = self.partLoadMin
+            init_output = init_range * self.capacity
+            init_eff = self.calcEff(init_output)
+            self.range = np.where(switch, init_range, self.range)
+            self.powerOutput = np.where(switch, init_output, self.powerOutput)
+            self.efficiency = np.where(switch, init_eff, self.efficiency)
+            self.heatInput = np.where(switch, init_output / (init_eff / 100.0), self.heatInput)
+
+        # ON - Update Performance (PowerPlant.updatePwr)
+        if isOn.any():
+            powerOutput_old = self.powerOutput
+
+            # Check if power request is within range and ramp rate capability
+            inRange = (self.minPowerRequest <= pwr) & (pwr <= self.capacity)
+            rampReq = np.abs(self.powerOutput - pwr)
+            rampPossible = self.rampRate * dt
+            ramp = np.where(rampReq < rampPossible, rampReq, rampPossible)
+
+            # Decrease or Increase Production
+            output = np.where(pwr < powerOutput_old, powerOutput_old - ramp,
+                              np.where(powerOutput_old < pwr, powerOutput_old + ramp, powerOutput_old))
+            output = np.where(inRange, output, powerOutput_old)
+            eff = self.calcEff(output)
+
+            self.powerOutput = np.where(isOn, output, self.powerOutput)
+            self.range = np.where(isOn, output / self.capacity, self.range)
+            self.efficiency = np.where(isOn, eff, self.efficiency)
+            self.heatInput = np.where(isOn, output / (eff / 100.0), self.heatInput)
+            self.powerRamp = np.where(isOn, (output - powerOutput_old) / dt, self.powerRamp)
+
+    # ========================================================================
+    # Discharge rate available of every scenario for integration='exact' (see blis.storage.calcExactDischargeRate)
+    # ========================================================================
+    def calcExactDischargeRate(self, dt):
+        return calcExactDischargeRate(self.charge - self.chargeMin, dt, self.tau, self.dischargeRateMax)
+
+    # ========================================================================
+    # Update - returns the performance needed for results
+    # ========================================================================
+    def update(self, dt, hour, demand, solar):
+        perf = self.dispatch(dt, hour, demand, solar)
+        return perf[col_solarUsed], perf[col_loadShed], perf[col_deficit], perf[col_gridUsed], perf[col_emissions]
+
+    # ========================================================================
+    # Dispatch - vectorized HRES.dispatch
+    # Returns a tuple of arrays (one entry per scenario) ordered as attributes_time_series
+    # dt, hour, demand and solar may be scalars or arrays with one entry per scenario
+    # ========================================================================
+    def dispatch(self, dt, hour, demand, solar):
+
+        # ----------
+        # Calculate Battery Dis/charge Rate Available
+        # ----------
+        if self.batt.integration == 'exact':
+            batt_c_rate = np.where(self.charge < self.chargeMax,
+                                   np.minimum((self.chargeMax - self.charge) / dt / (self.roundTripEff / 100.0),
+                                              self.chargeRateMax), 0.0)
+            batt_d_rate = np.where(self.charge > self.chargeMin, self.calcExactDischargeRate(dt), 0.0)
+        else:
+            batt_c_rate = np.where(self.charge < self.chargeMax,
+                                   np.minimum((self.chargeMax - self.charge) / dt, self.chargeRateMax), 0.0)
+            batt_d_rate = np.where(self.charge > self.chargeMin,
+                                   np.minimum((self.charge - self.chargeMin) / dt / self.tau, self.dischargeRateMax),
+                                   0.0)
+
+        # ----------
+        # Power Plant Control
+        # ----------
+        if self.hasPlant.any():
+            minPowerRequest = self.minPowerRequest
+            minGen = minPowerRequest + solar
+
+            # If minimum generation will meet or exceed demand, request minimum power plant output
+            # Otherwise, use solar and battery, then request additional production
+            useMin = (minGen > demand) | (np.abs(minGen - demand) < threshold)
+            powerRequest = np.where(useMin, minPowerRequest, demand - solar - batt_d_rate)
+
+            # Keep Power Request within plant capacity and above threshold
+            powerRequest = np.where(powerRequest > self.capacity, self.capacity, powerRequest)
+            powerRequest = np.where(powerRequest < minPowerRequest, minPowerRequest, powerRequest)
+            powerRequest = np.where(powerRequest < threshold, threshold, powerRequest)
+
+            # Update Power Plant Status
+            self.updatePlant(powerRequest, dt)
+
+        # ----------
+        # Perform Energy Balance
+        # ----------
+        supply = self.powerOutput + solar
+        diff = supply - demand
+
+        # 1) Demand = Supply (within threshold), 2) Supply > Demand, 3) Demand > Supply
+        balanced = np.abs(diff) < threshold
+        excess = ~balanced & (diff > 0.0)
+        shortage = ~balanced & ~excess
+
+        # 2) A) Charge Batteries, B) Curtail Solar, C) Shed Load
+        increase = np.where(diff > batt_c_rate, batt_c_rate, diff)
+        remaining = diff - increase
+        used = np.where(remaining < solar, solar - remaining, 0.0)
+        remaining = remaining - (solar - used)
+        battIncrease = np.where(excess, increase, 0.0)
+        solarUsed = np.where(excess, used, solar)
+        loadShed = np.where(excess, remaining, 0.0)
+
+        # 3) Discharge Batteries, then use grid to make-up remaining difference
+        decrease = np.where(np.abs(diff) > batt_d_rate, batt_d_rate, np.abs(diff))
+        remaining = diff + decrease
+        grid = np.where(np.abs(remaining) < self.gridCapacity, np.abs(remaining), self.gridCapacity)
+        battDecrease = np.where(shortage, decrease, 0.0)
+        gridUsed = np.where(shortage, grid, 0.0)
+
+        # ----------
+        # Calculate Emissions
+        # ----------
+        CO2_produced = (gridUsed * dt * self.gridEmissions[hour, self.caseIndex]) + (
+                self.heatInput / 60.0 * dt * self.fuelEmissions)
+        CO2_captured = CO2_produced * (self.co2CaptureEff / 100.0)
+        Emissions = CO2_produced - CO2_captured
+
+        # ----------
+        # Update Battery (Storage.update)
+        # ----------
+        charge_old = self.charge
+        increase = battIncrease * self.roundTripEff / 100.0  # MW (Only apply when storing)
+        self.charge = self.charge + increase * dt - battDecrease * dt  # MW-min
+
+        # ----------
+        # Check Energy Balance
+        # ----------
+        E_in = solar + self.powerOutput + battDecrease + gridUsed
+        E_out = demand + battIncrease + loadShed + (solar - solarUsed)
+        deficit = E_in - E_out
+
+        # Return performance of current timestep (ordered as attributes_time_series)
+        return (self.powerRequest, self.powerOutput, self.powerRamp, self.heatInput, self.efficiency,
+                self.charge, increase, battDecrease, battDecrease, battIncrease, (self.charge - charge_old) / dt,
+                solarUsed, loadShed, deficit, gridUsed, CO2_produced, CO2_captured, Emissions)
+
+    # ========================================================================
+    # Run Simulation
+    # ========================================================================
+    def run(self):
+        self.initArrays()
+        self.caseIndex = np.arange(self.cases)
+
+        # Access inputs once
+        dt = self.data.loc[:, 'dt'].values.tolist()
+        hour = self.data.loc[:, 'hour'].values.tolist()
+        demand = self.data.loc[:, 'demand'].values.tolist()
+        solar = self.data.loc[:, 'solar'].values.tolist()
+
+        # Check that enough data points exist for omitPeriod, if not use all data points
+        if self.steps > omitPeriod:
+            first = omitPeriod
+        else:
+            first = 0
+
+        # Online totals (one entry per scenario)
+        zeros = np.zeros(self.cases)
+        sums = {name: zeros.copy() for name in ['demand', 'solar', 'powerOutput', 'heatInput', 'solarUsed', 'loadShed',
+                                                 'deficit', 'gridUsed', 'emissions', 't_total', 't_under', 't_over']}
+        deficit_max = np.full(self.cases, -np.inf)
+        deficit_min = np.full(self.cases, np.inf)
+        tod_emissions = np.zeros((len(tod_hrs), self.cases))
+        tod_heatInput = np.zeros((len(tod_hrs), self.cases))
+        tod_demand = np.zeros((len(tod_hrs), self.cases))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for step in range(self.steps):
+                solar_step = solar[step] * self.solarScale
+
+                # Update System Operation
+                solarUsed, loadShed, deficit, gridUsed, Emissions = self.update(dt[step], hour[step], demand[step],
+                                                                                solar_step)
+                if step < first:
+                    continue
+
+                # Calculate Energy Use from Power ( MW to MWh) and accumulate
+                demand_MWh = demand[step] * dt[step] / 60
+                heatInput_MWh = self.heatInput * dt[step] / 60
+                sums['demand'] += demand_MWh
+                sums['solar'] += solar_step * dt[step] / 60
+                sums['powerOutput'] += self.powerOutput * dt[step] / 60
+                sums['heatInput'] += heatInput_MWh
+                sums['solarUsed'] += solarUsed * dt[step] / 60
+                sums['loadShed'] += loadShed * dt[step] / 60
+                sums['deficit'] += deficit * dt[step] / 60
+                sums['gridUsed'] += gridUsed * dt[step] / 60
+                sums['emissions'] += Emissions
+                sums['t_total'] += dt[step]
+                sums['t_under'] += np.where(deficit < (-1.0 * threshold), dt[step], 0)
+                sums['t_over'] += np.where(loadShed > threshold, dt[step], 0)
+                deficit_max = np.maximum(deficit_max, deficit)
+                deficit_min = np.minimum(deficit_min, deficit)
+                tod_emissions[hour[step]] += Emissions
+                tod_heatInput[hour[step]] += heatInput_MWh
+                tod_demand[hour[step]] += demand_MWh
+
+        # Store energy totals
+        totals = self.totals
+        for name in ['demand', 'solar', 'powerOutput', 'heatInput', 'solarUsed', 'loadShed', 'deficit', 'gridUsed']:
+            totals.loc[:, name + '_MWh'] = sums[name]
+        totals.loc[:, 'emissions_tons'] = sums['emissions']
+        totals.loc[:, 't_total'] = sums['t_total']
+        totals.loc[:, 't_under'] = sums['t_under']
+        totals.loc[:, 't_over'] = sums['t_over']
+        totals.loc[:, 'deficit_max'] = deficit_max
+        totals.loc[:, 'deficit_min'] = deficit_min
+        for hr in tod_hrs:
+            totals.loc[:, todName('emissions', hr)] = tod_emissions[hr]
+            totals.loc[:, todName('heatInput', hr)] = tod_heatInput[hr]
+            totals.loc[:, todName('demand', hr)] = tod_demand[hr]
+
+        # Analyze Results
+        self.results = calcResults(self.totals, self.getCosts())
+
+        return self.results
@@ -0,0 +1,215 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Hardcoded Inputs:
+debug = False  # If True, additional information is presented to the console
+cacheVersion = 1  # Increase when the simulation changes, so that old entries are no longer used
+tmpMaxAge = 3600.0  # (s) Unfinished writes older than this are removed during eviction
+
+# General Imports:
+import os
+import json
+import time
+import hashlib
+import tempfile
+import zipfile
+import numpy as np
+import pandas as pd
+
+# BLIS Imports:
+from blis import hres as hres_module
+from blis.hres import attributes_totals, attributes_results
+
+# Attributes that only affect costs (not dispatch), excluded from the key so that cost changes still hit the cache
+costAttributes = ['cost_install', 'cost_OM_fix', 'cost_OM_var', 'cost']
+
+
+# ========================================================================
+# Collect the attributes of a component (works with __dict__ and __slots__)
+# ========================================================================
+def getAttributes(component):
+    names = []
+    for cls in type(component).__mro__:
+        names.extend(getattr(cls, '__slots__', []))
+    names.extend(getattr(component, '__dict__', {}).keys())
+    return {name: getattr(component, name) for name in sorted(set(names)) if hasattr(component, name)}
+
+
+# ========================================================================
+# Convert values to JSON with exact floats
+# ========================================================================
+def toJSON(value):
+    if isinstance(value, dict):
+        return {str(key): toJSON(item) for key, item in value.items()}
+    elif isinstance(value, (list, tuple, np.ndarray, pd.Series)):
+        return [toJSON(item) for item in list(value)]
+    elif isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    elif isinstance(value, (int, np.integer)):
+        return int(value)
+    elif isinstance(value, (float, np.floating)):
+        return repr(float(value))  # repr is exact for floats
+    elif value is None or isinstance(value, str):
+        return value
+    elif isinstance(value, np.void):
+        # Element of a structured array (e.g. the state of each unit of a Fleet), by field
+        return {name: toJSON(value[name]) for name in value.dtype.names}
+    else:
+        # Nested components
+        return {'class': type(value).__name__, 'attributes': toJSON(getAttributes(value))}
+
+
+# ========================================================================
+# Hash the input time series
+# ========================================================================
+def hashData(data):
+    h = hashlib.sha256()
+    for column in ['dt', 'hour', 'demand', 'solar']:
+        values = np.ascontiguousarray(data.loc[:, column].values)
+        h.update(column.encode())
+        h.update(str(values.dtype).encode())
+        h.update(values.tobytes())
+    return h.hexdigest()
+
+
+# ========================================================================
+# Key of an HRES, based on every input that affects dispatch (including the initial state of the components)
+# ========================================================================
+def getKey(hres):
+    def physical(component):
+        attributes = getAttributes(component)
+        return {name: value for name, value in attributes.items() if name not in costAttributes}
+
+    description = {'version': cacheVersion,
+                   'controller': type(hres).__module__ + '.' + type(hres).__qualname__,
+                   'omitPeriod': hres_module.omitPeriod,
+                   'threshold': hres_module.threshold,
+                   'data': hashData(hres.data),
+                   'plant': physical(hres.plant),
+                   'batt': physical(hres.batt),
+                   'grid': physical(hres.grid),
+                   'fuel': physical(hres.fuel)}
+    text = json.dumps(toJSON(description), sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+# ========================================================================
+# Content-addressed cache of simulation results
+# Entries are keyed by everything that affects dispatch (data, plant, storage, grid, fuel emissions and control),
+# they store the energy totals, so a hit is re-priced with the current costs and financing
+# ========================================================================
+class ResultsCache:
+
+    def __init__(self, directory, maxBytes=1.0e9):
+        self.directory = directory  # Shared directory, may be used by several processes at once
+        self.maxBytes = maxBytes  # (bytes) Least recently used entries are evicted above this size
+        os.makedirs(directory, exist_ok=True)
+
+    # ----------
+    # Key of an HRES, based on every input that affects dispatch
+    # ----------
+    def getKey(self, hres):
+        return getKey(hres)
+
+    def getPath(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    # ----------
+    # Return stored (totals, results) or None
+    # ----------
+    def get(self, key):
+        path = self.getPath(key)
+        try:
+            with np.load(path) as entry:
+                totals = pd.Series(entry['totals'], index=attributes_totals)
+                results = pd.Series(entry['results'], index=attributes_results)
+        except (IOError, OSError, KeyError, ValueError, zipfile.BadZipFile):
+            # Missing, evicted by another process, or unreadable
+            return None
+
+        # Mark as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        if debug:
+            print("Cache hit: " + key)
+        return totals, results
+
+    # ----------
+    # Store totals and results
+    # Written to a temporary file and renamed, so readers never see a partial entry and concurrent writers of the
+    # same key are safe (both write the same content, the last rename wins)
+    # ----------
+    def put(self, key, totals, results):
+        handle, tmpPath = tempfile.mkstemp(dir=self.directory, prefix='.' + key, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                np.savez(f, totals=totals.reindex(attributes_totals).values.astype(float),
+                         results=results.reindex(attributes_results).values.astype(float))
+            os.replace(tmpPath, self.getPath(key))
+        except BaseException:
+            try:
+                os.remove(tmpPath)
+            except OSError:
+                pass
+            raise
+        self.evict()
+
+    # ----------
+    # Remove least recently used entries until the cache fits in maxBytes
+    # ----------
+    def evict(self):
+        entries = []
+        total = 0
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if entry.name.endswith('.tmp'):
+                # Left behind by a writer that was killed
+                if now - stat.st_mtime > tmpMaxAge:
+                    self.remove(entry.path)
+            elif entry.name.endswith('.npz'):
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total = total + stat.st_size
+
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self.maxBytes:
+                break
+            self.remove(path)
+            total = total - size
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            # Already removed by another process
+            pass
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npz') or entry.name.endswith('.tmp'):
+                self.remove(entry.path)
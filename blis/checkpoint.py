@@ -0,0 +1,123 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Hardcoded Inputs:
+debug = False  # If True, additional information is presented to the console
+checkpointVersion = 2  # Increase when the contents of checkpoints change, so that old checkpoints are not resumed
+
+# General Imports:
+import os
+import json
+import time
+import pickle
+import hashlib
+import tempfile
+
+# BLIS Imports:
+from blis.cache import getKey
+
+
+# ========================================================================
+# Checkpoints of a single HRES run, so that an interrupted run (e.g. a preempted job) resumes where it stopped
+# Pass to HRES.run(checkpoint=...). The state is saved at the end of a block of timesteps once interval has passed:
+# the states of the plant and battery, the timestep and either the time series so far (storePerf=True) or the
+# accumulated energy totals (storePerf=False). A later run of the same HRES (same data, components and initial
+# state) resumes from the checkpoint and gives identical results. The file is removed when the run completes
+# Only the plant and battery are saved, children of HRES that keep other state while simulating are not supported
+# ========================================================================
+class Checkpoint:
+
+    def __init__(self, path, interval=300.0):
+        self.path = path  # File, should be on storage that outlives the job
+        self.interval = interval  # (s) Minimum wall time between checkpoints
+        self.key = None  # Key of the current run
+        self.lastSave = None  # (s) Time of the last checkpoint
+
+    # ----------
+    # Key of a run, based on the inputs and initial state of hres and on what is accumulated while simulating
+    # ----------
+    def getKey(self, hres):
+        description = [checkpointVersion, getKey(hres), bool(hres.storePerf), list(hres.groupings), hres.steps]
+        return hashlib.sha256(json.dumps(description).encode()).hexdigest()
+
+    # ----------
+    # Start a run of hres, returns the saved state of the same run or None
+    # ----------
+    def start(self, hres):
+        self.key = self.getKey(hres)
+        self.lastSave = time.time()
+        try:
+            with open(self.path, 'rb') as f:
+                entry = pickle.load(f)
+        except (IOError, OSError, EOFError, ValueError, pickle.UnpicklingError):
+            # No checkpoint or unreadable
+            return None
+
+        if not isinstance(entry, dict) or entry.get('key') != self.key:
+            print("Warning: checkpoint " + str(self.path) + " is from a different run, starting from the beginning")
+            return None
+
+        return entry
+
+    # ----------
+    # Check if a checkpoint should be saved
+    # ----------
+    def due(self):
+        return time.time() - self.lastSave >= self.interval
+
+    # ----------
+    # Save the state of hres after timestep step (step timesteps have been simulated)
+    # perf is the time series (rows before step are saved) and totals is the TotalsAccumulator, either may be None
+    # Written to a temporary file and renamed, so an interrupted write leaves the previous checkpoint
+    # ----------
+    def save(self, hres, step, perf=None, totals=None):
+        entry = {'key': self.key,
+                 'step': step,
+                 'plant': hres.plant.getState(),
+                 'batt': hres.batt.getState(),
+                 'perf': None if perf is None else perf[:step],
+                 'totals': totals}
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, tmpPath = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(self.path), suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpPath, self.path)
+        except BaseException:
+            try:
+                os.remove(tmpPath)
+            except OSError:
+                pass
+            raise
+        self.lastSave = time.time()
+
+        if debug:
+            print("Checkpoint saved at timestep " + str(step))
+
+    # ----------
+    # Remove the checkpoint (run completed)
+    # ----------
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
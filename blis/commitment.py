@@ -0,0 +1,269 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Hardcoded Inputs:
+debug = False  # If True, additional information is presented to the console
+planMinutes = 60  # (min) Resolution of the commitment plan, the data is resampled to this resolution
+unservedCost = 1000.0  # ($/MWh) Cost of demand that is not met by the plant, solar, battery or grid
+
+# General Imports:
+import math
+import numpy as np
+
+# BLIS Imports:
+from blis.hres import HRES
+from blis.power_plant import PowerPlant, calcEfficiency, OFF, STARTING
+from blis.storage import Storage, calcExactDischargeRate
+from blis.resample import resampleData, getWindows
+from blis.representative_days import getDays
+
+
+# =============================================================================#
+# Plant states of the commitment plan: ON (index 0), OFF for k periods since the stop (index k = 1..offPeriods,
+# the plant can be restarted from offPeriods, after stopTime) and STARTING for j periods since the start
+# (index offPeriods + j, j = 1..startPeriods - 1, until startTime has passed)
+# Returns for each state and decision (0: off, 1: committed) the fraction of the period the plant produces, the
+# next state and if the decision is allowed
+# =============================================================================#
+def getTransitions(plant):
+    startPeriods = int(math.ceil(plant.startTime / planMinutes))
+    offPeriods = max(int(math.ceil(plant.stopTime / planMinutes)), 1)
+    states = 1 + offPeriods + max(startPeriods - 1, 0)
+
+    # Fraction of the j-th period after the start with the plant on, and the state after it
+    def startFraction(j):
+        return min(max((planMinutes * (j + 1) - plant.startTime) / planMinutes, 0.0), 1.0)
+
+    def startState(j):
+        if j < startPeriods:
+            return offPeriods + j
+        return 0
+
+    fraction = np.zeros((states, 2))
+    nextState = np.zeros((states, 2), dtype=np.intp)
+    allowed = np.zeros((states, 2), dtype=bool)
+
+    # ON: stays on or stops
+    allowed[0, :] = True
+    fraction[0, 1] = 1.0
+    nextState[0, 0] = 1
+
+    # OFF: stays off, started once stopTime has passed
+    for k in range(1, offPeriods + 1):
+        allowed[k, 0] = True
+        nextState[k, 0] = min(k + 1, offPeriods)
+    allowed[offPeriods, 1] = True
+    fraction[offPeriods, 1] = startFraction(0)
+    nextState[offPeriods, 1] = startState(1)
+
+    # STARTING: continues to ON
+    for j in range(1, startPeriods):
+        allowed[offPeriods + j, 1] = True
+        fraction[offPeriods + j, 1] = startFraction(j)
+        nextState[offPeriods + j, 1] = startState(j + 1)
+
+    # State of the current plant status
+    if plant.statusNum == OFF:
+        initial = offPeriods
+    elif plant.statusNum == STARTING and startPeriods > 1:
+        initial = offPeriods + 1
+    else:
+        initial = 0
+
+    return fraction, nextState, allowed, initial
+
+
+# =============================================================================#
+# Cost ($) and battery charge at the end (MW-min) of one period of the plan, for the plant producing during fractions
+# of the period (F x 1) from battery charges (K), returned as F x K arrays
+# Energy balance of HRES.dispatch with the period as a single timestep: the plant covers the demand not met by solar
+# and the battery (between its minimum and capacity), the battery is integrated exactly over the period
+# =============================================================================#
+def getPeriodCosts(hres, dt, demand, solar, fraction, charge):
+    plant = hres.plant
+    batt = hres.batt
+    rte = batt.roundTripEff / 100.0
+
+    # Rates available over the period
+    dischargeRate = calcExactDischargeRate(charge - batt.chargeMin, dt, batt.tau, batt.dischargeRateMax)
+    chargeRate = np.minimum((batt.chargeMax - charge) / dt / rte, batt.chargeRateMax)
+
+    # Plant output while on
+    if plant.capacity > 0.0:
+        output = np.clip(demand - solar - dischargeRate, plant.minPowerRequest, plant.capacity)
+        eff = calcEfficiency(output, plant.capacity, plant.maxEfficiency, plant.Eff_A, plant.Eff_B, plant.Eff_C,
+                             -np.inf, np.inf, plant.effTable)
+    else:
+        output = np.zeros(charge.shape)
+        eff = np.ones(charge.shape)
+    powerOutput = fraction * output
+    heatInput = powerOutput / (eff / 100.0)
+
+    # Energy balance
+    diff = powerOutput + solar - demand
+    battIncrease = np.clip(diff, 0.0, chargeRate)
+    battDecrease = np.clip(-diff, 0.0, dischargeRate)
+    shortage = np.maximum(-diff - battDecrease, 0.0)
+    gridUsed = np.minimum(shortage, hres.grid.capacity)
+    unserved = shortage - gridUsed
+    chargeEnd = np.clip(charge + (battIncrease * rte - battDecrease) * dt, batt.chargeMin, batt.chargeMax)
+
+    cost = dt / 60.0 * (heatInput * hres.fuel.cost + powerOutput * plant.cost_OM_var +
+                        gridUsed * hres.grid.cost_OM_var + unserved * unservedCost)
+    return cost, chargeEnd
+
+
+# =============================================================================#
+# Linear interpolation of values (state x level) at charge (any shape), returns state x charge.shape
+# =============================================================================#
+def interpolate(values, levels, charge):
+    if len(levels) == 1:
+        return values[:, np.zeros(charge.shape, dtype=np.intp)]
+    position = (charge - levels[0]) / (levels[1] - levels[0])
+    low = np.clip(np.floor(position).astype(np.intp), 0, len(levels) - 2)
+    weight = position - low
+    return values[:, low] * (1.0 - weight) + values[:, low + 1] * weight
+
+
+# =============================================================================#
+# Plan when the plant of hres is committed (on), minimizing the cost of fuel, variable O&M, grid use and unserved
+# demand (unservedCost) with perfect foresight of each day of data (day-ahead demand and solar)
+# Each day is solved by dynamic programming over periods of planMinutes, with the plant state (see getTransitions)
+# and the battery charge (levels, evenly spaced from chargeMin to chargeMax) as the state; every state is updated
+# at once for each period. The value of the battery charge at the end of a day is the value at the start of the
+# previous day (the first day is solved twice), and each day starts from the state the previous day ended in
+# Returns the plan of each timestep of data (True when committed), starting from the current state of hres
+# =============================================================================#
+def planCommitment(hres, levels=51):
+    if not isinstance(hres.plant, PowerPlant) or not isinstance(hres.batt, Storage):
+        raise ValueError("Commitment planning requires PowerPlant and Storage components")
+
+    plant = hres.plant
+    batt = hres.batt
+    committed = np.ones(hres.steps, dtype=bool)
+    if plant.capacity <= 0.0 or hres.steps == 0:
+        return committed
+
+    # Inputs of each period
+    periods = resampleData(hres.data, planMinutes)
+    first = getWindows(hres.data, planMinutes)
+    dt = periods.loc[:, 'dt'].values
+    demand = periods.loc[:, 'demand'].values
+    solar = periods.loc[:, 'solar'].values
+
+    # State space
+    fraction, nextState, allowed, state = getTransitions(plant)
+    fractions, fractionIndex = np.unique(fraction, return_inverse=True)
+    fractionIndex = fractionIndex.reshape(fraction.shape)
+    if batt.chargeMax > batt.chargeMin:
+        levels = np.linspace(batt.chargeMin, batt.chargeMax, levels)
+    else:
+        levels = np.array([batt.chargeMin])
+    charge = min(max(batt.charge, batt.chargeMin), batt.chargeMax)
+
+    # Value (least cost to the end of the day) of each state at the start of each period of a day
+    def solveDay(start, stop, terminal):
+        values = np.zeros((stop - start + 1,) + terminal.shape)
+        values[-1] = terminal
+        for t in range(stop - start - 1, -1, -1):
+            p = start + t
+            cost, chargeEnd = getPeriodCosts(hres, dt[p], demand[p], solar[p], fractions[:, np.newaxis], levels)
+            following = interpolate(values[t + 1], levels, chargeEnd)  # next state x fraction x level
+            total = cost[fractionIndex] + following[nextState, fractionIndex]  # state x decision x level
+            total[~allowed] = np.inf
+            values[t] = total.min(axis=1)
+        return values
+
+    # Follow the least cost decisions from the actual state
+    plan = np.zeros(len(periods), dtype=bool)
+    terminal = np.zeros((len(fraction), len(levels)))
+    for day, (start, stop) in enumerate(getDays(periods)):
+        values = solveDay(start, stop, terminal)
+        if day == 0:
+            values = solveDay(start, stop, values[0] - values[0].min())
+
+        for t in range(stop - start):
+            p = start + t
+            cost, chargeEnd = getPeriodCosts(hres, dt[p], demand[p], solar[p], fractions[:, np.newaxis],
+                                             np.array([charge]))
+            following = interpolate(values[t + 1], levels, chargeEnd)
+            total = cost[fractionIndex[state], 0] + following[nextState[state], fractionIndex[state], 0]
+            total[~allowed[state]] = np.inf
+            decision = int(np.argmin(total))
+            plan[p] = decision == 1
+            charge = chargeEnd[fractionIndex[state, decision], 0]
+            state = nextState[state, decision]
+
+        terminal = values[0] - values[0].min()
+
+        if debug:
+            print("Day " + str(day) + ": committed " + str(plan[start:stop].sum()) + " of " + str(stop - start) +
+                  " periods, cost ($): " + str(values[0].min()))
+
+    # Plan of each timestep
+    committed[:] = np.repeat(plan, np.diff(np.append(first, hres.steps)))
+    return committed
+
+
+# =============================================================================#
+# HRES following a commitment plan: the plant is started at the start of each committed period (so it is on after
+# startTime) and stopped when it is not committed, dispatch is otherwise the built-in dispatch of HRES
+# schedule is the plan of each timestep of data (True when committed), planned by run() with planCommitment if None
+# The plan depends on costs, which are not part of the keys of blis.ResultsCache, so the cache is not used
+# =============================================================================#
+class HRESCommitment(HRES):
+
+    def __init__(self, data, plant, solar=None, batt=None, fuel=None, grid=None, i=0.02, n=20,
+                 storePerf=True, groupings=(), schedule=None, levels=51):
+        HRES.__init__(self, data, plant, solar=solar, batt=batt, fuel=fuel, grid=grid, i=i, n=n,
+                      storePerf=storePerf, groupings=groupings)
+        self.schedule = schedule
+        self.levels = levels  # Battery charge levels of the plan
+        self.step = 0  # Timestep of the next dispatch
+
+    def run(self, engine='array', cache=None, checkpoint=None):
+        if not isinstance(self.plant, PowerPlant):
+            raise ValueError("HRESCommitment requires a PowerPlant (a Fleet commits its units itself)")
+        if self.schedule is None:
+            self.schedule = planCommitment(self, self.levels)
+        if len(self.schedule) != self.steps:
+            raise ValueError("schedule must have one entry per timestep of data")
+        self.step = 0
+        return HRES.run(self, engine=engine, checkpoint=checkpoint)
+
+    def resume(self, checkpoint, perf, totals):
+        first, totals = HRES.resume(self, checkpoint, perf, totals)
+        self.step = first
+        return first, totals
+
+    def reconfigure(self, **params):
+        HRES.reconfigure(self, **params)
+        self.schedule = None  # Planned again by the next run
+
+    def dispatch(self, dt, hour, demand, solar):
+        if self.plant.capacity > 0.0:
+            if self.schedule[self.step]:
+                if self.plant.statusNum == OFF:
+                    self.plant.start()
+            elif self.plant.statusNum != OFF:
+                self.plant.stop()
+        self.step = self.step + 1
+        return HRES.dispatch(self, dt, hour, demand, solar)
@@ -0,0 +1,106 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Hardcoded Inputs:
+debug = False  # If True, additional information is presented to the console
+
+# BLIS Imports:
+from blis import kernels, PowerPlant, Storage
+from blis.hres import calcResults
+
+
+# =============================================================================#
+# Find the cyclic steady state of hres: the initial state for which the data (e.g. a periodic day or week) ends in the
+# same state it started from, so results no longer depend on a guessed initial battery charge or on omitPeriod
+# Only the battery charge, plant status and plant output carry over between timesteps (the time counters only matter
+# while starting up, the remaining states are outputs of the last timestep)
+# Each iteration simulates the data once (engine as in HRES.run), the plant state is found by fixed-point iteration
+# and the battery charge by secant steps, safeguarded by bisection of [chargeMin, chargeMax]
+# Converged when the battery charge changes by less than tol * chargeMax and the plant output by less than
+# tol * capacity over the data
+# Returns the initial state (blis.kernels layout, set it with kernels.unpackState(state, plant, batt) to reuse it),
+# the components of hres are set to this state (including batt.initCharge) and hres holds the perf, totals and
+# results of the data simulated from it (the number of iterations in hres.iterations)
+# =============================================================================#
+def findCyclicState(hres, engine='jit', tol=1.0e-6, maxIterations=50):
+    if not isinstance(hres.plant, PowerPlant) or not isinstance(hres.batt, Storage):
+        raise ValueError("Cyclic state requires PowerPlant and Storage components")
+
+    chargeTol = tol * max(hres.batt.chargeMax, 1.0)
+    outputTol = tol * max(hres.plant.capacity, 1.0)
+
+    # Simulate the data once from state, returns the final state
+    def simulate(state):
+        kernels.unpackState(state, hres.plant, hres.batt)
+        hres.run(engine=engine)
+        return kernels.packState(hres.plant, hres.batt)
+
+    # The initial charge lies within [lo, hi]: the charge at the end is above the initial charge below it, and
+    # below the initial charge above it
+    lo = hres.batt.chargeMin
+    hi = hres.batt.chargeMax
+    state = kernels.packState(hres.plant, hres.batt)
+    previous = None  # (initial charge, change of charge) of the previous iteration
+    converged = False
+    for iteration in range(1, maxIterations + 1):
+        end = simulate(state)
+        change = end[kernels.CHARGE] - state[kernels.CHARGE]
+
+        if debug:
+            print("Iteration " + str(iteration) + ": initial charge " + str(state[kernels.CHARGE]) +
+                  " (MW-min), change " + str(change) + " (MW-min)")
+
+        # Check for convergence
+        if abs(change) <= chargeTol and end[kernels.STATUS] == state[kernels.STATUS] and \
+                abs(end[kernels.POWER_OUTPUT] - state[kernels.POWER_OUTPUT]) <= outputTol:
+            converged = True
+            break
+
+        # Update bracket
+        if change > 0.0:
+            lo = state[kernels.CHARGE]
+        else:
+            hi = state[kernels.CHARGE]
+
+        # Next initial charge, secant step if it stays within the bracket, otherwise bisection
+        # (the first iteration uses the final charge)
+        charge = end[kernels.CHARGE]
+        if previous is not None and change != previous[1]:
+            charge = state[kernels.CHARGE] - change * (state[kernels.CHARGE] - previous[0]) / (change - previous[1])
+        if not lo < charge < hi:
+            charge = 0.5 * (lo + hi)
+        previous = (state[kernels.CHARGE], change)
+
+        # Next initial state, the plant starts from its final state
+        state = end.copy()
+        state[kernels.CHARGE] = charge
+
+    if not converged:
+        print("Warning: cyclic state did not converge, change of battery charge: " + str(change) + " (MW-min)")
+
+    # Components start from the cyclic state, the cost of the initial battery charge uses the cyclic charge
+    kernels.unpackState(state, hres.plant, hres.batt)
+    if hres.batt.chargeMax > 0.0:
+        hres.batt.initCharge = state[kernels.CHARGE] / hres.batt.chargeMax
+        hres.results = calcResults(hres.totals, hres.getCosts())
+    hres.iterations = iteration
+
+    return state
@@ -0,0 +1,112 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Hardcoded Inputs:
+debug = False  # If True, additional information is presented to the console
+
+# General Imports:
+import numpy as np
+import pandas as pd
+
+# BLIS Imports:
+from blis.hres import attributes_time_series, blockSize
+from blis.batch import HRESBatch
+from blis.representative_days import getDays
+
+
+# =============================================================================#
+# Simulate hres with every day starting from the initial state of the components (e.g. the battery returns to
+# initCharge every midnight)
+# Days are independent, so all days are simulated together: the time series is arranged as a (timestep of day x day)
+# array and each timestep is a vectorized update of every day (see blis.HRESBatch)
+# Sets perf (if storePerf), totals and results of hres, the states of the components of hres are not changed
+# Requires the built-in dispatch
+# =============================================================================#
+def runDailyReset(hres):
+    if not hres.usesBuiltinDispatch():
+        raise ValueError("Daily reset requires the built-in dispatch of HRES")
+
+    # Arrange inputs by timestep of day x day, days shorter than the longest day are padded at the end
+    # (padding uses 1 min timesteps without demand or solar and is not stored)
+    inputs = hres.getInputArrays()
+    dt, hour, demand, solar = inputs
+    days = getDays(hres.data)
+    starts = np.array([start for start, stop in days])
+    lengths = np.array([stop - start for start, stop in days])
+    steps = np.arange(lengths.max())[:, np.newaxis]
+    valid = steps < lengths
+    rows = np.where(valid, starts + steps, 0)  # row of data of each entry
+    dt_days = np.where(valid, dt[rows], 1.0)
+    hour_days = np.where(valid, hour[rows], 0)
+    demand_days = np.where(valid, demand[rows], 0.0)
+    solar_days = np.where(valid, solar[rows], 0.0)
+
+    if debug:
+        print("Days: " + str(len(days)) + ", timesteps per day: " + str(len(steps)))
+
+    # A single scenario with the components of hres, its initial state is shared by all days
+    batch = HRESBatch(hres.data, pd.DataFrame(index=[0]), hres.plant, solar=hres.solar, batt=hres.batt,
+                      fuel=hres.fuel, grid=hres.grid, i=hres.i, n=hres.n)
+    batch.initArrays()
+    batch.caseIndex = np.zeros(len(days), dtype=np.intp)
+
+    # Simulate operation, storing performance in the order of data, or accumulating energy totals every block of
+    # about blockSize rows if perf is not stored
+    if hres.storePerf:
+        perf = np.zeros((hres.steps, len(attributes_time_series)))
+    else:
+        totals = hres.initTotals()
+        stepsPerBlock = max(blockSize // len(days), 1)
+        blockRows = []
+        blockPerf = []
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for step in range(len(steps)):
+            step_perf = batch.dispatch(dt_days[step], hour_days[step], demand_days[step], solar_days[step])
+            step_perf = np.column_stack(np.broadcast_arrays(*step_perf))
+            if hres.storePerf:
+                perf[rows[step, valid[step]]] = step_perf[valid[step]]
+            else:
+                blockRows.append(rows[step, valid[step]])
+                blockPerf.append(step_perf[valid[step]])
+                if len(blockRows) == stepsPerBlock or step == len(steps) - 1:
+                    addRows(hres, totals, inputs, np.concatenate(blockRows), np.concatenate(blockPerf))
+                    blockRows = []
+                    blockPerf = []
+
+    # Analyze Results (energy totals are reduced from the time series as usual)
+    if hres.storePerf:
+        hres.perf = pd.DataFrame(data=perf, index=range(hres.steps), columns=attributes_time_series)
+    else:
+        hres.storeTotals(totals)
+    return hres.analyzeResults()
+
+
+# =============================================================================#
+# Add the performance of rows of data (in any order) to the energy totals of hres (see HRES.initTotals)
+# inputs are the input arrays of hres (see HRES.getInputArrays)
+# =============================================================================#
+def addRows(hres, totals, inputs, rows, perf):
+    # Timesteps within omitPeriod are ignored, as in a run
+    keep = rows >= totals.omit
+    rows = rows[keep]
+    dt, hour, demand, solar = inputs
+    labels = {grouping: hres.groupLabels[grouping][0][rows] for grouping in hres.groupings}
+    totals.add(totals.omit, dt[rows], hour[rows], demand[rows], solar[rows], perf[keep], labels)
@@ -0,0 +1,313 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Hardcoded Inputs:
+debug = False  # If True, additional information is presented to the console
+
+# General Imports:
+import numpy as np
+
+# BLIS Imports:
+from blis.power_plant import OFF, STARTING, ON, plant_state, plant_characteristics, calcEfficiency
+
+# Characteristics of each unit, stored as arrays (one entry per unit)
+unit_characteristics = [name for name in plant_characteristics if name != 'type']
+
+
+# ========================================================================
+# Fleet of thermal units that share load, used in place of a PowerPlant (e.g. HRES(data, plant=Fleet([...])))
+# Characteristics and state of the units are stored as arrays (one entry per unit), the power request of HRES is
+# shared between the units that are ON without loops over units:
+# loadSharing='merit' - units are loaded in order of full load efficiency (best first), each from its minimum output
+# loadSharing='optimal' - the output range of each unit is split into segments and segments are loaded in order of
+#                         incremental heat rate (the heat input curve of each unit is convexified), which minimizes
+#                         heat input (within the resolution of segments)
+# Units that are ON stay at or above minimum output and within their ramp rate. Units are committed by commit(), which
+# HRES calls every timestep with the power it would request and the demand as reserve (units take startTime to start,
+# so solar and storage are not counted on): units are started in merit order (highest full load efficiency first)
+# when the request or reserve exceeds the capacity of the committed units, and stopped in reverse merit order when the
+# request is below the minimum output of the units that are ON and the remaining units cover the request and reserve
+# (at least one unit stays ON, as a PowerPlant is never stopped by HRES). Units can also be started and stopped with
+# start() and stop()
+# Fleet totals are provided with the names used by HRES (capacity, powerOutput, heatInput, ...), costs are capacity
+# weighted averages, so that installed and fixed costs equal the sum of the units
+# Units use the Eff_A/Eff_B/Eff_C efficiency curve (efficiency tables are not supported)
+# ========================================================================
+class Fleet:
+
+    def __init__(self, plants, loadSharing='merit', segments=20):
+        if len(plants) == 0:
+            raise ValueError("Fleet requires at least one unit")
+        if loadSharing not in ['merit', 'optimal']:
+            raise ValueError("Unknown loadSharing: " + str(loadSharing) + ", expected 'merit' or 'optimal'")
+        if any(plant.effTable is not None for plant in plants):
+            raise ValueError("Fleet units use the Eff_A/Eff_B/Eff_C curve, efficiency tables are not supported")
+
+        self.type = 'Fleet'
+        self.units = len(plants)
+        self.unitTypes = [plant.type for plant in plants]
+        self.loadSharing = loadSharing
+        self.segments = segments  # Segments per unit (loadSharing='optimal')
+
+        # Characteristics of each unit
+        for name in unit_characteristics:
+            setattr(self, 'unit_' + name, np.array([getattr(plant, name) for plant in plants], dtype=float))
+
+        # Initial state of each unit (restored by reset)
+        self.initState = np.array([plant.getState() for plant in plants], dtype=plant_state)
+
+        self.initDerived()
+        self.reset()
+
+    # ========================================================================
+    # Derived characteristics, fleet totals and the loading order of the units
+    # ========================================================================
+    def initDerived(self):
+        self.unit_minPower = self.unit_minRange / 100.0 * self.unit_capacity  # (MW) Minimum output of each unit
+
+        # Fleet totals (capacity weighted costs)
+        self.capacity = float(self.unit_capacity.sum())
+        weight = self.unit_capacity / self.capacity if self.capacity > 0.0 else np.full(self.units, 1.0 / self.units)
+        self.maxEfficiency = float(self.unit_maxEfficiency.max())
+        self.commitOrder = np.lexsort((np.arange(self.units), -self.calcUnitEff(self.unit_capacity)))
+        self.cost_install = float((weight * self.unit_cost_install).sum())
+        self.cost_OM_fix = float((weight * self.unit_cost_OM_fix).sum())
+        self.cost_OM_var = float((weight * self.unit_cost_OM_var).sum())
+
+        # Segments of output (unit, lower and upper output) in loading order
+        if self.loadSharing == 'merit':
+            unit = np.arange(self.units)
+            lower = self.unit_minPower
+            upper = self.unit_capacity
+            cost = -self.calcUnitEff(self.unit_capacity)  # Highest full load efficiency first
+            order = np.lexsort((unit, cost))
+        else:
+            fraction = np.linspace(0.0, 1.0, self.segments + 1)
+            power = self.unit_minPower[:, np.newaxis] + np.outer(self.unit_capacity - self.unit_minPower, fraction)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                heat = power / (self.calcUnitEff(power.T).T / 100.0)
+                cost = np.diff(heat, axis=1) / np.diff(power, axis=1)  # Incremental heat rate
+            cost = np.where(np.isfinite(cost), cost, np.inf)
+            cost = np.maximum.accumulate(cost, axis=1)  # Convexify, so segments of a unit are loaded in order
+            unit = np.repeat(np.arange(self.units), self.segments)
+            index = np.tile(np.arange(self.segments), self.units)
+            lower = power[:, :-1].ravel()
+            upper = power[:, 1:].ravel()
+            cost = cost.ravel()
+            order = np.lexsort((index, unit, cost))
+        self.segUnit = unit[order]
+        self.segLower = lower[order]
+        self.segUpper = upper[order]
+
+    # ========================================================================
+    # Efficiency (%) of each unit at outputs pwr (array with one entry per unit, or rows of them)
+    # Outputs of units that are ON are kept within their operating range, so the range is not checked (outputs at
+    # exactly the minimum could otherwise be rounded out of range)
+    # ========================================================================
+    def calcUnitEff(self, pwr):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return calcEfficiency(pwr, self.unit_capacity, self.unit_maxEfficiency, self.unit_Eff_A, self.unit_Eff_B,
+                                  self.unit_Eff_C, -np.inf, np.inf)
+
+    # ========================================================================
+    # Reset to the initial operating state
+    # ========================================================================
+    def reset(self):
+        self.setState(self.initState)
+
+    # ========================================================================
+    # Update characteristics in place (names as in plant_characteristics, a value for all units or an array with one
+    # entry per unit), then reset
+    # ========================================================================
+    def reconfigure(self, **params):
+        for name, value in params.items():
+            if name not in unit_characteristics:
+                raise ValueError("Unknown Fleet parameter: " + name)
+            setattr(self, 'unit_' + name, np.broadcast_to(np.array(value, dtype=float), (self.units,)).copy())
+        self.initDerived()
+        self.reset()
+
+    # ========================================================================
+    # Snapshot of the operating state of each unit (structured array of dtype plant_state), restored with setState
+    # ========================================================================
+    def getState(self):
+        state = np.zeros(self.units, dtype=plant_state)
+        state['status'] = self.statusNum
+        state['range'] = self.range
+        state['efficiency'] = self.unitEfficiency
+        state['powerRequest'] = self.unitPowerRequest
+        state['powerOutput'] = self.unitOutput
+        state['powerRamp'] = self.unitRamp
+        state['heatInput'] = self.unitHeatInput
+        state['timeSinceStart'] = self.timeSinceStart
+        state['timeSinceStop'] = self.timeSinceStop
+        return state
+
+    def setState(self, state):
+        self.statusNum = state['status'].astype(int)
+        self.range = state['range'].copy()
+        self.unitEfficiency = state['efficiency'].copy()
+        self.unitPowerRequest = state['powerRequest'].copy()
+        self.unitOutput = state['powerOutput'].copy()
+        self.unitRamp = state['powerRamp'].copy()
+        self.unitHeatInput = state['heatInput'].copy()
+        self.timeSinceStart = state['timeSinceStart'].copy()
+        self.timeSinceStop = state['timeSinceStop'].copy()
+        self.powerRequest = float(self.unitPowerRequest.sum())
+        self.powerRamp = float(self.unitRamp.sum())
+        self.updateTotals()
+
+    # ========================================================================
+    # Fleet totals of the current state
+    # ========================================================================
+    def updateTotals(self):
+        self.powerOutput = float(self.unitOutput.sum())
+        self.heatInput = float(self.unitHeatInput.sum())
+        if self.heatInput > 0.0:
+            self.efficiency = self.powerOutput / self.heatInput * 100.0
+        else:
+            self.efficiency = -1.0
+
+    # ----------
+    # Minimum output of the units that are ON (MW)
+    # ----------
+    @property
+    def minPowerRequest(self):
+        return float(self.unit_minPower[self.statusNum == ON].sum())
+
+    # ----------
+    # Carbon capture efficiency (%), heat input weighted average of the units
+    # ----------
+    @property
+    def co2CaptureEff(self):
+        if self.heatInput > 0.0:
+            return float((self.unitHeatInput * self.unit_co2CaptureEff).sum() / self.heatInput)
+        return float((self.unit_capacity * self.unit_co2CaptureEff).sum() / max(self.capacity, 1.0e-12))
+
+    # ========================================================================
+    # Operational Commands, units is an index, a list of indices or a boolean array
+    # ========================================================================
+    def start(self, units):
+        mask = np.zeros(self.units, dtype=bool)
+        mask[units] = True
+        mask = mask & (self.statusNum == OFF)
+        self.statusNum = np.where(mask, STARTING, self.statusNum)
+        self.timeSinceStart = np.where(mask, 0.0, self.timeSinceStart)
+
+    def stop(self, units):
+        mask = np.zeros(self.units, dtype=bool)
+        mask[units] = True
+        mask = mask & (self.statusNum != OFF)
+        self.statusNum = np.where(mask, OFF, self.statusNum)
+        self.range = np.where(mask, 0.0, self.range)
+        self.unitEfficiency = np.where(mask, -1.0, self.unitEfficiency)
+        self.unitOutput = np.where(mask, 0.0, self.unitOutput)
+        self.unitHeatInput = np.where(mask, 0.0, self.unitHeatInput)
+        self.timeSinceStart = np.where(mask, -1.0, self.timeSinceStart)
+        self.timeSinceStop = np.where(mask, 0.0, self.timeSinceStop)  # Time since stop is counted from 0.0
+        self.updateTotals()
+
+    # ========================================================================
+    # Commit units for a power request pwr and a reserve (MW) to be covered by the committed capacity, see Fleet
+    # ========================================================================
+    def commit(self, pwr, reserve=0.0):
+        committed = self.statusNum != OFF
+        capacity = self.unit_capacity[committed].sum()
+
+        # Start units until the committed capacity covers the request and reserve
+        required = max(pwr, reserve)
+        if required > capacity:
+            order = self.commitOrder[~committed[self.commitOrder]]
+            count = np.searchsorted(np.cumsum(self.unit_capacity[order]), required - capacity) + 1
+            self.start(order[:count])
+            return
+
+        # Stop the fewest units so that the request is within the range of the remaining units
+        isOn = self.statusNum == ON
+        minPower = self.unit_minPower[isOn].sum()
+        if pwr < minPower:
+            order = self.commitOrder[isOn[self.commitOrder]][::-1][:isOn.sum() - 1]
+            remainingMin = minPower - np.cumsum(self.unit_minPower[order])
+            remainingCapacity = capacity - np.cumsum(self.unit_capacity[order])
+            count = np.searchsorted(-remainingMin, -pwr) + 1  # First with remainingMin <= pwr
+            if count <= len(order) and remainingCapacity[count - 1] >= required:
+                self.stop(order[:count])
+
+    # ========================================================================
+    # Update Fleet Operation (same as PowerPlant.update for each unit, with the power request shared between units)
+    # ========================================================================
+    def update(self, pwr, dt):
+        self.powerRequest = pwr
+        status = self.statusNum
+        isOff = status == OFF
+        isStarting = status == STARTING
+        isOn = status == ON
+        output_old = self.unitOutput
+
+        # OFF - Increase counter since stop (if it has been stopped)
+        self.timeSinceStop = np.where(isOff & (self.timeSinceStop >= 0.0), self.timeSinceStop + dt,
+                                      self.timeSinceStop)
+
+        # STARTING and ON - Increase counter since start
+        self.timeSinceStart = np.where(isStarting | isOn, self.timeSinceStart + dt, self.timeSinceStart)
+
+        # ON - Share the power request, each unit within its minimum output, capacity and ramp rate
+        lower = np.where(isOn, np.maximum(self.unit_minPower, output_old - self.unit_rampRate * dt), 0.0)
+        upper = np.where(isOn, np.minimum(self.unit_capacity, output_old + self.unit_rampRate * dt), 0.0)
+
+        # Requests above the capacity of the units that are ON (e.g. while units are starting) load them fully
+        if self.unit_minPower[isOn].sum() <= pwr:
+            target = min(max(pwr, lower.sum()), upper.sum()) - lower.sum()
+            segLower = np.clip(self.segLower, lower[self.segUnit], upper[self.segUnit])
+            segUpper = np.clip(self.segUpper, lower[self.segUnit], upper[self.segUnit])
+            width = segUpper - segLower
+            loaded = np.clip(target - (np.cumsum(width) - width), 0.0, width)
+            output = lower + np.bincount(self.segUnit, weights=loaded, minlength=self.units)
+        else:
+            output = output_old
+            if isOn.any():
+                print("\nWarning: Power request is out of range")
+                print("pwrRequest: " + str(pwr))
+                print("Min allowed: " + str(self.unit_minPower[isOn].sum()))
+
+        # STARTING - Switch to ON state at minimum output (PowerPlant.initPwr)
+        switch = isStarting & (self.timeSinceStart > self.unit_startTime)
+        output = np.where(isOn, output, np.where(switch, self.unit_minPower, output_old))
+        self.statusNum = np.where(switch, ON, status)
+        self.timeSinceStop = np.where(switch, -1.0, self.timeSinceStop)
+
+        # Update performance of units that are ON
+        active = isOn | switch
+        eff = self.calcUnitEff(output)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.range = np.where(active, output / self.unit_capacity, self.range)
+            self.unitEfficiency = np.where(active, eff, self.unitEfficiency)
+            self.unitHeatInput = np.where(active, output / (eff / 100.0), self.unitHeatInput)
+        self.unitRamp = np.where(isOn, (output - output_old) / dt, self.unitRamp)
+        self.unitPowerRequest = np.where(isOn, output, self.unitPowerRequest)
+        self.unitOutput = output
+
+        powerOutput_old = self.powerOutput
+        self.updateTotals()
+        self.powerRamp = (self.powerOutput - powerOutput_old) / dt  # MW/min
+
+        # Return Power Out and Heat In
+        return self.powerOutput, self.heatInput, self.efficiency
@@ -24,15 +24,21 @@ debug = False  # If True, additional information is presented to the console
 plotDPI = 300
 omitPeriod = 0  # Number of samples to ignore (5 hours to give sufficient start-up time)
 threshold = 0.001  # threshold for rounding (MW)
+blockSize = 4096  # Number of timesteps reduced at once when accumulating energy totals
+fastForward = True  # Skip repeated steady-state timesteps (array and jit engines, results are identical)
 
 # General Imports:
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
 # BLIS Imports:
-from blis import defaultInputs, PowerPlant, Solar, Fuel, Battery, Grid
+from blis import defaultInputs, PowerPlant, Solar, Fuel, Storage, Battery, Grid
+from blis.fleet import Fleet
+from blis import kernels
+from blis.power_plant import STARTING
 
 # ========================================================================
 # Class to simulate and analyze Hybrid Renewable Energy System (HRES)
@@ -49,17 +55,412 @@ attributes_results = ['demand_MWh', 'solar_MWh', 'powerOutput_MWh', 'heatInput_M
                       'deficit_pct_time',
                       'deficit_pct_energy', 'solarCurtail_pct', 'loadShed_pct_energy', 'loadShed_pct_time']
 # Add time of day attributes
+def todName(var, hr):
+    if hr < 10:
+        return var + '_hr0' + str(hr)
+    else:
+        return var + '_hr' + str(hr)
+
+
 tod_vars = ['emissions', 'costs', 'demand']
 tod_hrs = range(24)
 attributes_tod = []
 for var in tod_vars:
     for hr in tod_hrs:
-        if hr < 10:
-            attributes_tod.append(var + '_hr0' + str(hr))
-        else:
-            attributes_tod.append(var + '_hr' + str(hr))
+        attributes_tod.append(todName(var, hr))
 attributes_results = attributes_results + attributes_tod
 
+# Energy totals (calculated from the time series, used to calculate results)
+attributes_totals = ['demand_MWh', 'solar_MWh', 'powerOutput_MWh', 'heatInput_MWh', 'solarUsed_MWh', 'loadShed_MWh',
+                     'deficit_MWh', 'gridUsed_MWh', 'emissions_tons', 'deficit_max', 'deficit_min',
+                     't_total', 't_under', 't_over']
+tod_totals = ['emissions', 'heatInput', 'demand']
+attributes_totals = attributes_totals + [todName(var, hr) for var in tod_totals for hr in tod_hrs]
+
+results_index = pd.Index(attributes_results)
+tod_names = [(todName('emissions', hr), todName('heatInput', hr), todName('demand', hr), todName('costs', hr)) for hr
+             in tod_hrs]
+
+# Cost and financing inputs (only used to calculate results, not the time series)
+attributes_costs = ['plant_capacity', 'plant_cost_install', 'plant_cost_OM_fix', 'plant_cost_OM_var',
+                    'solar_capacity', 'solar_cost_install', 'solar_cost_OM_fix',
+                    'batt_capacity', 'batt_initCharge', 'batt_cost_install', 'batt_cost_OM_fix',
+                    'fuel_cost', 'grid_cost_OM_var', 'i', 'n']
+
+
+# ========================================================================
+# Calculate results from energy totals and costs
+# totals and costs are either pandas Series/dicts (single case) or DataFrames (one row per case),
+# if either is a DataFrame the results are returned as a DataFrame with one row per case
+# ========================================================================
+def calcResults(totals, costs):
+    # Access as floats/arrays so that cases are broadcast by position (Series are read through dicts for speed)
+    def get(df, name):
+        return np.asarray(df[name], dtype=float)
+
+    index = None
+    if isinstance(totals, pd.DataFrame):
+        index = totals.index
+    elif isinstance(totals, pd.Series):
+        totals = totals.to_dict()
+    if isinstance(costs, pd.DataFrame):
+        if index is None:
+            index = costs.index
+    elif isinstance(costs, pd.Series):
+        costs = costs.to_dict()
+
+    demand_MWh = get(totals, 'demand_MWh')
+    solar_MWh = get(totals, 'solar_MWh')
+    powerOutput_MWh = get(totals, 'powerOutput_MWh')
+    heatInput_MWh = get(totals, 'heatInput_MWh')
+    solarUsed_MWh = get(totals, 'solarUsed_MWh')
+    loadShed_MWh = get(totals, 'loadShed_MWh')
+    deficit_MWh = get(totals, 'deficit_MWh')
+    gridUsed_MWh = get(totals, 'gridUsed_MWh')
+    t_total = get(totals, 't_total')
+    t_under = get(totals, 't_under')
+    t_over = get(totals, 't_over')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+
+        # Fuel Cost
+        fuelCost_dollars = heatInput_MWh * get(costs, 'fuel_cost')  # $
+
+        # Effective Efficiency
+        efficiency_pct = np.where(heatInput_MWh > 0.0, powerOutput_MWh / heatInput_MWh * 100.0, 0.0)  # %
+
+        # Pct of the time with a deficit
+        deficit_pct_time = np.where(t_under > 0, t_under / t_total * 100.0, 0.0)
+        deficit_pct_energy = np.where(t_under > 0, -1.0 * deficit_MWh / demand_MWh * 100.0, 0.0)
+
+        # Solar Curtailment
+        solarCurtail_pct = np.where(solar_MWh > 0.0, 100.0 - solarUsed_MWh / solar_MWh * 100.0, 0.0)
+
+        # Load Shed Pct - energy
+        loadShed_pct_energy = np.where(powerOutput_MWh > 0.0, loadShed_MWh / powerOutput_MWh * 100.0, 0.0)
+
+        # Load Shed Pct - time
+        loadShed_pct_time = np.where(t_over > 0.0, t_over / t_total * 100.0, 0.0)
+
+        # ----
+        # LCOE
+        # ----
+        # Calculate multiplier required to scale simulated time series to one year of data
+        LCOE_scale = 365.25 * 24 * 60 / t_total
+
+    # I, Install Costs (with financing)
+    plant_install_cost = get(costs, 'plant_cost_install') * (1000.0 * get(costs, 'plant_capacity'))  # $
+    PV_install_cost = get(costs, 'solar_cost_install') * (1000.0 * get(costs, 'solar_capacity'))  # $
+    batt_install_cost = get(costs, 'batt_cost_install') * (1000.0 * get(costs, 'batt_capacity'))  # $
+    batt_init_charge_cost = get(costs, 'batt_capacity') * get(costs, 'batt_initCharge') * get(costs,
+                                                                                            'grid_cost_OM_var')  # $
+    total_install_cost = plant_install_cost + PV_install_cost + batt_install_cost + batt_init_charge_cost  # $
+    I = -1.0 * np.pmt(get(costs, 'i'), get(costs, 'n'), total_install_cost)  # Apply financing
+
+    # M, annual maintenace costs
+    plant_var_OM = get(costs, 'plant_cost_OM_var') * LCOE_scale * powerOutput_MWh  # $
+    plant_OM_fix = get(costs, 'plant_cost_OM_fix') * (1000.0 * get(costs, 'plant_capacity'))  # $
+    OM_fix_PV = get(costs, 'solar_cost_OM_fix') * (1000.0 * get(costs, 'solar_capacity'))  # $
+    OM_fix_batt = get(costs, 'batt_cost_OM_fix') * (1000.0 * get(costs, 'batt_capacity'))  # $
+    grid_var_OM = get(costs, 'grid_cost_OM_var') * LCOE_scale * gridUsed_MWh  # $
+    M = plant_var_OM + plant_OM_fix + OM_fix_PV + OM_fix_batt + grid_var_OM
+
+    # F, annual fuel cost
+    F = LCOE_scale * fuelCost_dollars  # $
+
+    # E, annual electricity generation
+    E = LCOE_scale * demand_MWh * 1000.0  # kWH
+
+    num = I + M + F
+    denom = E
+
+    LCOE = num / denom
+
+    # ----
+    # Store results
+    # ----
+    results = {'demand_MWh': demand_MWh,  # MWh
+               'solar_MWh': solar_MWh,  # MWh
+               'powerOutput_MWh': powerOutput_MWh,  # MWh
+               'heatInput_MWh': heatInput_MWh,  # MWh
+               'solarUsed_MWh': solarUsed_MWh,  # MWh
+               'loadShed_MWh': loadShed_MWh,  # MWh
+               'gridUsed_MWh': gridUsed_MWh,  # MWh
+               'fuelCost_dollars': fuelCost_dollars,  # $
+               'LCOE': LCOE,  # $/kWH
+               'efficiency_pct': efficiency_pct,  # %
+               'emissions_tons': get(totals, 'emissions_tons'),  # tons
+               'deficit_max': get(totals, 'deficit_max'),  # MW
+               'deficit_min': get(totals, 'deficit_min'),  # MW
+               'deficit_pct_time': deficit_pct_time,  # %
+               'deficit_pct_energy': deficit_pct_energy,  # %
+               'solarCurtail_pct': solarCurtail_pct,  # %
+               'loadShed_pct_energy': loadShed_pct_energy,  # %
+               'loadShed_pct_time': loadShed_pct_time}  # %
+
+    # Time of day results
+    fuel_cost = get(costs, 'fuel_cost')
+    for emissions_hr, heatInput_hr, demand_hr, costs_hr in tod_names:
+        results[emissions_hr] = get(totals, emissions_hr)
+        results[costs_hr] = get(totals, heatInput_hr) * fuel_cost
+        results[demand_hr] = get(totals, demand_hr)
+
+    # Return a Series for a single case, otherwise a DataFrame with one row per case
+    if index is None:
+        return pd.Series([float(results[key]) for key in attributes_results], index=results_index)
+    else:
+        return pd.DataFrame(results, index=index, columns=attributes_results)
+
+
+# ========================================================================
+# Re-price energy totals with new cost and financing inputs (no simulation required)
+# costs is a complete set of costs (e.g. HRES.getCosts()), changes are given by overrides and/or keyword arguments
+# using the names in attributes_costs. Changes may be scalars or arrays/DataFrame columns (one entry per draw),
+# in which case one row of results is returned per draw
+# ========================================================================
+def reprice(totals, costs, overrides=None, **kwargs):
+    # Collect changes
+    changes = {}
+    index = None
+    if isinstance(overrides, pd.DataFrame):
+        index = overrides.index
+        changes.update({name: overrides[name].values for name in overrides.columns})
+    elif overrides is not None:
+        changes.update(dict(overrides))
+    changes.update(kwargs)
+
+    unknown = [name for name in changes if name not in attributes_costs]
+    if len(unknown) > 0:
+        raise ValueError("Unknown cost inputs: " + str(unknown))
+
+    # Apply changes
+    if isinstance(costs, pd.DataFrame):
+        costs = costs.copy()
+        for name, value in changes.items():
+            costs.loc[:, name] = value
+    else:
+        if isinstance(costs, pd.Series):
+            costs = costs.to_dict()
+        else:
+            costs = dict(costs)
+        costs.update(changes)
+        if any(np.ndim(value) > 0 for value in costs.values()):
+            costs = pd.DataFrame(costs, index=index, columns=attributes_costs)
+
+    return calcResults(totals, costs)
+
+
+# ========================================================================
+# Groupings of timesteps for totals by group, e.g. HRES(..., groupings=['month']).groupTotals['month']
+# 'hour' (hour of day) is always calculated and used for the time of day results
+# 'month', 'hourOfWeek' and 'season' require a DatetimeUTC column (local wall clock time is used)
+# ========================================================================
+attributes_groupings = ['hour', 'month', 'hourOfWeek', 'season']
+seasons = ['winter', 'spring', 'summer', 'fall']  # Dec-Feb, Mar-May, Jun-Aug, Sep-Nov
+
+# Totals calculated for each group
+attributes_group_totals = ['demand_MWh', 'solar_MWh', 'powerOutput_MWh', 'heatInput_MWh', 'solarUsed_MWh',
+                           'loadShed_MWh', 'deficit_MWh', 'gridUsed_MWh', 'emissions_tons', 't_total', 't_under',
+                           't_over']
+
+
+# ----------
+# Group of each timestep (integer labels) and the names of the groups, for each grouping
+# ----------
+def getGroupLabels(data, groupings):
+    for grouping in groupings:
+        if grouping not in attributes_groupings:
+            raise ValueError("Unknown grouping: " + str(grouping) + ", expected one of " + str(attributes_groupings))
+
+    hour = np.asarray(data.loc[:, 'hour']).astype(np.intp)
+    if any(grouping != 'hour' for grouping in groupings):
+        if 'DatetimeUTC' not in data.columns:
+            raise ValueError("Grouping by " + str(groupings) + " requires a DatetimeUTC column")
+        times = data.loc[:, 'DatetimeUTC']
+        if not pd.api.types.is_datetime64_any_dtype(times):
+            # Strings with UTC offsets, e.g. '2017-10-30 00:00:00-04:00', keep the local wall clock time
+            times = np.asarray(times, dtype='U19').astype('datetime64[s]')
+        elif 'utcOffset' in data.columns and getattr(times.dt, 'tz', None) is not None:
+            # UTC times and the offset of the local time (min), as loaded by blis.loadData
+            times = times.dt.tz_convert(None) + pd.to_timedelta(np.asarray(data.loc[:, 'utcOffset']), unit='min')
+        times = pd.DatetimeIndex(times)
+        month = np.asarray(times.month).astype(np.intp)
+        dayofweek = np.asarray(times.dayofweek).astype(np.intp)
+
+    labels = {}
+    for grouping in groupings:
+        if grouping == 'hour':
+            labels[grouping] = (hour, pd.Index(tod_hrs, name=grouping))
+        elif grouping == 'month':
+            labels[grouping] = (month - 1, pd.Index(range(1, 13), name=grouping))
+        elif grouping == 'hourOfWeek':
+            # Monday 00:00 is hour 0
+            labels[grouping] = (dayofweek * 24 + hour, pd.Index(range(7 * 24), name=grouping))
+        else:
+            labels[grouping] = ((month % 12) // 3, pd.Index(seasons, name=grouping))
+    return labels
+
+
+# ========================================================================
+# Accumulate energy totals block by block (consecutive timesteps), so that totals can be calculated while
+# simulating without storing the time series (HRES with storePerf=False). Totals summed in blocks may differ from
+# those of a stored time series (see reduceTotals) by rounding
+# Each block is reduced with a few array operations, totals by group use np.bincount
+# ========================================================================
+# Columns converted from power to energy: demand, solar and these time series
+energy_columns = [attributes_time_series.index(name) for name in
+                  ['PowerOutput', 'HeatInput', 'solarUsed', 'loadShed', 'deficit', 'gridUsed']]
+col_emissions = attributes_time_series.index('Emissions')
+col_deficit = attributes_time_series.index('deficit')
+col_loadShed = attributes_time_series.index('loadShed')
+
+
+class TotalsAccumulator:
+
+    # groupSizes - number of groups of each additional grouping, e.g. {'month': 12}
+    def __init__(self, steps, groupSizes=None):
+        # Check that enough data points exist for omitPeriod, if not use all data points
+        if steps > omitPeriod:
+            self.omit = omitPeriod
+        else:
+            self.omit = 0
+
+        self.energy = np.zeros(2 + len(energy_columns))  # (MWh) demand, solar, then energy_columns
+        self.emissions = 0.0  # (tons)
+        self.deficit_max = -np.inf  # (MW)
+        self.deficit_min = np.inf  # (MW)
+        self.t_total = 0.0  # (min)
+        self.t_under = 0.0  # (min)
+        self.t_over = 0.0  # (min)
+        self.count = 0
+
+        # Totals by group (ordered as attributes_group_totals), hour of day is always included
+        self.groupSizes = {'hour': len(tod_hrs)}
+        if groupSizes is not None:
+            self.groupSizes.update(groupSizes)
+        self.groups = {name: np.zeros((size, len(attributes_group_totals))) for name, size in
+                       self.groupSizes.items()}
+
+    # ----------
+    # Add a block of timesteps, starting with timestep first
+    # perf is an array with one row per timestep, ordered as attributes_time_series
+    # labels holds the group labels of each additional grouping for the same timesteps
+    # ----------
+    def add(self, first, dt, hour, demand, solar, perf, labels=None):
+        labels = dict(labels or {})
+        labels['hour'] = hour
+
+        # Ignore timesteps within omitPeriod
+        skip = self.omit - first
+        if skip > 0:
+            dt, demand, solar, perf = dt[skip:], demand[skip:], solar[skip:], perf[skip:]
+            labels = {name: label[skip:] for name, label in labels.items()}
+        if len(dt) == 0:
+            return
+
+        dt = np.asarray(dt, dtype=float)
+
+        # Calculate Energy Use from Power ( MW to MWh)
+        power = np.column_stack((demand, solar, perf[:, energy_columns]))
+        energy = power * dt[:, np.newaxis] / 60
+        self.energy += energy.sum(axis=0)
+
+        # Deficit
+        deficit = np.ascontiguousarray(perf[:, col_deficit])
+        self.deficit_max = max(self.deficit_max, deficit.max())
+        self.deficit_min = min(self.deficit_min, deficit.min())
+
+        # Time with a deficit and time with load shed
+        under = deficit < (-1.0 * threshold)
+        over = perf[:, col_loadShed] > threshold
+        self.t_total += dt.sum()
+        self.t_under += dt[under].sum()
+        self.t_over += dt[over].sum()
+
+        # Emissions
+        emissions = np.ascontiguousarray(perf[:, col_emissions])
+        self.emissions += emissions.sum()
+
+        # Totals by group
+        # (one np.bincount per grouping, the bins are the flattened group x attributes_group_totals array)
+        values = np.column_stack((energy, emissions, dt, np.where(under, dt, 0.0), np.where(over, dt, 0.0)))
+        columns = len(attributes_group_totals)
+        for name, size in self.groupSizes.items():
+            label = np.asarray(labels[name]).astype(np.intp)
+            bins = (np.minimum(label, size)[:, np.newaxis] * columns + np.arange(columns)).ravel()
+            self.groups[name] += np.bincount(bins, weights=values.ravel(), minlength=(size + 1) * columns)[
+                                 :size * columns].reshape(size, columns)
+
+        self.count += len(dt)
+
+    # ----------
+    # Energy totals
+    # ----------
+    def getTotals(self):
+        if self.count > 0:
+            deficit_max, deficit_min = self.deficit_max, self.deficit_min
+        else:
+            deficit_max, deficit_min = np.nan, np.nan
+
+        # Time of day totals (ordered as tod_totals)
+        hour = self.groups['hour']
+        tod = [hour[:, attributes_group_totals.index(name)] for name in
+               ['emissions_tons', 'heatInput_MWh', 'demand_MWh']]
+
+        totals = self.energy.tolist() + [self.emissions, deficit_max, deficit_min, self.t_total, self.t_under,
+                                         self.t_over] + np.concatenate(tod).tolist()
+        return pd.Series(totals, index=attributes_totals, dtype=float)
+
+    # ----------
+    # Totals of each group, index gives the names of the groups
+    # ----------
+    def getGroupTotals(self, name, index):
+        return pd.DataFrame(self.groups[name], index=index, columns=attributes_group_totals)
+
+
+# ========================================================================
+# Energy totals of a stored time series, summed column by column in the order of the original
+# HRES.analyzeResults (so results do not change by rounding), totals by group are not included
+# perf is an array with one row per timestep, ordered as attributes_time_series
+# ========================================================================
+def reduceTotals(dt, hour, demand, solar, perf):
+    # Check that enough data points exist for omitPeriod, if not use all data points
+    if len(dt) > omitPeriod:
+        dt, hour, demand, solar = dt[omitPeriod:], hour[omitPeriod:], demand[omitPeriod:], solar[omitPeriod:]
+        perf = perf[omitPeriod:]
+
+    def column(name):
+        return np.ascontiguousarray(perf[:, attributes_time_series.index(name)])
+
+    # Calculate Energy Use from Power ( MW to MWh)
+    energy = {'demand_MWh': demand * dt / 60,
+              'solar_MWh': solar * dt / 60}
+    for name in ['PowerOutput', 'HeatInput', 'solarUsed', 'loadShed', 'deficit', 'gridUsed']:
+        energy[name[0].lower() + name[1:] + '_MWh'] = column(name) * dt / 60
+    totals = {name: values.sum() for name, values in energy.items()}
+
+    # Deficit, time with a deficit and time with load shed (times are summed in order, as by the built-in sum)
+    deficit = column('deficit')
+    totals['deficit_max'] = deficit.max() if len(deficit) > 0 else np.nan
+    totals['deficit_min'] = deficit.min() if len(deficit) > 0 else np.nan
+    totals['t_total'] = sum(dt.tolist())
+    totals['t_under'] = sum(dt[deficit < (-1.0 * threshold)].tolist())
+    totals['t_over'] = sum(dt[column('loadShed') > threshold].tolist())
+
+    # Emissions
+    emissions = column('Emissions')
+    totals['emissions_tons'] = emissions.sum()
+
+    # Time of day totals, each hour's timesteps in order
+    order = np.argsort(hour, kind='stable')
+    bounds = np.searchsorted(hour[order], [tod_hrs[0]] + [hr + 1 for hr in tod_hrs])
+    for var, values in [('emissions', emissions), ('heatInput', energy['heatInput_MWh']),
+                        ('demand', energy['demand_MWh'])]:
+        values = values[order]
+        for hr, start, stop in zip(tod_hrs, bounds[:-1], bounds[1:]):
+            totals[todName(var, hr)] = values[start:stop].sum()
+    return totals
+
 
 # ========================================================================
 # Class to simulate and analyze Hybrid Renewable Energy System (HRES)
@@ -69,7 +470,18 @@ class HRES:
     # ========================================================================
     # Initialize HRES Simulation
     # ========================================================================
-    def __init__(self, data, plant, solar=Solar(), batt=Battery(), fuel=Fuel(), grid=Grid(), i=0.02, n=20):
+    def __init__(self, data, plant, solar=None, batt=None, fuel=None, grid=None, i=0.02, n=20,
+                 storePerf=True, groupings=()):
+        # Create default components (new instances, so that state is not shared between HRES)
+        if solar is None:
+            solar = Solar()
+        if batt is None:
+            batt = Battery()
+        if fuel is None:
+            fuel = Fuel()
+        if grid is None:
+            grid = Grid()
+
         # Store Inputs
         self.data = data
         self.solar = solar
@@ -84,18 +496,38 @@ class HRES:
         self.steps = len(data)
 
         # Create pandas dataframe to hold time series performance
-        rows = range(self.steps)
-        self.perf = pd.DataFrame(data=0.0, index=rows, columns=attributes_time_series)
+        # If storePerf is False, only energy totals are accumulated while simulating and perf remains None
+        self.storePerf = storePerf
+        self.buffer = None  # Block of performance reused by every run if only totals are kept (see getBuffer)
+        if storePerf:
+            self.perf = self.wrapPerf(self.getBuffer())
+        else:
+            self.perf = None
+
+        # Additional groupings of energy totals (see attributes_groupings), labels are found once
+        self.groupings = list(groupings)
+        self.groupLabels = getGroupLabels(data, self.groupings)
 
         # ----
-        # Create pandas series to store results
+        # Create pandas series to store energy totals and results
         # ----
-        self.results = pd.Series(index=attributes_results)
+        self.totals = pd.Series(index=attributes_totals, dtype=float)
+        self.results = pd.Series(index=attributes_results, dtype=float)
+        self.groupTotals = {}  # DataFrame of totals by group for each grouping, including 'hour'
 
     # ========================================================================
     # Update - empty control, needs to be updated by all children of HRES
     # ========================================================================
     def update(self, dt, hour, demand, solar):
+        # Store performance of current timestep in a pandas series
+        perf = pd.Series(self.dispatch(dt, hour, demand, solar), index=attributes_time_series)
+        return perf
+
+    # ========================================================================
+    # Dispatch - built-in control for a single timestep
+    # Returns a tuple ordered as attributes_time_series, used by update() and the array engine
+    # ========================================================================
+    def dispatch(self, dt, hour, demand, solar):
 
         # ----------
         # Calculate Battery Dis/charge Rate Available
@@ -107,6 +539,10 @@ class HRES:
             # ----------
             # Power Plant Control 
             # ----------
+            # Start and stop the units of a fleet for the power that would be requested, with the demand as reserve
+            if isinstance(self.plant, Fleet):
+                self.plant.commit(demand - solar - batt_d_rate, demand)
+
             # Get Minimum Power Plant Request and 
             #     minimum generation possible for current timestep
             minPowerRequest = self.plant.minPowerRequest
@@ -234,238 +670,449 @@ class HRES:
             print("#-----------#")
 
         # =======
-        # Store performance of current timestep in a pandas series
+        # Return performance of current timestep (ordered as attributes_time_series)
         # =======
-        perf = pd.Series(index=attributes_time_series)
-
-        # Power plant
-        perf.PowerRequest = self.plant.powerRequest
-        perf.PowerOutput = self.plant.powerOutput
-        perf.PowerRamp = self.plant.powerRamp
-        perf.HeatInput = self.plant.heatInput
-        perf.Efficiency = self.plant.efficiency
-        # Battery
-        perf.battCharge = self.batt.charge
-        perf.battIncrease = self.batt.increase
-        perf.battDecrease = self.batt.decrease
-        perf.battDischargeRate = self.batt.dischargeRate
-        perf.battChargeRate = self.batt.chargeRate
-        perf.battRamp = self.batt.ramp
-        # Other
-        perf.solarUsed = solarUsed
-        perf.loadShed = loadShed
-        perf.deficit = deficit
-        perf.gridUsed = gridUsed
-        perf.CO2_produced = CO2_produced
-        perf.CO2_captured = CO2_captured
-        perf.Emissions = Emissions
+        perf = (
+            # Power plant
+            self.plant.powerRequest, self.plant.powerOutput, self.plant.powerRamp, self.plant.heatInput,
+            self.plant.efficiency,
+            # Battery
+            self.batt.charge, self.batt.increase, self.batt.decrease, self.batt.dischargeRate, self.batt.chargeRate,
+            self.batt.ramp,
+            # Other
+            solarUsed, loadShed, deficit, gridUsed, CO2_produced, CO2_captured, Emissions)
 
         return perf
 
     # ========================================================================
     # Run Simulation
+    # engine='array' - inputs are read from NumPy arrays and performance is stored in a preallocated array
+    # engine='jit' - compiled dispatch kernel (requires numba, releases the GIL), otherwise uses engine='array'
+    # engine='pandas' - original implementation, inputs and performance are accessed through pandas each step
+    # All engines give identical perf and results
+    # checkpoint (a blis.Checkpoint) periodically saves the state while simulating, an interrupted run resumes from it
+    # cache (a blis.ResultsCache) looks up the results of an identical physical configuration, re-priced with the
+    # current costs. A hit is not simulated: perf is set to None (the time series is not cached) and the plant and
+    # battery are left in their state before the run, not their state at the end. Totals by group are not cached,
+    # so the cache is not used with groupings
     # ========================================================================
-    def run(self):
+    def run(self, engine='array', cache=None, checkpoint=None):
+
+        # Look up cached results
+        if len(self.groupings) > 0:
+            cache = None
+        if cache is not None:
+            key = cache.getKey(self)
+            entry = cache.get(key)
+            if entry is not None:
+                self.perf = None
+                self.totals = entry[0]
+                self.results = calcResults(self.totals, self.getCosts())
+                return self.results
 
         # Simulate operation
-        for step in range(self.steps):
+        if engine == 'array':
+            self.runArray(checkpoint)
+        elif engine == 'jit':
+            self.runJit(checkpoint)
+        elif engine == 'pandas':
+            self.runPandas(checkpoint)
+        else:
+            raise ValueError("Unknown engine: " + str(engine) + ", expected 'array', 'jit' or 'pandas'")
 
-            # Access current demand and time step
+        # Analyze Results
+        results = self.analyzeResults()
 
-            dt = self.data.loc[step, 'dt']
-            hour = self.data.loc[step, 'hour']
-            demand = self.data.loc[step, 'demand']
-            solar = self.data.loc[step, 'solar']
+        if checkpoint is not None:
+            checkpoint.remove()
 
-            # Print Status (if debugging)
-            if debug:
-                print("\n\nStep: " + str(step))
-                print("dt    (min) : " + str(dt))
-                print("hour : " + str(hour))
-                print("Demand (MW) : " + str(demand))
-                print("Solar  (MW) : " + str(solar))
+        if cache is not None:
+            cache.put(key, self.totals, results)
 
-                # Update System Operation
-            self.perf.loc[step, :] = self.update(dt, hour, demand, solar)
+        return results
 
-            # Store Current Performance
+    # ========================================================================
+    # Get input time series as arrays, optionally for timesteps start to stop
+    # ========================================================================
+    def getInputArrays(self, start=0, stop=None):
+        dt = np.ascontiguousarray(self.data.loc[:, 'dt'].values[start:stop], dtype=float)
+        hour = np.ascontiguousarray(self.data.loc[:, 'hour'].values[start:stop], dtype=np.int64)
+        demand = np.ascontiguousarray(self.data.loc[:, 'demand'].values[start:stop], dtype=float)
+        solar = np.ascontiguousarray(self.data.loc[:, 'solar'].values[start:stop], dtype=float)
+        return dt, hour, demand, solar
 
-        # Analyze Results
-        results = self.analyzeResults()
+    # ========================================================================
+    # Get input time series as lists of python scalars (fast to iterate), optionally for timesteps start to stop
+    # ========================================================================
+    def getInputs(self, start=0, stop=None):
+        dt = self.data.loc[:, 'dt'].values[start:stop].tolist()
+        hour = self.data.loc[:, 'hour'].values[start:stop].tolist()
+        demand = self.data.loc[:, 'demand'].values[start:stop].tolist()
+        solar = self.data.loc[:, 'solar'].values[start:stop].tolist()
+        return dt, hour, demand, solar
 
-        return results
+    # ========================================================================
+    # Simulate operation - array engine
+    # ========================================================================
+    def runArray(self, checkpoint=None):
+
+        # Use built-in dispatch, unless a child of HRES provides its own update()
+        if type(self).update is HRES.update:
+            step_fn = self.dispatch
+        else:
+            def step_fn(dt, hour, demand, solar):
+                return self.update(dt, hour, demand, solar).values
+
+        # Preallocate time series performance, or a single block if only totals are accumulated
+        if self.storePerf:
+            perf = self.getBuffer()
+            totals = None
+        else:
+            perf = self.getBuffer()
+            totals = self.initTotals()
+
+        # Resume an interrupted run
+        first, totals = self.resume(checkpoint, perf, totals)
+
+        # Fast-forward through steady state (see kernels.simulate), requires the built-in dispatch
+        skipSteady = fastForward and not debug and self.usesBuiltinDispatch()
+        previous = None  # Inputs, performance and plant status of the previous timestep
+
+        # Simulate block by block, inputs are accessed once per block
+        for start in range(first, self.steps, blockSize):
+            stop = min(start + blockSize, self.steps)
+            dt, hour, demand, solar = self.getInputs(start, stop)
+            inputs = list(zip(dt, hour, demand, solar))
+            if self.storePerf:
+                rows = perf[start:stop]
+            else:
+                rows = perf[:stop - start]
+
+            i = 0
+            while i < stop - start:
+
+                # Print Status (if debugging)
+                if debug:
+                    print("\n\nStep: " + str(start + i))
+                    print("dt    (min) : " + str(dt[i]))
+                    print("hour : " + str(hour[i]))
+                    print("Demand (MW) : " + str(demand[i]))
+                    print("Solar  (MW) : " + str(solar[i]))
+
+                # Update System Operation and Store Current Performance
+                row = step_fn(*inputs[i])
+                rows[i] = row
+                i = i + 1
+
+                if skipSteady:
+                    # Same inputs as the previous timestep and the state was left unchanged (the plant and battery
+                    # state is part of the performance), so the rest of the run of same inputs repeats this timestep
+                    current = (inputs[i - 1], row, self.plant.statusNum)
+                    if current == previous and self.plant.statusNum != STARTING:
+                        run = i
+                        while run < stop - start and inputs[run] == inputs[i - 1]:
+                            run = run + 1
+                        rows[i:run] = row
+                        if self.plant.capacity > 0.0:
+                            self.plant.advanceSteady(dt[i - 1], run - i)
+                        i = run
+                    previous = current
+
+            if not self.storePerf:
+                self.addTotals(totals, start, stop, rows)
+
+            if checkpoint is not None and checkpoint.due():
+                self.saveCheckpoint(checkpoint, stop, perf, totals)
+
+        if self.storePerf:
+            # Wrap performance in a dataframe
+            self.perf = self.wrapPerf(perf)
+        else:
+            self.storeTotals(totals)
 
     # ========================================================================
-    # Analyze Results
+    # Buffer for time series performance
+    # Every timestep, allocated for each run so that perf of an earlier run is not overwritten by the next run,
+    # or a single block if only totals are accumulated, allocated once and reused
     # ========================================================================
-    def analyzeResults(self):
-        data = self.data
-        perf = self.perf
+    def getBuffer(self):
+        if self.storePerf:
+            return np.zeros((self.steps, len(attributes_time_series)))
+        rows = min(blockSize, self.steps)
+        if self.buffer is None or self.buffer.shape[0] != rows:
+            self.buffer = np.zeros((rows, len(attributes_time_series)))
+        return self.buffer
 
-        # Check that enough data points exist for omitPeriod, if not use all data points
-        if len(data) > omitPeriod:
-            data = data.loc[omitPeriod:]
-            perf = perf.loc[omitPeriod:]
+    def wrapPerf(self, perf):
+        return pd.DataFrame(data=perf, index=range(self.steps), columns=attributes_time_series, copy=False)
 
-        # Calculate Energy Use from Power ( MW to MWh)
-        # Inputs
-        df_demand = data.loc[:]["demand"] * data[:]["dt"] / 60
-        df_solar = data.loc[:]["solar"] * data[:]["dt"] / 60
-        df_powerOutput = perf.loc[:]["PowerOutput"] * data[:]["dt"] / 60
-        df_heatInput = perf.loc[:]["HeatInput"] * data[:]["dt"] / 60
-        df_solarUsed = perf.loc[:]["solarUsed"] * data[:]["dt"] / 60
-        df_loadShed = perf.loc[:]["loadShed"] * data[:]["dt"] / 60
-        df_deficit = perf.loc[:]["deficit"] * data[:]["dt"] / 60
-        df_gridUsed = perf.loc[:]["gridUsed"] * data[:]["dt"] / 60
-
-        # Sum for the year
-        demand_MWh = df_demand.sum()
-        solar_MWh = df_solar.sum()
-        powerOutput_MWh = df_powerOutput.sum()
-        heatInput_MWh = df_heatInput.sum()
-        solarUsed_MWh = df_solarUsed.sum()
-        loadShed_MWh = df_loadShed.sum()
-        deficit_MWh = df_deficit.sum()
-        gridUsed_MWh = df_gridUsed.sum()
+    # ========================================================================
+    # Reset to the initial operating state, so the same HRES (and its buffers) can be used for another case
+    # ========================================================================
+    def reset(self):
+        self.plant.reset()
+        self.batt.reset()
+        self.totals = pd.Series(index=attributes_totals, dtype=float)
+        self.results = pd.Series(index=attributes_results, dtype=float)
+        self.groupTotals = {}
 
-        # Fuel Cost
-        fuelCost_dollars = heatInput_MWh * self.fuel.cost  # $
+    # ========================================================================
+    # Update inputs in place and reset, e.g. reconfigure(plant_capacity=60.0, batt_rateMax=10.0, i=0.05)
+    # Names are as in blis.batch.attributes_batch: the component (plant, solar, batt, fuel or grid), an underscore
+    # and the attribute, or i and n
+    # ========================================================================
+    def reconfigure(self, **params):
+        components = {'plant': self.plant, 'solar': self.solar, 'batt': self.batt, 'fuel': self.fuel,
+                      'grid': self.grid}
+        updates = {name: {} for name in components}
+        for name, value in params.items():
+            component, _, attribute = name.partition('_')
+            if name in ['i', 'n']:
+                setattr(self, name, value)
+            elif component in components and attribute != '':
+                updates[component][attribute] = value
+            else:
+                raise ValueError("Unknown HRES parameter: " + name)
 
-        # Effective Efficiency
-        if heatInput_MWh > 0.0:
-            efficiency_pct = powerOutput_MWh / heatInput_MWh * 100.0  # %
-        else:
-            efficiency_pct = 0.0
+        # Plant and storage update derived characteristics, other components only hold inputs
+        self.plant.reconfigure(**updates['plant'])
+        self.batt.reconfigure(**updates['batt'])
+        for component in ['solar', 'fuel', 'grid']:
+            for attribute, value in updates[component].items():
+                if not hasattr(components[component], attribute):
+                    raise ValueError("Unknown HRES parameter: " + component + '_' + attribute)
+                setattr(components[component], attribute, value)
 
-        # Deficit
-        deficit_max = perf.deficit.max()
-        deficit_min = perf.deficit.min()
+        self.reset()
 
-        # Pct of the time with a deficit
-        threshold = 0.001  # 1 kW (effectively roudning error)
-        ind_under = perf.deficit < (-1.0 * threshold)
-        t_total = sum(data[:]["dt"])
-        t_under = sum(data[ind_under]["dt"])
-        if t_under > 0:
-            deficit_pct_time = float(t_under) / float(t_total) * 100.0
-            deficit_pct_energy = -1.0 * float(deficit_MWh) / float(demand_MWh) * 100.0
-        else:
-            deficit_pct_time = 0.0
-            deficit_pct_energy = 0.0
+    # ========================================================================
+    # Check if the built-in dispatch is used with standard components
+    # ========================================================================
+    def usesBuiltinDispatch(self):
+        return type(self).update is HRES.update and type(self).dispatch is HRES.dispatch and \
+               isinstance(self.plant, PowerPlant) and isinstance(self.batt, Storage)
 
-        # Solar Curtailment
-        if solar_MWh > 0.0:
-            solarCurtail_pct = 100.0 - float(solarUsed_MWh) / float(solar_MWh) * 100.0
-        else:
-            solarCurtail_pct = 0.0
+    # ========================================================================
+    # Check if the compiled kernels can simulate this HRES (built-in dispatch and the Eff_A/Eff_B/Eff_C curve)
+    # ========================================================================
+    def usesKernels(self):
+        return self.usesBuiltinDispatch() and self.plant.effTable is None
 
-        # Load Shed Pct - energy
-        if powerOutput_MWh > 0.0:
-            loadShed_pct_energy = float(loadShed_MWh) / float(powerOutput_MWh) * 100.0
+    # ========================================================================
+    # Simulate operation - compiled kernel engine
+    # ========================================================================
+    def runJit(self, checkpoint=None):
+
+        # Fall back to the array engine if numba is not installed, when debugging, for custom control or for an
+        # efficiency lookup table
+        if not kernels.jit_available or debug or not self.usesKernels():
+            self.runArray(checkpoint)
+            return
+
+        # Access inputs once as contiguous arrays
+        dt, hour, demand, solar = self.getInputArrays()
+
+        # Preallocate time series performance, or a single block if only totals are accumulated
+        if self.storePerf:
+            perf = self.getBuffer()
+            totals = None
         else:
-            loadShed_pct_energy = 0.0
+            perf = self.getBuffer()
+            totals = self.initTotals()
+
+        # Resume an interrupted run
+        first, totals = self.resume(checkpoint, perf, totals)
+
+        # Simulate operation block by block, state is advanced in place and then copied back to the plant and battery
+        params = kernels.packParams(self.plant, self.batt, self.fuel, self.grid)
+        gridEmissions = kernels.packGridEmissions(self.grid)
+        state = kernels.packState(self.plant, self.batt)
+        for start in range(first, self.steps, blockSize):
+            stop = min(start + blockSize, self.steps)
+            if self.storePerf:
+                rows = perf[start:stop]
+            else:
+                rows = perf[:stop - start]
+            kernels.simulate(dt[start:stop], hour[start:stop], demand[start:stop], solar[start:stop], params,
+                             gridEmissions, state, rows, fastForward)
+            if not self.storePerf:
+                self.addTotals(totals, start, stop, rows)
+
+            if checkpoint is not None and checkpoint.due():
+                kernels.unpackState(state, self.plant, self.batt)
+                self.saveCheckpoint(checkpoint, stop, perf, totals)
+        kernels.unpackState(state, self.plant, self.batt)
+
+        if self.storePerf:
+            # Wrap performance in a dataframe
+            self.perf = self.wrapPerf(perf)
+        else:
+            self.storeTotals(totals)
 
-        # Load Shed Pct - time
-        threshold = 0.001  # 1 kW (effectively roudning error)
-        ind_over = perf.loc[:]["loadShed"] > threshold
-        t_over = sum(data[ind_over]["dt"])
-        if t_over > 0.0:
-            loadShed_pct_time = float(t_over) / float(t_total) * 100.0
+    # ========================================================================
+    # Simulate operation - pandas engine
+    # ========================================================================
+    def runPandas(self, checkpoint=None):
+
+        # The pandas engine always uses a table, only totals are kept if storePerf is False
+        if not self.storePerf:
+            self.perf = pd.DataFrame(data=0.0, index=range(self.steps), columns=attributes_time_series)
         else:
-            loadShed_pct_time = 0.0
+            self.perf = self.wrapPerf(self.getBuffer())
 
-        # ----
-        # Emissions
-        # ----
-        emissions = perf.loc[:]["Emissions"].sum()
+        # Resume an interrupted run
+        first, totals = self.resume(checkpoint, self.perf, None)
 
-        # ----
-        # LCOE
-        # ----
-        # Calculate multiplier required to scale simulated time series to one year of data
-        LCOE_scale = 365.25 * 24 * 60 / t_total
+        # Simulate operation
+        for step in range(first, self.steps):
 
-        # I, Install Costs (with financing)
-        plant_install_cost = self.plant.cost_install * (1000.0 * self.plant.capacity)  # $
-        PV_install_cost = self.solar.cost_install * (1000.0 * self.solar.capacity)  # $
-        batt_install_cost = self.batt.cost_install * (1000.0 * self.batt.capacity)  # $
-        batt_init_charge_cost = self.batt.capacity * self.batt.initCharge * self.grid.cost_OM_var  # $
-        total_install_cost = plant_install_cost + PV_install_cost + batt_install_cost + batt_init_charge_cost  # $
-        I = -1.0 * np.pmt(self.i, self.n, total_install_cost)  # Apply financing
+            # Access current demand and time step
 
-        # M, annual maintenace costs
-        plant_var_OM = self.plant.cost_OM_var * LCOE_scale * powerOutput_MWh  # $
-        plant_OM_fix = self.plant.cost_OM_fix * (1000.0 * self.plant.capacity)  # $
-        OM_fix_PV = self.solar.cost_OM_fix * (1000.0 * self.solar.capacity)  # $
-        OM_fix_batt = self.batt.cost_OM_fix * (1000.0 * self.batt.capacity)  # $
-        grid_var_OM = self.grid.cost_OM_var * LCOE_scale * gridUsed_MWh  # $
-        M = plant_var_OM + plant_OM_fix + OM_fix_PV + OM_fix_batt + grid_var_OM
+            dt = self.data.loc[step, 'dt']
+            hour = self.data.loc[step, 'hour']
+            demand = self.data.loc[step, 'demand']
+            solar = self.data.loc[step, 'solar']
 
-        # F, annual fuel cost
-        F = LCOE_scale * fuelCost_dollars  # $
+            # Print Status (if debugging)
+            if debug:
+                print("\n\nStep: " + str(step))
+                print("dt    (min) : " + str(dt))
+                print("hour : " + str(hour))
+                print("Demand (MW) : " + str(demand))
+                print("Solar  (MW) : " + str(solar))
 
-        # E, annual electricity generation
-        E = LCOE_scale * demand_MWh * 1000.0  # kWH
+                # Update System Operation
+            self.perf.loc[step, :] = self.update(dt, hour, demand, solar)
 
-        num = I + M + F
-        denom = E
+            # Store Current Performance
 
-        LCOE = num / denom
+            if checkpoint is not None and (step + 1) % blockSize == 0 and checkpoint.due():
+                self.saveCheckpoint(checkpoint, step + 1, self.perf.values, None)
 
-        # ----
-        # Time of Day Analysis
-        # ----
-        # Change index to datetime
-        # data.index = pd.to_datetime(data.loc[:, 'DatetimeUTC'])
+        if not self.storePerf:
+            self.totals = self.getTotals()
+            self.perf = None
 
-        # Perform Analysis (references global variables defined before HRES definition)
-        tod_analysis = pd.DataFrame(index=tod_hrs, columns=tod_vars)
-        for hour in tod_analysis.index:
-            ind = data.hour == hour
-            tod_analysis.loc[hour, 'emissions'] = perf.loc[ind, 'Emissions'].sum()
-            tod_analysis.loc[hour, 'costs'] = df_heatInput.loc[ind].sum() * self.fuel.cost
-            tod_analysis.loc[hour, 'demand'] = df_demand.loc[ind].sum()
+    # ========================================================================
+    # Checkpoints (see blis.Checkpoint)
+    # perf is the time series and totals is the TotalsAccumulator, None if the engine does not use it
+    # ========================================================================
+    def resume(self, checkpoint, perf, totals):
+        # Returns the first timestep to simulate and the accumulated totals
+        if checkpoint is None:
+            return 0, totals
+        entry = checkpoint.start(self)
+        if entry is None:
+            return 0, totals
+
+        # The checkpoint must hold what this engine accumulates (the pandas engine always saves the time series)
+        if (totals is None and entry['perf'] is None) or (totals is not None and entry['totals'] is None):
+            return 0, totals
+
+        step = entry['step']
+        self.plant.setState(entry['plant'])
+        self.batt.setState(entry['batt'])
+        if totals is None:
+            if isinstance(perf, pd.DataFrame):
+                perf.iloc[:step] = entry['perf']
+            else:
+                perf[:step] = entry['perf']
+        else:
+            totals = entry['totals']
+        print("Resuming from checkpoint at timestep " + str(step) + " of " + str(self.steps))
+        return step, totals
 
-        # ----
-        # Store results
-        # ----
-        self.results.demand_MWh = demand_MWh  # MWh
-        self.results.solar_MWh = solar_MWh  # MWh
-        self.results.powerOutput_MWh = powerOutput_MWh  # MWh
-        self.results.heatInput_MWh = heatInput_MWh  # MWh
-        self.results.solarUsed_MWh = solarUsed_MWh  # MWh
-        self.results.loadShed_MWh = loadShed_MWh  # MWh
-        self.results.gridUsed_MWh = gridUsed_MWh  # MWh
-
-        self.results.emissions_tons = emissions  # tons
-
-        self.results.fuelCost_dollars = fuelCost_dollars  # $
-        self.results.LCOE = LCOE  # $/kWH
-
-        self.results.efficiency_pct = efficiency_pct  # %
-        self.results.deficit_max = deficit_max  # MW
-        self.results.deficit_min = deficit_min  # MW
-        self.results.deficit_pct_time = deficit_pct_time  # %
-        self.results.deficit_pct_energy = deficit_pct_energy  # %
-        self.results.solarCurtail_pct = solarCurtail_pct  # %
-        self.results.loadShed_pct_energy = loadShed_pct_energy  # %
-        self.results.loadShed_pct_time = loadShed_pct_time  # %
-
-        # Time of day results
-        for var in tod_vars:
-            for hr in tod_hrs:
-                if hr < 10:
-                    entry = var + '_hr0' + str(hr)
-                else:
-                    entry = var + '_hr' + str(hr)
-                self.results[entry] = tod_analysis.loc[hr, var]
+    def saveCheckpoint(self, checkpoint, step, perf, totals):
+        if totals is None:
+            checkpoint.save(self, step, perf=perf)
+        else:
+            checkpoint.save(self, step, totals=totals)
+
+    # ========================================================================
+    # Analyze Results
+    # ========================================================================
+    def analyzeResults(self):
+        # Energy totals depend on the simulation, results additionally depend on costs and financing
+        # (without a stored time series, totals were already accumulated while simulating)
+        if self.perf is not None:
+            self.totals = self.getTotals()
+        self.results = calcResults(self.totals, self.getCosts())
         # Return results
         return self.results
 
+    # ========================================================================
+    # Calculate energy totals from time series performance
+    # Also stores totals by group (groupTotals)
+    # ========================================================================
+    def getTotals(self):
+        # Totals by group are accumulated in blocks as while simulating with storePerf=False, the totals are
+        # reduced from the whole time series
+        totals = self.initTotals()
+        perf = self.perf.values
+        for start in range(0, self.steps, blockSize):
+            stop = min(start + blockSize, self.steps)
+            self.addTotals(totals, start, stop, perf[start:stop])
+        self.storeTotals(totals)
+        for name, value in reduceTotals(*self.getInputArrays(), perf).items():
+            self.totals[name] = value
+        return self.totals
+
+    # ========================================================================
+    # Accumulation of energy totals (see TotalsAccumulator)
+    # ========================================================================
+    def initTotals(self):
+        # Group labels of groupings added after initialization
+        missing = [grouping for grouping in self.groupings if grouping not in self.groupLabels]
+        self.groupLabels.update(getGroupLabels(self.data, missing))
+        groupSizes = {grouping: len(self.groupLabels[grouping][1]) for grouping in self.groupings}
+        return TotalsAccumulator(self.steps, groupSizes)
+
+    def addTotals(self, totals, start, stop, perf):
+        labels = {grouping: self.groupLabels[grouping][0][start:stop] for grouping in self.groupings}
+        totals.add(start, *self.getInputArrays(start, stop), perf, labels)
+
+    def storeTotals(self, totals):
+        self.totals = totals.getTotals()
+        self.groupTotals = {'hour': totals.getGroupTotals('hour', pd.Index(tod_hrs, name='hour'))}
+        for grouping in self.groupings:
+            self.groupTotals[grouping] = totals.getGroupTotals(grouping, self.groupLabels[grouping][1])
+
+    # ========================================================================
+    # Collect cost and financing inputs of each component
+    # ========================================================================
+    def getCosts(self):
+        costs = [self.plant.capacity,  # MW
+                 self.plant.cost_install,  # ($/kW)
+                 self.plant.cost_OM_fix,  # ($/kW/year)
+                 self.plant.cost_OM_var,  # ($/MWh)
+                 self.solar.capacity,  # MW
+                 self.solar.cost_install,  # ($/kW)
+                 self.solar.cost_OM_fix,  # ($/kW/year)
+                 self.batt.capacity,  # MWh
+                 self.batt.initCharge,  # (fraction)
+                 self.batt.cost_install,  # ($/kW)
+                 self.batt.cost_OM_fix,  # ($/kW/year)
+                 self.fuel.cost,  # ($/MWh thermal)
+                 self.grid.cost_OM_var,  # ($/MWh)
+                 self.i,  # (fraction) Interest rate
+                 self.n]  # (years) System lifetime
+        return pd.Series(costs, index=attributes_costs, dtype=float)
+
+    # ========================================================================
+    # Re-price results with new cost and financing inputs, without re-simulating (see reprice)
+    # e.g. hres.reprice(fuel_cost=15.0) or hres.reprice(fuel_cost=np.random.normal(10.58, 1.0, 1000))
+    # ========================================================================
+    def reprice(self, overrides=None, **kwargs):
+        if np.isnan(self.totals.values).all():
+            raise ValueError("Energy totals are not available, run() the simulation first")
+        return reprice(self.totals, self.getCosts(), overrides, **kwargs)
+
     # ========================================================================
     # Save Time Series Data
     # ========================================================================
     def save(self, casename='Results'):
+        if self.perf is None:
+            raise ValueError("No time series performance to save (storePerf is False or results were cached)")
         combine = pd.concat([self.data, self.perf], axis=1)
         combine.to_csv(casename + ".csv")
 
@@ -613,12 +1260,25 @@ class HRES:
         return plotName
 
 
+# ========================================================================
+# Run several HRES in threads of the current process
+# With engine='jit' the kernel releases the GIL, so the simulations run in parallel
+# ========================================================================
+def runThreaded(systems, threads=None, engine='jit'):
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda hres: hres.run(engine=engine), systems))
+    return results
+
+
 # ========================================================================
 # Solar Battery Grid System (SBGS), child of HRES
 # ========================================================================
 class SBGS(HRES):
 
-    def __init__(self, data, solar=Solar(), batt=Battery(), grid=Grid(capacity=1000.), i=0.02, n=20):
+    def __init__(self, data, solar=None, batt=None, grid=None, i=0.02, n=20, storePerf=True, groupings=()):
+        if grid is None:
+            grid = Grid(capacity=1000.)
+
         # Create PowerPlant with 0.0 MW Capacity
         plant_inputs = defaultInputs(plantType='CCGT')
         plant_inputs.capacity = 0.0  # (MW)
@@ -629,4 +1289,5 @@ class SBGS(HRES):
         fuel = Fuel()
 
         # All other inputs are passed on to HRES function
-        HRES.__init__(self, data, plant=plant, solar=solar, batt=batt, fuel=fuel, grid=grid, i=0.02, n=20)
+        HRES.__init__(self, data, plant=plant, solar=solar, batt=batt, fuel=fuel, grid=grid, i=0.02, n=20,
+                      storePerf=storePerf, groupings=groupings)
@@ -0,0 +1,442 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Hardcoded Inputs:
+debug = False  # If True, additional information is presented to the console
+threshold = 0.001  # threshold for rounding (MW), same as hres
+
+# General Imports:
+import numpy as np
+
+# BLIS Imports:
+from blis.power_plant import OFF, STARTING, ON
+from blis.storage import exactDischargeRate as exactDischargeRate_py
+
+# Optional Imports:
+# The dispatch kernel is compiled with numba if it is installed, otherwise it runs as pure python
+try:
+    from numba import njit
+
+    jit_available = True
+except ImportError:
+    jit_available = False
+
+
+    def njit(*args, **kwargs):
+        # Used as @njit(...), return the function unchanged
+        def decorator(func):
+            return func
+
+        return decorator
+
+# ========================================================================
+# Layout of the parameter and state arrays used by the kernel
+# ========================================================================
+# Parameters - PowerPlant
+CAPACITY = 0
+MAX_EFFICIENCY = 1
+RAMP_RATE = 2
+START_TIME = 3
+EFF_A = 4
+EFF_B = 5
+EFF_C = 6
+CO2_CAPTURE_EFF = 7
+MIN_POWER_REQUEST = 8
+PART_LOAD_MIN = 9
+PART_LOAD_MAX = 10
+# Parameters - Storage
+CHARGE_MIN = 11
+CHARGE_MAX = 12
+CHARGE_RATE_MAX = 13
+DISCHARGE_RATE_MAX = 14
+ROUND_TRIP_EFF = 15
+TAU = 16
+# Parameters - Fuel and Grid
+FUEL_EMISSIONS = 17
+GRID_CAPACITY = 18
+# Exponent of the efficiency curve (2.0), read at runtime so that the compiled power uses pow() like python,
+# a constant exponent is compiled to x*x which can differ from python in the last bit
+EFF_EXPONENT = 19
+# Storage integration (see Storage), 0.0 for 'explicit', 1.0 for 'exact'
+INTEGRATION = 20
+N_PARAMS = 21
+
+# State - PowerPlant (status uses the codes of PowerPlant.getStatusNum)
+STATUS = 0
+RANGE = 1
+EFFICIENCY = 2
+POWER_REQUEST = 3
+POWER_OUTPUT = 4
+POWER_RAMP = 5
+HEAT_INPUT = 6
+TIME_SINCE_START = 7
+TIME_SINCE_STOP = 8
+# State - Storage
+CHARGE = 9
+BATT_RAMP = 10
+DISCHARGE_RATE = 11
+CHARGE_RATE = 12
+INCREASE = 13
+DECREASE = 14
+N_STATE = 15
+
+
+# ========================================================================
+# Convert components to and from kernel arrays
+# ========================================================================
+def packParams(plant, batt, fuel, grid):
+    params = np.zeros(N_PARAMS)
+    params[CAPACITY] = plant.capacity
+    params[MAX_EFFICIENCY] = plant.maxEfficiency
+    params[RAMP_RATE] = plant.rampRate
+    params[START_TIME] = plant.startTime
+    params[EFF_A] = plant.Eff_A
+    params[EFF_B] = plant.Eff_B
+    params[EFF_C] = plant.Eff_C
+    params[CO2_CAPTURE_EFF] = plant.co2CaptureEff
+    params[MIN_POWER_REQUEST] = plant.minPowerRequest
+    params[PART_LOAD_MIN] = plant.partLoadRange[0]
+    params[PART_LOAD_MAX] = plant.partLoadRange[1]
+    params[CHARGE_MIN] = batt.chargeMin
+    params[CHARGE_MAX] = batt.chargeMax
+    params[CHARGE_RATE_MAX] = batt.chargeRateMax
+    params[DISCHARGE_RATE_MAX] = batt.dischargeRateMax
+    params[ROUND_TRIP_EFF] = batt.roundTripEff
+    params[TAU] = batt.tau
+    params[FUEL_EMISSIONS] = fuel.emissions
+    params[GRID_CAPACITY] = grid.capacity
+    params[EFF_EXPONENT] = 2.0
+    if batt.integration == 'exact':
+        params[INTEGRATION] = 1.0
+    return params
+
+
+def packGridEmissions(grid):
+    # Emission factor for each hour of the day
+    return np.array([grid.getEmissions(hr) for hr in range(24)], dtype=float)
+
+
+def packState(plant, batt):
+    state = np.zeros(N_STATE)
+    state[STATUS] = plant.getStatusNum()
+    state[RANGE] = plant.range
+    state[EFFICIENCY] = plant.efficiency
+    state[POWER_REQUEST] = plant.powerRequest
+    state[POWER_OUTPUT] = plant.powerOutput
+    state[POWER_RAMP] = plant.powerRamp
+    state[HEAT_INPUT] = plant.heatInput
+    state[TIME_SINCE_START] = plant.timeSinceStart
+    state[TIME_SINCE_STOP] = plant.timeSinceStop
+    state[CHARGE] = batt.charge
+    state[BATT_RAMP] = batt.ramp
+    state[DISCHARGE_RATE] = batt.dischargeRate
+    state[CHARGE_RATE] = batt.chargeRate
+    state[INCREASE] = batt.increase
+    state[DECREASE] = batt.decrease
+    return state
+
+
+def unpackState(state, plant, batt):
+    plant.statusNum = int(state[STATUS])
+    plant.range = float(state[RANGE])
+    plant.efficiency = float(state[EFFICIENCY])
+    plant.powerRequest = float(state[POWER_REQUEST])
+    plant.powerOutput = float(state[POWER_OUTPUT])
+    plant.powerRamp = float(state[POWER_RAMP])
+    plant.heatInput = float(state[HEAT_INPUT])
+    plant.timeSinceStart = float(state[TIME_SINCE_START])
+    plant.timeSinceStop = float(state[TIME_SINCE_STOP])
+    batt.charge = float(state[CHARGE])
+    batt.ramp = float(state[BATT_RAMP])
+    batt.dischargeRate = float(state[DISCHARGE_RATE])
+    batt.chargeRate = float(state[CHARGE_RATE])
+    batt.increase = float(state[INCREASE])
+    batt.decrease = float(state[DECREASE])
+
+
+# ========================================================================
+# Power plant efficiency (same as PowerPlant.calcEff)
+# ========================================================================
+@njit(cache=True, nogil=True)
+def calcEff(params, pwr):
+    load_fr = pwr / params[CAPACITY] * 100.0
+    if load_fr < params[PART_LOAD_MIN] * 100.0:
+        eff = -1.0
+    elif load_fr > params[PART_LOAD_MAX] * 100.0:
+        eff = -1.0
+    else:
+        eff_fr = params[EFF_A] * load_fr ** params[EFF_EXPONENT] + params[EFF_B] * load_fr + params[EFF_C]
+        eff = params[MAX_EFFICIENCY] * eff_fr / 100.0
+    return eff
+
+
+# ========================================================================
+# Power plant update (same as PowerPlant.update, initPwr and updatePwr)
+# ========================================================================
+@njit(cache=True, nogil=True)
+def updatePlant(params, state, pwr, dt):
+    state[POWER_REQUEST] = pwr
+    status = state[STATUS]
+    # OFF
+    if status == OFF:
+        # Increase counter since stop ( if it has been previously stopped)
+        if state[TIME_SINCE_STOP] > 0.0:
+            state[TIME_SINCE_STOP] = state[TIME_SINCE_STOP] + dt
+
+    # STARTING
+    elif status == STARTING:
+        # Increase counter since start
+        state[TIME_SINCE_START] = state[TIME_SINCE_START] + dt
+
+        # Switch to ON state and initialize performance
+        if state[TIME_SINCE_START] > params[START_TIME]:
+            state[STATUS] = ON
+            state[TIME_SINCE_STOP] = -1.0
+            state[RANGE] = params[PART_LOAD_MIN]
+            state[POWER_OUTPUT] = state[RANGE] * params[CAPACITY]
+            state[EFFICIENCY] = calcEff(params, state[POWER_OUTPUT])
+            state[HEAT_INPUT] = state[POWER_OUTPUT] / (state[EFFICIENCY] / 100.0)
+
+    # ON
+    elif status == ON:
+        # Increase counter since start
+        state[TIME_SINCE_START] = state[TIME_SINCE_START] + dt
+
+        # Update Performance
+        powerOutput_old = state[POWER_OUTPUT]
+        powerOutput = powerOutput_old
+        if params[MIN_POWER_REQUEST] <= pwr and pwr <= params[CAPACITY]:
+            rampReq = abs(powerOutput - pwr)
+            rampPossible = params[RAMP_RATE] * dt
+            if rampReq < rampPossible:
+                ramp = rampReq
+            else:
+                ramp = rampPossible
+            if pwr < powerOutput:
+                powerOutput = powerOutput - ramp
+            elif powerOutput < pwr:
+                powerOutput = powerOutput + ramp
+
+        state[POWER_OUTPUT] = powerOutput
+        state[RANGE] = powerOutput / params[CAPACITY]
+        state[EFFICIENCY] = calcEff(params, powerOutput)
+        state[HEAT_INPUT] = powerOutput / (state[EFFICIENCY] / 100.0)
+        state[POWER_RAMP] = (powerOutput - powerOutput_old) / dt
+
+
+# ========================================================================
+# Storage.integration='exact' discharge rate (compiled from blis.storage)
+# ========================================================================
+exactDischargeRate = njit(cache=True, nogil=True)(exactDischargeRate_py)
+
+
+# ========================================================================
+# Check if a timestep left the state unchanged (steady state)
+# The time since start/stop counters are excluded, they only affect the plant while STARTING
+# ========================================================================
+@njit(cache=True, nogil=True)
+def isSteady(previous, state):
+    if state[STATUS] == STARTING:
+        return False
+    for j in range(N_STATE):
+        if j != TIME_SINCE_START and j != TIME_SINCE_STOP and previous[j] != state[j]:
+            return False
+    return True
+
+
+# ========================================================================
+# Advance the time since start/stop counters for one timestep (as PowerPlant.update)
+# ========================================================================
+@njit(cache=True, nogil=True)
+def advanceCounters(params, state, dt):
+    if params[CAPACITY] > 0.0:
+        if state[STATUS] == OFF:
+            if state[TIME_SINCE_STOP] > 0.0:
+                state[TIME_SINCE_STOP] = state[TIME_SINCE_STOP] + dt
+        elif state[STATUS] == ON:
+            state[TIME_SINCE_START] = state[TIME_SINCE_START] + dt
+
+
+# ========================================================================
+# Dispatch kernel (same as HRES.dispatch for every timestep)
+# Advances state in place and writes the performance of each timestep into perf (ordered as attributes_time_series)
+# If fastForward is True, runs of timesteps with the same inputs are skipped once a timestep with the same inputs
+# as the one before it has left the state unchanged: every following timestep of the run would repeat it exactly,
+# so its performance is copied and only the counters are advanced (identical to simulating each timestep)
+# ========================================================================
+@njit(cache=True, nogil=True)
+def simulate(dt, hour, demand, solar, params, gridEmissions, state, perf, fastForward=True):
+    steps = len(dt)
+    previous = np.empty(N_STATE)  # state after the previous timestep
+    step = 0
+    while step < steps:
+        dt_i = dt[step]
+        demand_i = demand[step]
+        solar_i = solar[step]
+
+        # ----------
+        # Calculate Battery Dis/charge Rate Available
+        # ----------
+        charge = state[CHARGE]
+        exact = params[INTEGRATION] == 1.0
+        if charge < params[CHARGE_MAX]:
+            if exact:
+                batt_c_rate = min((params[CHARGE_MAX] - charge) / dt_i / (params[ROUND_TRIP_EFF] / 100.0),
+                                  params[CHARGE_RATE_MAX])
+            else:
+                batt_c_rate = min((params[CHARGE_MAX] - charge) / dt_i, params[CHARGE_RATE_MAX])
+        else:
+            batt_c_rate = 0.0
+        if charge > params[CHARGE_MIN]:
+            if exact and params[DISCHARGE_RATE_MAX] <= 0.0:
+                # As exactDischargeRate (checked here too, cached kernels are not recompiled when blis.storage changes)
+                batt_d_rate = 0.0
+            elif exact:
+                batt_d_rate = exactDischargeRate(charge - params[CHARGE_MIN], dt_i, params[TAU],
+                                                 params[DISCHARGE_RATE_MAX])
+            else:
+                batt_d_rate = min((charge - params[CHARGE_MIN]) / dt_i / params[TAU], params[DISCHARGE_RATE_MAX])
+        else:
+            batt_d_rate = 0.0
+
+        # ----------
+        # Power Plant Control
+        # ----------
+        if params[CAPACITY] > 0.0:
+            minPowerRequest = params[MIN_POWER_REQUEST]
+            minGen = minPowerRequest + solar_i
+            if minGen > demand_i or abs(minGen - demand_i) < threshold:
+                powerRequest = minPowerRequest
+            else:
+                powerRequest = demand_i - solar_i - batt_d_rate
+            if powerRequest > params[CAPACITY]:
+                powerRequest = params[CAPACITY]
+            if powerRequest < minPowerRequest:
+                powerRequest = minPowerRequest
+            if powerRequest < threshold:
+                powerRequest = threshold
+            updatePlant(params, state, powerRequest, dt_i)
+
+        # ----------
+        # Perform Energy Balance
+        # ----------
+        powerOutput = state[POWER_OUTPUT]
+        supply = powerOutput + solar_i
+        diff = supply - demand_i
+
+        battIncrease = 0.0
+        battDecrease = 0.0
+        solarUsed = 0.0
+        loadShed = 0.0
+        gridUsed = 0.0
+
+        # 1) Demand = Supply (within threshold)
+        if abs(diff) < threshold:
+            solarUsed = solar_i
+
+        # 2) Supply > Demand
+        elif diff > 0.0:
+            if diff > batt_c_rate:
+                battIncrease = batt_c_rate
+            else:
+                battIncrease = diff
+            diff = diff - battIncrease
+            if diff < solar_i:
+                solarUsed = solar_i - diff
+            else:
+                solarUsed = 0.0
+            diff = diff - (solar_i - solarUsed)
+            loadShed = diff
+
+        # 3) Demand > Supply
+        else:
+            solarUsed = solar_i
+            if abs(diff) > batt_d_rate:
+                battDecrease = batt_d_rate
+            else:
+                battDecrease = abs(diff)
+            diff = diff + battDecrease
+            if abs(diff) < params[GRID_CAPACITY]:
+                gridUsed = abs(diff)
+            else:
+                gridUsed = params[GRID_CAPACITY]
+
+        # ----------
+        # Calculate Emissions
+        # ----------
+        CO2_produced = (gridUsed * dt_i * gridEmissions[hour[step]]) + (
+                state[HEAT_INPUT] / 60.0 * dt_i * params[FUEL_EMISSIONS])
+        CO2_captured = CO2_produced * (params[CO2_CAPTURE_EFF] / 100.0)
+        Emissions = CO2_produced - CO2_captured
+
+        # ----------
+        # Update Battery
+        # ----------
+        state[DISCHARGE_RATE] = battDecrease
+        state[CHARGE_RATE] = battIncrease
+        state[DECREASE] = battDecrease
+        state[INCREASE] = battIncrease * params[ROUND_TRIP_EFF] / 100.0
+        state[CHARGE] = charge + state[INCREASE] * dt_i - state[DECREASE] * dt_i
+        state[BATT_RAMP] = (state[CHARGE] - charge) / dt_i
+
+        # ----------
+        # Check Energy Balance
+        # ----------
+        E_in = solar_i + powerOutput + battDecrease + gridUsed
+        E_out = demand_i + battIncrease + loadShed + (solar_i - solarUsed)
+        deficit = E_in - E_out
+
+        # ----------
+        # Store performance of current timestep
+        # ----------
+        perf[step, 0] = state[POWER_REQUEST]
+        perf[step, 1] = powerOutput
+        perf[step, 2] = state[POWER_RAMP]
+        perf[step, 3] = state[HEAT_INPUT]
+        perf[step, 4] = state[EFFICIENCY]
+        perf[step, 5] = state[CHARGE]
+        perf[step, 6] = state[INCREASE]
+        perf[step, 7] = state[DECREASE]
+        perf[step, 8] = state[DISCHARGE_RATE]
+        perf[step, 9] = state[CHARGE_RATE]
+        perf[step, 10] = state[BATT_RAMP]
+        perf[step, 11] = solarUsed
+        perf[step, 12] = loadShed
+        perf[step, 13] = deficit
+        perf[step, 14] = gridUsed
+        perf[step, 15] = CO2_produced
+        perf[step, 16] = CO2_captured
+        perf[step, 17] = Emissions
+
+        # ----------
+        # Fast-forward through steady state
+        # ----------
+        next_step = step + 1
+        if fastForward:
+            if step > 0 and dt[step - 1] == dt_i and hour[step - 1] == hour[step] and \
+                    demand[step - 1] == demand_i and solar[step - 1] == solar_i and isSteady(previous, state):
+                while next_step < steps and dt[next_step] == dt_i and hour[next_step] == hour[step] and \
+                        demand[next_step] == demand_i and solar[next_step] == solar_i:
+                    perf[next_step, :] = perf[step, :]
+                    advanceCounters(params, state, dt_i)
+                    next_step = next_step + 1
+            previous[:] = state
+        step = next_step
@@ -0,0 +1,235 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Hardcoded Inputs:
+debug = False  # If True, additional information is presented to the console
+dataVersion = 1  # Increase when the binary format changes, so that csv files are converted again
+cacheDirName = '.blis_cache'  # Binary files are stored in this directory next to each csv file (unless cacheDir is given)
+magic = b'BLISDATA'
+alignment = 64  # (bytes) Alignment of each column in the binary file
+
+# General Imports:
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+
+
+# =============================================================================#
+# Path of the binary file of a csv file
+# =============================================================================#
+def getCachePath(path, cacheDir=None):
+    path = os.path.abspath(path)
+    if cacheDir is None:
+        cacheDir = os.path.join(os.path.dirname(path), cacheDirName)
+    name = hashlib.sha256(path.encode()).hexdigest()[:16]
+    return os.path.join(cacheDir, os.path.basename(path) + '.' + name + '.blis')
+
+
+def hashFile(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# =============================================================================#
+# Columns of a DataFrame read from csv as arrays to store: hour as int8, date and time strings as int64 epoch
+# timestamps (ns, UTC) with the offset of the local time (utcOffset, min) if the strings have offsets, other
+# strings as fixed width strings and numbers unchanged
+# Returns a list of (name, kind, array), kind is 'values' or 'datetime'
+# =============================================================================#
+def convertColumns(data):
+    columns = []
+    for name in data.columns:
+        values = data.loc[:, name]
+        if name == 'hour' and pd.api.types.is_integer_dtype(values) and values.between(0, 23).all():
+            columns.append((name, 'values', values.to_numpy(dtype=np.int8)))
+        elif pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            columns.append((name, 'values', values.to_numpy()))
+        else:
+            strings = values.astype(str)
+            try:
+                times = pd.to_datetime(strings, utc=True, format='ISO8601')
+                local = pd.to_datetime(strings.str.slice(0, 19), format='ISO8601')
+            except (ValueError, TypeError):
+                columns.append((name, 'values', strings.to_numpy(dtype=str)))
+                continue
+            epoch = times.dt.tz_convert(None).to_numpy(dtype='datetime64[ns]').view(np.int64)
+            offset = (local.to_numpy(dtype='datetime64[ns]').view(np.int64) - epoch) // 60000000000
+            columns.append((name, 'datetime', epoch))
+            if (offset != 0).any():
+                columns.append((getOffsetName(name), 'values', offset.astype(np.int16)))
+    return columns
+
+
+def getOffsetName(name):
+    if name == 'DatetimeUTC':
+        return 'utcOffset'
+    return name + '_utcOffset'
+
+
+# =============================================================================#
+# DataFrame of stored columns (see convertColumns), date and time columns are datetime64[ns, UTC]
+# =============================================================================#
+def makeFrame(columns):
+    arrays = {}
+    for name, kind, values in columns:
+        if kind == 'datetime':
+            arrays[name] = pd.Series(values.view('datetime64[ns]'), copy=False).dt.tz_localize('UTC')
+        elif values.flags.writeable:
+            arrays[name] = values
+        else:
+            arrays[name] = values.copy()
+    return pd.DataFrame(arrays, copy=False)
+
+
+# =============================================================================#
+# Binary file: magic, header length (8 bytes), JSON header, then each column aligned to 64 bytes
+# Written to a temporary file and renamed, so readers never see a partial file
+# =============================================================================#
+def writeCache(cachePath, columns, source):
+    offset = 0
+    layout = []
+    for name, kind, values in columns:
+        layout.append({'name': name, 'kind': kind, 'dtype': values.dtype.str, 'offset': offset})
+        offset = offset + -(-values.nbytes // alignment) * alignment
+    rows = len(columns[0][2]) if len(columns) > 0 else 0
+    header = json.dumps({'version': dataVersion, 'source': source, 'rows': rows, 'columns': layout}).encode()
+    start = -(-(len(magic) + 8 + len(header)) // alignment) * alignment
+
+    directory = os.path.dirname(cachePath)
+    os.makedirs(directory, exist_ok=True)
+    handle, tmpPath = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(magic)
+            f.write(len(header).to_bytes(8, 'little'))
+            f.write(header)
+            for entry, (name, kind, values) in zip(layout, columns):
+                f.seek(start + entry['offset'])
+                f.write(np.ascontiguousarray(values).tobytes())
+            f.truncate(start + offset)
+        # mkstemp creates the file readable by its owner only, other users of the csv can read it as well
+        os.chmod(tmpPath, getFileMode(source['path']))
+        os.replace(tmpPath, cachePath)
+    except BaseException:
+        try:
+            os.remove(tmpPath)
+        except OSError:
+            pass
+        raise
+
+
+# Permissions of a new copy of the file at path (its permissions, masked by the umask)
+def getFileMode(path):
+    umask = os.umask(0)
+    os.umask(umask)
+    return os.stat(path).st_mode & 0o777 & ~umask
+
+
+# =============================================================================#
+# Read a binary file, returns (source description, columns) or None if it is missing or unreadable
+# Columns are memory-mapped copy-on-write: pages are read when used and changes are not written to the file
+# =============================================================================#
+def readCache(cachePath):
+    try:
+        with open(cachePath, 'rb') as f:
+            if f.read(len(magic)) != magic:
+                return None
+            length = int.from_bytes(f.read(8), 'little')
+            header = json.loads(f.read(length).decode())
+        if header['version'] != dataVersion:
+            return None
+        start = -(-(len(magic) + 8 + length) // alignment) * alignment
+
+        columns = []
+        if header['rows'] > 0 and len(header['columns']) > 0:
+            mapped = np.memmap(cachePath, dtype=np.uint8, mode='c')
+        for entry in header['columns']:
+            dtype = np.dtype(entry['dtype'])
+            if header['rows'] > 0:
+                first = start + entry['offset']
+                values = np.asarray(mapped[first:first + header['rows'] * dtype.itemsize]).view(dtype)
+            else:
+                values = np.zeros(0, dtype=dtype)
+            columns.append((entry['name'], entry['kind'], values))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return header['source'], columns
+
+
+# =============================================================================#
+# Load input data from a csv file (e.g. data063.csv, expected columns as in pd.read_csv of the examples)
+# The first read converts the csv to a columnar binary file (see convertColumns), later reads memory-map it, so
+# loading takes milliseconds. The binary file is used while the size and modification time of the csv are
+# unchanged, or if its contents (sha256) are unchanged, otherwise the csv is converted again
+# cacheDir - directory of the binary files, by default .blis_cache next to the csv file
+# Date and time strings (e.g. DatetimeUTC) are loaded as datetime64[ns, UTC], with the offset of the local time
+# (min) in utcOffset
+# =============================================================================#
+def loadData(path, cacheDir=None):
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    cachePath = getCachePath(path, cacheDir)
+
+    # Use the binary file if the csv is unchanged
+    entry = readCache(cachePath)
+    digest = None
+    if entry is not None:
+        source, columns = entry
+        if source['size'] == stat.st_size and source['mtime'] == stat.st_mtime_ns:
+            if debug:
+                print("Loaded " + path + " from " + cachePath)
+            return makeFrame(columns)
+
+        # Modified time changed (e.g. copied or touched), compare the contents
+        digest = hashFile(path)
+        if digest == source['sha256']:
+            source = {'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': digest}
+            try:
+                writeCache(cachePath, columns, source)
+            except OSError:
+                pass
+            return makeFrame(columns)
+
+    # Convert the csv (the size and time read before the csv, so that changes while reading are detected later)
+    if digest is None:
+        digest = hashFile(path)
+    columns = convertColumns(pd.read_csv(path))
+    source = {'path': path, 'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': digest}
+    try:
+        writeCache(cachePath, columns, source)
+    except OSError as error:
+        print("Warning: binary file of " + path + " could not be written (" + str(error) + ")")
+        return makeFrame(columns)
+
+    if debug:
+        print("Converted " + path + " to " + cachePath)
+
+    # Memory-mapped, as in later reads
+    entry = readCache(cachePath)
+    if entry is not None:
+        columns = entry[1]
+    return makeFrame(columns)
@@ -25,8 +25,12 @@ import numpy as np
 
 # =============================================================================#
 # Create MonteCarlo Inputs
+# seed (optional) seeds numpy's random numbers so that the same inputs are drawn again, e.g. to resume a sweep
 # =============================================================================#
-def monteCarloInputs(filename, sheetname, iterations):
+def monteCarloInputs(filename, sheetname, iterations, seed=None):
+    if seed is not None:
+        np.random.seed(seed)
+
     # Read Excel with inputs
     df_xls = pd.read_excel(filename, sheet_name=sheetname, index_col=0)
 
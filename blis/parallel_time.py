@@ -0,0 +1,165 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Hardcoded Inputs:
+debug = False  # If True, additional information is presented to the console
+
+# General Imports:
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+# BLIS Imports:
+from blis import kernels
+from blis.hres import attributes_time_series, blockSize
+from blis.resample import resampleData
+
+
+# =============================================================================#
+# Parallel-in-time simulation of a single HRES (Parareal)
+# The time series is split into segments that are simulated in parallel (compiled kernel, one thread per segment)
+# starting from guessed states. A coarse propagator (the kernel with data resampled to coarseMinutes) predicts
+# the state at the start of each segment and is corrected with the segment results until the states at the
+# boundaries change by less than tol between iterations
+# After k iterations the first k segments are identical to a sequential run, so at most one iteration per segment
+# is needed. Usually far fewer are needed because the battery and plant states converge (e.g. full or empty battery)
+# Requires numba and the compiled kernels (see HRES.usesKernels), otherwise HRES.run(engine='array') is used (the
+# kernels without numba are pure python and would redo segments under the GIL, far slower than a sequential run)
+# Returns results (perf, totals and results are stored in hres as with HRES.run, the number of iterations in
+# hres.iterations)
+# =============================================================================#
+def runParallelTime(hres, segments=None, threads=None, coarseMinutes=60.0, tol=1.0e-9, maxIterations=None):
+    if not kernels.jit_available or not hres.usesKernels():
+        print("Warning: parallel-in-time simulation requires numba and the compiled kernels, running sequentially")
+        return hres.run(engine='array')
+
+    if threads is None:
+        threads = os.cpu_count()
+    if segments is None:
+        segments = threads
+    segments = max(1, min(segments, hres.steps))
+    if maxIterations is None:
+        maxIterations = segments
+
+    # Inputs and segments
+    dt, hour, demand, solar = hres.getInputArrays()
+    bounds = np.linspace(0, hres.steps, segments + 1).astype(int)
+    params = kernels.packParams(hres.plant, hres.batt, hres.fuel, hres.grid)
+    gridEmissions = kernels.packGridEmissions(hres.grid)
+    initial = kernels.packState(hres.plant, hres.batt)
+
+    # Coarse inputs for each segment
+    coarseInputs = []
+    for n in range(segments):
+        segment = slice(bounds[n], bounds[n + 1])
+        coarse = resampleData(pd.DataFrame({'dt': dt[segment], 'hour': hour[segment], 'demand': demand[segment],
+                                            'solar': solar[segment]}), coarseMinutes)
+        coarseInputs.append((np.ascontiguousarray(coarse.dt.values, dtype=float),
+                             np.ascontiguousarray(coarse.hour.values, dtype=np.int64),
+                             np.ascontiguousarray(coarse.demand.values, dtype=float),
+                             np.ascontiguousarray(coarse.solar.values, dtype=float)))
+
+    # ----------
+    # Propagators, return the state at the end of segment n
+    # ----------
+    def fine(n, start):
+        segment = slice(bounds[n], bounds[n + 1])
+        state = start.copy()
+        perf = np.zeros((bounds[n + 1] - bounds[n], len(attributes_time_series)))
+        kernels.simulate(dt[segment], hour[segment], demand[segment], solar[segment], params, gridEmissions, state,
+                         perf)
+        return state, perf
+
+    def coarse(n, start):
+        dt_c, hour_c, demand_c, solar_c = coarseInputs[n]
+        state = start.copy()
+        perf = np.zeros((len(dt_c), len(attributes_time_series)))
+        kernels.simulate(dt_c, hour_c, demand_c, solar_c, params, gridEmissions, state, perf)
+        return state
+
+    # Initial guess of the state at the start of each segment (coarse propagator)
+    starts = [initial]
+    predicted = []  # Coarse prediction of the end state of each segment
+    for n in range(segments - 1):
+        predicted.append(coarse(n, starts[n]))
+        starts.append(predicted[n])
+
+    # ----------
+    # Iterate
+    # ----------
+    fineStates = [None] * segments
+    finePerf = [None] * segments
+    fineStarts = [None] * segments
+    converged = False
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for iteration in range(1, maxIterations + 1):
+
+            # Fine propagator in parallel, only for segments with a new start state
+            todo = [n for n in range(segments) if fineStarts[n] is None or not np.array_equal(fineStarts[n], starts[n])]
+            for n, (state, perf) in zip(todo, executor.map(lambda n: fine(n, starts[n]), todo)):
+                fineStates[n] = state
+                finePerf[n] = perf
+                fineStarts[n] = starts[n]
+
+            # Correction (sequential, coarse propagator)
+            corrected = [initial]
+            for n in range(segments - 1):
+                prediction = coarse(n, corrected[n])
+                state = np.where(prediction == predicted[n], fineStates[n],
+                                 prediction + fineStates[n] - predicted[n])
+                # Keep the corrected state physical (status code, battery charge and plant output within limits)
+                state[kernels.STATUS] = min(max(round(state[kernels.STATUS]), kernels.OFF), kernels.ON)
+                state[kernels.CHARGE] = min(max(state[kernels.CHARGE], params[kernels.CHARGE_MIN]),
+                                            params[kernels.CHARGE_MAX])
+                minOutput = params[kernels.MIN_POWER_REQUEST] if state[kernels.STATUS] == kernels.ON else 0.0
+                state[kernels.POWER_OUTPUT] = min(max(state[kernels.POWER_OUTPUT], minOutput), params[kernels.CAPACITY])
+                predicted[n] = prediction
+                corrected.append(state)
+
+            change = max([np.abs(corrected[n] - starts[n]).max() for n in range(segments)])
+            starts = corrected
+            if debug:
+                print("Iteration " + str(iteration) + ": maximum change of boundary states " + str(change))
+            if change <= tol:
+                converged = True
+                break
+
+    if not converged:
+        print("Warning: parallel-in-time simulation did not converge, maximum change of boundary states: " + str(
+            change))
+
+    # ----------
+    # Store performance, final state and results
+    # ----------
+    perf = np.concatenate(finePerf)
+    kernels.unpackState(fineStates[-1], hres.plant, hres.batt)
+    if hres.storePerf:
+        hres.perf = pd.DataFrame(data=perf, index=range(hres.steps), columns=attributes_time_series)
+    else:
+        totals = hres.initTotals()
+        for start in range(0, hres.steps, blockSize):
+            stop = min(start + blockSize, hres.steps)
+            hres.addTotals(totals, start, stop, perf[start:stop])
+        hres.storeTotals(totals)
+    hres.iterations = iteration
+
+    return hres.analyzeResults()
@@ -23,6 +23,7 @@ OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 debug = False  # If True, additional information is presented to the console
 
 # General Imports:
+import numpy as np
 import pandas as pd
 
 
@@ -84,10 +85,51 @@ def defaultInputs(plantType='CCGT'):
     return plant_inputs
 
 
+# Status codes (integers are stored, status names are provided for compatibility)
+OFF = 1
+STARTING = 2
+ON = 3
+statusNames = {OFF: "OFF", STARTING: "STARTING", ON: "ON"}
+statusNums = {"OFF": OFF, "STARTING": STARTING, "ON": ON}
+
+# Snapshot of the operating state (see PowerPlant.getState)
+plant_state = np.dtype([('status', np.int8), ('range', float), ('efficiency', float), ('powerRequest', float),
+                        ('powerOutput', float), ('powerRamp', float), ('heatInput', float), ('timeSinceStart', float),
+                        ('timeSinceStop', float)])
+
+# Characteristics that can be changed with PowerPlant.reconfigure
+plant_characteristics = ['type', 'capacity', 'maxEfficiency', 'rampRate', 'minRange', 'startTime', 'stopTime', 'Eff_A',
+                         'Eff_B', 'Eff_C', 'cost_install', 'cost_OM_fix', 'cost_OM_var', 'co2CaptureEff']
+
+
+# ========================================================================
+# Calculate efficiency (%) at power outputs pwr (MW), -1 where outside of the operating range
+# Inputs are scalars or arrays that broadcast together, e.g. an array of candidate set-points for one plant, or an
+# array of set-points (as a column) for an array of plants (as a row)
+# effTable is an optional lookup table (see PowerPlant.setEffTable), used instead of the Eff_A/Eff_B/Eff_C curve
+# ========================================================================
+def calcEfficiency(pwr, capacity, maxEfficiency, Eff_A, Eff_B, Eff_C, partLoadMin, partLoadMax, effTable=None):
+    # Calculate where power request falls within operation range
+    load_fr = np.asarray(pwr, dtype=float) / capacity * 100.0
+
+    # Calculate Efficiency
+    if effTable is None:
+        eff_fr = Eff_A * load_fr ** 2 + Eff_B * load_fr + Eff_C
+        eff = maxEfficiency * eff_fr / 100.0
+    else:
+        eff = np.interp(load_fr, effTable[0], effTable[1])
+
+    outOfRange = (load_fr < partLoadMin * 100.0) | (load_fr > partLoadMax * 100.0)
+    return np.where(outOfRange, -1.0, eff)
+
+
 # ========================================================================
 # Instantiate PowerPlant
 # ========================================================================
 class PowerPlant:
+    __slots__ = plant_characteristics + ['minPowerRequest', 'partLoadRange', 'effTable', 'statusNum', 'range',
+                                         'efficiency', 'powerRequest', 'powerOutput', 'powerRamp', 'heatInput',
+                                         'timeSinceStart', 'timeSinceStop']
 
     def __init__(self, plant_inputs):
 
@@ -110,9 +152,16 @@ class PowerPlant:
         # Derived Characteristics
         self.minPowerRequest = self.minRange / 100.0 * self.capacity
         self.partLoadRange = [plant_inputs.minRange / 100.0, 1.0]  # list (fractions)
+        self.effTable = None  # Optional efficiency lookup table (see setEffTable)
 
         # Initialize Operation
-        self.status = "ON"  # ON, STARTING, OFF
+        self.reset()
+
+    # ========================================================================
+    # Reset to the initial operating state
+    # ========================================================================
+    def reset(self):
+        self.statusNum = ON  # ON, STARTING, OFF
         self.range = 1.0
         self.efficiency = self.maxEfficiency  # -1.0 indicates it is not active
         self.powerRequest = self.capacity
@@ -123,18 +172,54 @@ class PowerPlant:
         self.timeSinceStop = -1.0  # -1.0 indicates it is not active
 
     # ========================================================================
-    # Get Plant Status
+    # Status name ("ON", "STARTING" or "OFF")
     # ========================================================================
-    def getStatusNum(self):
+    @property
+    def status(self):
+        return statusNames[self.statusNum]
 
-        if self.status == "OFF":
-            statusNum = 1
-        elif self.status == "STARTING":
-            statusNum = 2
-        elif self.status == "ON":
-            statusNum = 3
+    @status.setter
+    def status(self, value):
+        self.statusNum = statusNums[value]
 
-        return statusNum
+    # ========================================================================
+    # Snapshot of the operating state as a structured array (dtype plant_state), restored with setState
+    # ========================================================================
+    def getState(self):
+        return np.array((self.statusNum, self.range, self.efficiency, self.powerRequest, self.powerOutput,
+                         self.powerRamp, self.heatInput, self.timeSinceStart, self.timeSinceStop), dtype=plant_state)
+
+    def setState(self, state):
+        self.statusNum = int(state['status'])
+        self.range = float(state['range'])
+        self.efficiency = float(state['efficiency'])
+        self.powerRequest = float(state['powerRequest'])
+        self.powerOutput = float(state['powerOutput'])
+        self.powerRamp = float(state['powerRamp'])
+        self.heatInput = float(state['heatInput'])
+        self.timeSinceStart = float(state['timeSinceStart'])
+        self.timeSinceStop = float(state['timeSinceStop'])
+
+    # ========================================================================
+    # Update characteristics in place (names as in plant_characteristics, e.g. capacity=60.0), then reset
+    # ========================================================================
+    def reconfigure(self, **params):
+        for name, value in params.items():
+            if name not in plant_characteristics:
+                raise ValueError("Unknown PowerPlant parameter: " + name)
+            setattr(self, name, value)
+
+        # Derived Characteristics
+        self.minPowerRequest = self.minRange / 100.0 * self.capacity
+        self.partLoadRange = [self.minRange / 100.0, 1.0]  # list (fractions)
+
+        self.reset()
+
+    # ========================================================================
+    # Get Plant Status
+    # ========================================================================
+    def getStatusNum(self):
+        return self.statusNum
 
     # ========================================================================
     # Print Commands
@@ -183,15 +268,15 @@ class PowerPlant:
     # Operational Commands
     # ========================================================================
     def start(self):
-        if self.status == "OFF":
-            self.status = "STARTING"
+        if self.statusNum == OFF:
+            self.statusNum = STARTING
         else:
             print("Error: Unit is already starting")
         pass
 
     def stop(self):
-        if self.status == "ON" or self.status == "STARTING":
-            self.status = "OFF"
+        if self.statusNum == ON or self.statusNum == STARTING:
+            self.statusNum = OFF
             self.range = 0.0
             self.efficiency = -1.0
             self.powerOutput = 0.0
@@ -209,7 +294,7 @@ class PowerPlant:
         # ----------
         # OFF
         # ----------
-        if self.status == "OFF":
+        if self.statusNum == OFF:
             # Increase counter since stop ( if it has been previously stopped)
             if self.timeSinceStop > 0.0:
                 self.timeSinceStop = self.timeSinceStop + dt
@@ -218,20 +303,20 @@ class PowerPlant:
         # ----------
         # STARTING
         # ----------
-        elif self.status == "STARTING":
+        elif self.statusNum == STARTING:
             # Increase counter since start
             self.timeSinceStart = self.timeSinceStart + dt
 
             # Switch to ON state
             if self.timeSinceStart > self.startTime:
-                self.status = "ON"
+                self.statusNum = ON
                 self.timeSinceStop = -1.0  # -1.0 indicates it is not active
                 # Initialize Performance (sets self.efficiency, self.powerOutput, and self.heatInput)
                 self.initPwr()
         # ----------
         # ON
         # ----------
-        elif self.status == "ON":
+        elif self.statusNum == ON:
             # Increase counter since start
             self.timeSinceStart = self.timeSinceStart + dt
 
@@ -241,6 +326,18 @@ class PowerPlant:
         # Return Power Out and Heat In
         return self.powerOutput, self.heatInput, self.efficiency
 
+    # ========================================================================
+    # Advance through timesteps at steady state (same power request and output), only the counters change
+    # Same as calling update() with the same power request for each timestep
+    # ========================================================================
+    def advanceSteady(self, dt, steps):
+        for step in range(steps):
+            if self.statusNum == OFF:
+                if self.timeSinceStop > 0.0:
+                    self.timeSinceStop = self.timeSinceStop + dt
+            elif self.statusNum == ON:
+                self.timeSinceStart = self.timeSinceStart + dt
+
     # ========================================================================
     # Internal Subroutine for initializing power production (switch from STARTING to ON states)
     # ========================================================================
@@ -304,8 +401,16 @@ class PowerPlant:
     # ========================================================================
     # Method for calculating efficiency at a given power output
     # Does not set efficiency, thus it could be used by a control scheme to determine where to operate
+    # pwr may also be an array (e.g. every candidate set-point), then an array is returned
     # ========================================================================
     def calcEff(self, pwr):
+        if self.effTable is not None or not isinstance(pwr, (float, int)):
+            eff = calcEfficiency(pwr, self.capacity, self.maxEfficiency, self.Eff_A, self.Eff_B, self.Eff_C,
+                                 self.partLoadRange[0], self.partLoadRange[1], self.effTable)
+            if eff.ndim == 0:
+                eff = float(eff)
+            return eff
+
         # Calculate where power request falls within operation range
         load_fr = pwr / self.capacity * 100.0
 
@@ -324,3 +429,31 @@ class PowerPlant:
                 print("Efficiency          [%] : " + str(eff))
 
         return eff
+
+    # ========================================================================
+    # Heat input (MW thermal) at power outputs pwr (MW), scalar or array, 0.0 where outside of the operating range
+    # ========================================================================
+    def calcHeatInput(self, pwr):
+        eff = np.asarray(self.calcEff(pwr), dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            heatInput = np.where(eff > 0.0, pwr / (eff / 100.0), 0.0)
+        if heatInput.ndim == 0:
+            heatInput = float(heatInput)
+        return heatInput
+
+    # ========================================================================
+    # Set an efficiency lookup table, calcEff then interpolates efficiency (%) linearly on load fraction (%)
+    # load and efficiency are measured points (load in increasing order), if not provided the Eff_A/Eff_B/Eff_C
+    # curve is tabulated at points load fractions across the operating range
+    # Set effTable = None to use the curve again (a tabulated curve is not updated by reconfigure)
+    # ========================================================================
+    def setEffTable(self, load=None, efficiency=None, points=101):
+        if load is None:
+            load = np.linspace(self.partLoadRange[0] * 100.0, self.partLoadRange[1] * 100.0, points)
+            efficiency = calcEfficiency(load / 100.0 * self.capacity, self.capacity, self.maxEfficiency, self.Eff_A,
+                                        self.Eff_B, self.Eff_C, 0.0, np.inf)
+        load = np.array(load, dtype=float)
+        efficiency = np.array(efficiency, dtype=float)
+        if load.ndim != 1 or load.shape != efficiency.shape or len(load) < 2 or (np.diff(load) <= 0.0).any():
+            raise ValueError("Efficiency table requires increasing load fractions with one efficiency each")
+        self.effTable = (load, efficiency)
@@ -0,0 +1,192 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Hardcoded Inputs:
+debug = False  # If True, additional information is presented to the console
+maxIterations = 100  # Maximum number of k-means iterations
+
+# General Imports:
+import numpy as np
+import pandas as pd
+
+# BLIS Imports:
+from blis.hres import attributes_totals, calcResults
+from blis.screening import attributes_fidelity
+from blis.cyclic_state import findCyclicState
+
+
+# =============================================================================#
+# Find the days in data (a new day starts when the hour decreases, e.g. 23 -> 0)
+# Returns a list of (start, stop) row positions
+# =============================================================================#
+def getDays(data):
+    hour = np.asarray(data.loc[:, 'hour'])
+    starts = np.flatnonzero(np.diff(hour) < 0) + 1
+    starts = np.concatenate(([0], starts))
+    stops = np.concatenate((starts[1:], [len(hour)]))
+    return list(zip(starts.tolist(), stops.tolist()))
+
+
+# =============================================================================#
+# Daily profiles used for clustering: hourly average demand and solar of each day (standardized)
+# =============================================================================#
+def getDayProfiles(data, days):
+    hour = np.asarray(data.loc[:, 'hour']).astype(np.intp)
+    dt = np.asarray(data.loc[:, 'dt'], dtype=float)
+    profiles = np.zeros((len(days), 48))
+    for i, (start, stop) in enumerate(days):
+        time = np.bincount(hour[start:stop], weights=dt[start:stop], minlength=24)[:24]
+        for j, column in enumerate(['demand', 'solar']):
+            energy = np.bincount(hour[start:stop], weights=(data[column].values[start:stop] * dt[start:stop]),
+                                 minlength=24)[:24]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                profiles[i, j * 24:(j + 1) * 24] = energy / time
+
+    # Hours missing from a day (partial days) are set to the average of that hour
+    average = np.nanmean(profiles, axis=0)
+    profiles = np.where(np.isnan(profiles), average, profiles)
+
+    # Standardize each hour
+    std = profiles.std(axis=0)
+    std[std == 0.0] = 1.0
+    return (profiles - profiles.mean(axis=0)) / std
+
+
+# =============================================================================#
+# k-means clustering (k-means++ initialization)
+# =============================================================================#
+def kMeans(points, k, seed=0):
+    rng = np.random.RandomState(seed)
+    n = len(points)
+
+    # Initialize
+    centers = [points[rng.randint(n)]]
+    for i in range(1, k):
+        dist = np.min([((points - c) ** 2).sum(axis=1) for c in centers], axis=0)
+        if dist.sum() > 0.0:
+            centers.append(points[rng.choice(n, p=dist / dist.sum())])
+        else:
+            centers.append(points[rng.randint(n)])
+    centers = np.array(centers)
+
+    # Iterate
+    labels = None
+    for iteration in range(maxIterations):
+        dist = ((points[:, np.newaxis, :] - centers[np.newaxis, :, :]) ** 2).sum(axis=2)
+        new = dist.argmin(axis=1)
+        if labels is not None and (new == labels).all():
+            break
+        labels = new
+        for c in range(k):
+            members = labels == c
+            if members.any():
+                centers[c] = points[members].mean(axis=0)
+            else:
+                # Empty cluster, restart at the point farthest from its center
+                far = dist[np.arange(n), labels].argmax()
+                centers[c] = points[far]
+    return labels, centers
+
+
+# =============================================================================#
+# Cluster the days of data into k representative days
+# Returns a DataFrame with one row per representative day:
+#   day    - index of the day (medoid of the cluster, the day closest to the cluster center)
+#   start  - first row of the day in data
+#   stop   - row after the last row of the day
+#   days   - number of days in the cluster
+#   weight - ratio of the duration of all days in the cluster to the duration of the representative day
+# =============================================================================#
+def clusterDays(data, k=12, seed=0):
+    days = getDays(data)
+    duration = np.array([data.loc[:, 'dt'].values[start:stop].sum() for start, stop in days], dtype=float)
+    profiles = getDayProfiles(data, days)
+
+    k = min(k, len(days))
+    labels, centers = kMeans(profiles, k, seed)
+
+    rows = []
+    for c in range(k):
+        members = np.flatnonzero(labels == c)
+        if len(members) == 0:
+            continue
+        dist = ((profiles[members] - centers[c]) ** 2).sum(axis=1)
+        medoid = members[dist.argmin()]
+        rows.append([medoid, days[medoid][0], days[medoid][1], len(members),
+                     duration[members].sum() / duration[medoid]])
+    repDays = pd.DataFrame(rows, columns=['day', 'start', 'stop', 'days', 'weight'])
+
+    if debug:
+        print(repDays)
+
+    return repDays
+
+
+# =============================================================================#
+# Simulate the representative days and reconstruct the results of all of data
+# build(data) returns an HRES (or child of HRES) for the data of one day
+# battery='reset' - each day starts from the initial state of the components
+# battery='cyclic' - each day starts from its cyclic steady state (see blis.findCyclicState), so the day ends in the
+#                    state it started from (periodic, e.g. the battery charge carried over night), requires
+#                    PowerPlant and Storage components
+# Energy totals are weighted by repDays.weight, LCOE is scaled to a year using the total duration represented
+# Returns results and energy totals
+# =============================================================================#
+def runRepresentativeDays(data, repDays, build, battery='reset', engine='jit'):
+    if battery not in ['reset', 'cyclic']:
+        raise ValueError("Unknown battery: " + str(battery) + ", expected 'reset' or 'cyclic'")
+
+    totals = []
+    costs = None
+    for start, stop in zip(repDays.start, repDays.stop):
+        hres = build(data.iloc[start:stop].reset_index(drop=True))
+        if costs is None:
+            # Before findCyclicState changes the initial charge of the battery (the initial charge given is priced)
+            costs = hres.getCosts()
+        if battery == 'cyclic':
+            findCyclicState(hres, engine=engine)
+        else:
+            hres.run(engine=engine)
+        totals.append(hres.totals)
+    totals = pd.DataFrame(totals, columns=attributes_totals)
+
+    # Weight energy totals, deficit extremes are taken over all representative days
+    weight = repDays.weight.values
+    combined = (totals.mul(weight, axis=0)).sum()
+    combined.deficit_max = totals.deficit_max.max()
+    combined.deficit_min = totals.deficit_min.min()
+
+    results = calcResults(combined, costs)
+    return results, combined
+
+
+# =============================================================================#
+# Compare approximate results (e.g. from representative days) to reference results (e.g. the full year)
+# =============================================================================#
+def compareResults(results, reference):
+    report = pd.DataFrame(index=attributes_fidelity)
+    report['approximation'] = results.loc[attributes_fidelity].astype(float)
+    report['reference'] = reference.loc[attributes_fidelity].astype(float)
+    report['error'] = report.approximation - report.reference
+    with np.errstate(divide='ignore', invalid='ignore'):
+        report['error_pct'] = np.where(report.reference != 0.0, report.error / report.reference.abs() * 100.0,
+                                       np.nan)
+    return report
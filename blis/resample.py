@@ -0,0 +1,77 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Hardcoded Inputs:
+debug = False  # If True, additional information is presented to the console
+
+# General Imports:
+import numpy as np
+import pandas as pd
+
+
+# =============================================================================#
+# First timestep of each window of resampleData, based on the time at the start of each timestep
+# (timestep k belongs to window np.searchsorted(first, k, side='right') - 1)
+# =============================================================================#
+def getWindows(data, minutes):
+    dt = np.asarray(data.loc[:, 'dt'], dtype=float)
+    hour = np.asarray(data.loc[:, 'hour'])
+    start = np.cumsum(dt) - dt  # (min)
+    window = np.floor(start / minutes)
+    new = np.ones(len(dt), dtype=bool)
+    new[1:] = (window[1:] != window[:-1]) | (hour[1:] != hour[:-1])
+    return np.flatnonzero(new)
+
+
+# =============================================================================#
+# Resample input data (dt, hour, demand, solar) to a coarser resolution
+# Consecutive timesteps are combined into windows of minutes (min), windows never span two hours so that the
+# time of day totals are kept. demand and solar are averaged weighted by dt, so energy is conserved
+# If present, DatetimeUTC (and utcOffset, see blis.loadData) is the time at the start of each window
+# =============================================================================#
+def resampleData(data, minutes):
+    dt = np.asarray(data.loc[:, 'dt'], dtype=float)
+    hour = np.asarray(data.loc[:, 'hour'])
+    demand = np.asarray(data.loc[:, 'demand'], dtype=float)
+    solar = np.asarray(data.loc[:, 'solar'], dtype=float)
+    first = getWindows(data, minutes)
+
+    # Combine timesteps
+    resampled = pd.DataFrame()
+    if 'DatetimeUTC' in data.columns:
+        resampled['DatetimeUTC'] = data.loc[:, 'DatetimeUTC'].iloc[first].reset_index(drop=True)
+        if 'utcOffset' in data.columns:
+            resampled['utcOffset'] = np.asarray(data.loc[:, 'utcOffset'])[first]
+    if len(first) > 0:
+        dt_new = np.add.reduceat(dt, first)
+        resampled['dt'] = dt_new
+        resampled['hour'] = hour[first]
+        resampled['demand'] = np.add.reduceat(demand * dt, first) / dt_new
+        resampled['solar'] = np.add.reduceat(solar * dt, first) / dt_new
+    else:
+        resampled = pd.DataFrame(columns=list(resampled.columns) + ['dt', 'hour', 'demand', 'solar'])
+
+    if debug:
+        print("Resampled " + str(len(data)) + " timesteps to " + str(len(resampled)))
+        print("demand (MWh): " + str((demand * dt).sum() / 60.0) + " -> " + str(
+            (resampled.demand * resampled.dt).sum() / 60.0))
+
+    return resampled
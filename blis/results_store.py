@@ -0,0 +1,112 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Hardcoded Inputs:
+debug = False  # If True, additional information is presented to the console
+timeout = 60.0  # (s) Wait for other processes writing to the same store
+
+# General Imports:
+import json
+import sqlite3
+import hashlib
+import numpy as np
+import pandas as pd
+
+# BLIS Imports:
+from blis.hres import attributes_results
+from blis.cache import toJSON
+
+
+# ========================================================================
+# Deterministic ID of a case of a sweep: its inputs (a row of the parameter table) and the name of its dataset
+# ========================================================================
+def getCaseId(row, dataName=None):
+    description = {'inputs': toJSON(row.to_dict()), 'data': toJSON(dataName)}
+    text = json.dumps(description, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+# Inputs as JSON values (numpy scalars as python scalars)
+def toPython(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+# ========================================================================
+# Durable store of the results of a sweep (SQLite database), each case is committed as soon as it finishes
+# Pass to blis.runSweep(store=...): cases already in the store are not simulated again, so an interrupted sweep
+# (e.g. a job that reached its time limit) is resumed by running it again with the same store
+# ========================================================================
+class ResultsStore:
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=timeout)
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS cases (caseId TEXT PRIMARY KEY, inputs TEXT NOT NULL, "
+                                    "results TEXT NOT NULL)")
+
+    # ----------
+    # Store the results (ordered as attributes_results) of a case
+    # ----------
+    def put(self, caseId, row, results):
+        inputs = json.dumps({str(name): toPython(value) for name, value in row.items()})
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO cases (caseId, inputs, results) VALUES (?, ?, ?)",
+                                    (caseId, inputs, json.dumps([float(value) for value in results])))
+        if debug:
+            print("Stored case " + caseId)
+
+    # ----------
+    # Results of the given cases, as a dict of lists (ordered as attributes_results)
+    # ----------
+    def get(self, caseIds):
+        results = {}
+        caseIds = list(caseIds)
+        for first in range(0, len(caseIds), 500):
+            chunk = caseIds[first:first + 500]
+            query = "SELECT caseId, results FROM cases WHERE caseId IN (" + ', '.join('?' * len(chunk)) + ")"
+            for caseId, values in self.connection.execute(query, chunk):
+                results[caseId] = json.loads(values)
+        return results
+
+    # ----------
+    # Every stored case (inputs and results), in the order they were stored (indexed by case ID, not in the order of
+    # the parameter table, which is kept by the table returned by blis.runSweep)
+    # ----------
+    def getResults(self):
+        inputs = []
+        results = []
+        caseIds = []
+        for caseId, row, values in self.connection.execute("SELECT caseId, inputs, results FROM cases ORDER BY rowid"):
+            caseIds.append(caseId)
+            inputs.append(json.loads(row))
+            results.append(json.loads(values))
+        inputs = pd.DataFrame(inputs, index=pd.Index(caseIds, name='caseId'))
+        results = pd.DataFrame(results, index=inputs.index, columns=attributes_results)
+        return pd.concat([inputs, results], axis=1)
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
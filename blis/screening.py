@@ -0,0 +1,114 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Hardcoded Inputs:
+debug = False  # If True, additional information is presented to the console
+
+# General Imports:
+import math
+import time
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+# BLIS Imports:
+from blis.hres import attributes_results, attributes_tod
+from blis.resample import resampleData
+
+# Results compared between resolutions (excludes time of day results)
+attributes_fidelity = [name for name in attributes_results if name not in attributes_tod]
+
+
+# =============================================================================#
+# Run a single design
+# build(data, design) returns an HRES (or child of HRES) for one design (row of designs)
+# =============================================================================#
+def runDesign(build, data, design, engine):
+    hres = build(data, design)
+    return hres.run(engine=engine)
+
+
+def runDesigns(build, data, designs, engine, n_jobs):
+    if n_jobs == 1:
+        results = [runDesign(build, data, designs.loc[index], engine) for index in designs.index]
+    else:
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(runDesign)(build, data, designs.loc[index], engine) for index in designs.index)
+    return pd.DataFrame(results, index=designs.index, columns=attributes_results)
+
+
+# =============================================================================#
+# Multi-fidelity screening of designs
+# Every design is simulated with data resampled to minutes (min), then the top designs by each of metrics
+# (lowest values, e.g. 'LCOE' or 'gridUsed_MWh') are simulated again with the full resolution data
+# top is a number of designs, or a fraction of the designs if below 1.0
+# Batteries with integration='exact' (see Storage) are recommended in build, to reduce the error of resampled data
+# Returns:
+#   results  - one row per design, full resolution results if refined, otherwise resampled results
+#              ('refined' column is True for designs simulated at full resolution)
+#   fidelity - error of the resampled results for the refined designs, relative to full resolution
+#              (absolute error where the full resolution result is 0.0)
+# =============================================================================#
+def screenDesigns(data, designs, build, minutes=15.0, top=0.1, metrics=('LCOE',), engine='jit', n_jobs=1):
+    if isinstance(metrics, str):
+        metrics = [metrics]
+    if top < 1.0:
+        top = int(math.ceil(top * len(designs)))
+    top = int(top)
+
+    # Screen all designs with resampled data
+    t0 = time.time()
+    coarse = runDesigns(build, resampleData(data, minutes), designs, engine, n_jobs)
+    t1 = time.time()
+
+    # Select top designs by each metric
+    refine = []
+    for metric in metrics:
+        for index in coarse.loc[:, metric].sort_values(kind='stable').index[:top]:
+            if index not in refine:
+                refine.append(index)
+    refine = pd.Index(refine)
+
+    # Refine with full resolution data
+    fine = runDesigns(build, data, designs.loc[refine], engine, n_jobs)
+    t2 = time.time()
+
+    # Combine results
+    results = coarse.copy()
+    results.loc[refine, :] = fine
+    results['refined'] = False
+    results.loc[refine, 'refined'] = True
+
+    # Fidelity error of the resampled results
+    approx = coarse.loc[refine, attributes_fidelity].astype(float)
+    exact = fine.loc[:, attributes_fidelity].astype(float)
+    error = approx - exact
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fidelity = error.where(exact == 0.0, error / exact.abs())
+
+    print("\nScreening: " + str(len(designs)) + " designs at " + str(minutes) + " min in " + str(
+        round(t1 - t0, 2)) + " s, " + str(len(refine)) + " refined at full resolution in " + str(
+        round(t2 - t1, 2)) + " s")
+    print("Fidelity error (max absolute, relative to full resolution):")
+    for metric in list(metrics) + [name for name in ['emissions_tons', 'gridUsed_MWh'] if name not in metrics]:
+        print("  " + metric + ": " + str(fidelity.loc[:, metric].abs().max()))
+
+    return results, fidelity
@@ -0,0 +1,306 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Hardcoded Inputs:
+debug = False  # If True, additional information is presented to the console
+tasksPerWorker = 4  # Cases are sent to workers in chunks, about this many chunks per worker
+sharedColumns = ['dt', 'hour', 'demand', 'solar']  # Columns of the datasets given to build by default
+alignment = 64  # (bytes) Alignment of each column in shared memory
+
+# General Imports:
+import os
+import tempfile
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+# BLIS Imports:
+from blis.hres import attributes_results
+from blis.load_data import loadData
+from blis.results_store import getCaseId
+
+# Datasets and case builder of this worker process (see initWorker)
+workerData = {}
+workerShared = None  # Mapping of the shared datasets, kept open while the worker runs
+workerBuild = None
+workerEngine = 'array'
+workerCache = None
+
+
+# =============================================================================#
+# Number of worker processes: NUM_PROCS, otherwise the CPUs of the Slurm allocation, otherwise the CPUs available
+# =============================================================================#
+def getNumProcs():
+    for name in ['NUM_PROCS', 'SLURM_CPUS_PER_TASK']:
+        value = os.getenv(name, '')
+        if value != '':
+            return int(value)
+
+    # e.g. '32', '32(x2)' or '16,8' (CPUs of each node)
+    value = os.getenv('SLURM_JOB_CPUS_PER_NODE', '')
+    if value != '':
+        return int(value.split(',')[0].split('(')[0])
+
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count()
+
+
+# =============================================================================#
+# Dataset (path of a csv file, loaded with blis.loadData, or a DataFrame) with the given columns
+# =============================================================================#
+def getDataset(source, columns):
+    if isinstance(source, str):
+        source = loadData(source)
+    missing = [column for column in columns if column not in source.columns]
+    if len(missing) > 0:
+        raise ValueError("Dataset is missing columns: " + ', '.join(missing))
+    data = source.loc[:, list(columns)]
+
+    # Inputs with the types used by the simulation (see HRES.getInputArrays), so shared columns are not copied
+    types = {'dt': np.float64, 'hour': np.int64, 'demand': np.float64, 'solar': np.float64}
+    return data.astype({column: dtype for column, dtype in types.items() if column in data.columns})
+
+
+# =============================================================================#
+# Datasets stored once for every worker process
+# Numeric columns are placed in a single block of multiprocessing.shared_memory (or a memory-mapped temporary file if
+# shared memory is not available) and workers attach read-only, zero-copy views. Other columns (e.g. DatetimeUTC
+# strings) are copied to each worker
+# =============================================================================#
+class SharedData:
+
+    def __init__(self, datasets):
+        # Layout of each dataset: index and (column, dtype, offset, length or copied values) of each column
+        self.layout = {}
+        size = 0
+        for name, data in datasets.items():
+            columns = []
+            for column in data.columns:
+                values = data[column].to_numpy()
+                if values.dtype.kind in 'biufcmM':
+                    columns.append((column, values.dtype.str, size, len(values)))
+                    size = size + -(-values.nbytes // alignment) * alignment
+                else:
+                    columns.append((column, None, None, values))
+            self.layout[name] = (data.index, columns)
+
+        # Allocate
+        self.shm = None
+        self.path = None
+        try:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+            buffer = self.shm.buf
+        except OSError:
+            handle, self.path = tempfile.mkstemp(prefix='blis_', suffix='.dat')
+            os.close(handle)
+            buffer = np.memmap(self.path, dtype=np.uint8, mode='w+', shape=(max(size, 1),))
+
+        # Copy columns
+        for name, data in datasets.items():
+            for column, dtype, offset, length in self.layout[name][1]:
+                if dtype is not None:
+                    np.frombuffer(buffer, dtype=dtype, count=length, offset=offset)[:] = data[column].to_numpy()
+        if self.path is not None:
+            buffer.flush()
+        del buffer
+
+        if debug:
+            print("Shared " + str(len(datasets)) + " datasets, " + str(size) + " bytes")
+
+    # ----------
+    # Description sent to the workers (see attach)
+    # ----------
+    def getDescriptor(self):
+        if self.shm is not None:
+            return self.shm.name, None, self.layout
+        return None, self.path, self.layout
+
+    # ----------
+    # Release the shared memory or remove the file, once the workers are finished
+    # ----------
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+        else:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+# =============================================================================#
+# Attach to shared datasets (SharedData.getDescriptor), returns the mapping (keep it open while the datasets are
+# used) and a dict of read-only DataFrames
+# =============================================================================#
+def attach(descriptor):
+    name, path, layout = descriptor
+    if name is not None:
+        # Workers share the resource tracker of the sweep, which unlinks the shared memory if it is not closed
+        shared = shared_memory.SharedMemory(name=name)
+        buffer = shared.buf
+    else:
+        shared = np.memmap(path, dtype=np.uint8, mode='r')
+        buffer = shared
+
+    datasets = {}
+    for key, (index, columns) in layout.items():
+        arrays = {}
+        for column, dtype, offset, length in columns:
+            if dtype is not None:
+                values = np.frombuffer(buffer, dtype=dtype, count=length, offset=offset)
+                values.flags.writeable = False
+                arrays[column] = values
+            else:
+                arrays[column] = length
+        datasets[key] = pd.DataFrame(arrays, index=index, copy=False)
+    return shared, datasets
+
+
+# =============================================================================#
+# Datasets and case builder of this process
+# =============================================================================#
+def setWorker(datasets, build, engine, cache):
+    global workerBuild, workerEngine, workerCache
+    workerData.clear()
+    workerData.update(datasets)
+    workerBuild = build
+    workerEngine = engine
+    workerCache = cache
+
+
+# =============================================================================#
+# Attach the shared datasets once per worker process
+# =============================================================================#
+def initWorker(descriptor, build, engine, cache):
+    global workerShared
+    workerShared, datasets = attach(descriptor)
+    setWorker(datasets, build, engine, cache)
+
+
+# =============================================================================#
+# Simulate one case with the datasets of this worker, returns the results as a list (ordered as attributes_results)
+# =============================================================================#
+def runCase(case):
+    name, row = case
+    hres = workerBuild(workerData[name], row)
+    results = hres.run(engine=workerEngine, cache=workerCache)
+    if debug:
+        print("Case " + str(row.name) + " (pid " + str(os.getpid()) + "): LCOE " + str(results['LCOE']))
+    return results.reindex(attributes_results).tolist()
+
+
+def runIndexedCase(task):
+    index, case = task
+    return index, runCase(case)
+
+
+# =============================================================================#
+# Run a sweep: build(data, row) returns the HRES of each row of params (a DataFrame, one row per case), which is
+# then run (engine and cache as in HRES.run)
+# data is a dataset (path of a csv file or a DataFrame), or a dict of datasets with the name of the dataset of each
+# case in the column 'dataFile' of params. Datasets are loaded once and only their columns (sharedColumns if None)
+# are given to build, shared by every worker (see SharedData), so memory does not grow with the number of workers.
+# The data of build is read-only: build must create a new DataFrame to modify it (e.g. data.assign(...))
+# build must be defined at the top level of a module (it is sent to the workers), procs is the number of worker
+# processes (see getNumProcs if None, 1 runs the cases in this process)
+# store (a blis.ResultsStore) keeps the results of each case as soon as it finishes, cases already in the store
+# (same inputs and dataset name, see getCaseId) are not simulated again
+# Returns params with the results of each case appended
+# =============================================================================#
+def runSweep(params, build, data, procs=None, engine='array', cache=None, columns=None, store=None):
+    if isinstance(data, dict):
+        if 'dataFile' not in params.columns:
+            raise ValueError("params requires a 'dataFile' column to select one of several datasets")
+        sources = data
+        names = params.loc[:, 'dataFile'].tolist()
+        missing = set(names) - set(sources)
+        if len(missing) > 0:
+            raise ValueError("Unknown dataFile: " + ', '.join(str(name) for name in sorted(missing, key=str)))
+    else:
+        sources = {None: data}
+        names = [None] * len(params)
+    if columns is None:
+        columns = sharedColumns
+    cases = [(name, row) for name, (index, row) in zip(names, params.iterrows())]
+    output = [None] * len(cases)
+
+    # Cases to simulate, each once (identical rows are the same case) and only if not stored
+    todo = list(range(len(cases)))
+    if store is not None:
+        caseIds = [getCaseId(row, name) for name, row in cases]
+        stored = store.get(caseIds)
+        first = {}
+        for i, caseId in enumerate(caseIds):
+            if caseId in stored:
+                output[i] = stored[caseId]
+            else:
+                first.setdefault(caseId, i)
+        todo = list(first.values())
+        if len(stored) > 0:
+            print("Sweep: " + str(len(cases) - len(todo)) + " of " + str(len(cases)) + " cases already completed")
+
+    def finish(i, results):
+        output[i] = results
+        if store is not None:
+            store.put(caseIds[i], cases[i][1], results)
+
+    if procs is None:
+        procs = getNumProcs()
+    procs = max(min(procs, len(todo)), 1)
+
+    if debug:
+        print("Sweep: " + str(len(todo)) + " cases, " + str(procs) + " processes")
+
+    # Simulate, loading each dataset once
+    if len(todo) > 0:
+        datasets = {name: getDataset(source, columns) for name, source in sources.items()}
+        if procs == 1:
+            setWorker(datasets, build, engine, cache)
+            try:
+                for i in todo:
+                    finish(i, runCase(cases[i]))
+            finally:
+                setWorker({}, None, 'array', None)
+        else:
+            shared = SharedData(datasets)
+            del datasets
+            try:
+                chunksize = max(len(todo) // (procs * tasksPerWorker), 1)
+                with multiprocessing.Pool(procs, initializer=initWorker,
+                                          initargs=(shared.getDescriptor(), build, engine, cache)) as pool:
+                    tasks = [(i, cases[i]) for i in todo]
+                    for i, results in pool.imap_unordered(runIndexedCase, tasks, chunksize=chunksize):
+                        finish(i, results)
+            finally:
+                shared.close()
+
+    # Repeated cases
+    if store is not None:
+        for i, caseId in enumerate(caseIds):
+            if output[i] is None:
+                output[i] = output[first[caseId]]
+
+    results = pd.DataFrame(output, index=params.index, columns=attributes_results)
+    return pd.concat([params, results], axis=1)
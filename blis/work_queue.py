@@ -0,0 +1,337 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Hardcoded Inputs:
+debug = False  # If True, additional information is presented to the console
+queueVersion = 1  # Increase when the contents of the queue files change
+pollInterval = 5.0  # (s) Wait between checks while other workers finish the last batches
+
+# General Imports:
+import os
+import time
+import uuid
+import pickle
+import shutil
+import socket
+import tempfile
+import threading
+import multiprocessing
+import pandas as pd
+
+# BLIS Imports:
+from blis.hres import attributes_results
+from blis import sweep
+
+
+# ========================================================================
+# Pickle obj to path, written to a temporary file and renamed so that readers never see a partial file
+# ========================================================================
+def writeFile(path, obj):
+    handle, tmpPath = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpPath, path)
+    except BaseException:
+        try:
+            os.remove(tmpPath)
+        except OSError:
+            pass
+        raise
+
+
+def readFile(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+# ========================================================================
+# Check if two manifests describe the same sweep (datasets are paths or DataFrames)
+# ========================================================================
+def isSameSweep(manifest, other):
+    if manifest['version'] != other['version'] or manifest['columns'] != other['columns']:
+        return False
+    if not manifest['params'].equals(other['params']) or set(manifest['data']) != set(other['data']):
+        return False
+    for name, source in manifest['data'].items():
+        if isinstance(source, pd.DataFrame) or isinstance(other['data'][name], pd.DataFrame):
+            if not (isinstance(source, pd.DataFrame) and source.equals(other['data'][name])):
+                return False
+        elif source != other['data'][name]:
+            return False
+    return True
+
+
+# ========================================================================
+# Queue of sweep cases on a shared filesystem, worked on by any number of processes on any number of nodes
+# The sweep is stored in directory/sweep: a manifest and the cases split into batch files in pending/. A worker claims
+# a batch by renaming it into running/ (with its worker ID appended, a rename succeeds for one worker only), writes its
+# results to done/ and removes it
+# While working, a worker touches its batch every heartbeat seconds. Batches not touched for timeout seconds belong
+# to dead workers (e.g. a node that failed or a job that reached its time limit) and are moved back to pending/
+# by the other workers, so timeout must exceed heartbeat and the clock differences between nodes
+# ========================================================================
+class WorkQueue:
+
+    def __init__(self, directory, heartbeat=30.0, timeout=300.0):
+        self.directory = directory
+        self.heartbeat = heartbeat  # (s)
+        self.timeout = timeout  # (s)
+        self.workerId = socket.gethostname() + '-' + str(os.getpid()) + '-' + uuid.uuid4().hex[:8]
+        self.current = None  # Path of the claimed batch
+        self.stopped = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+
+    def getPath(self, *names):
+        return os.path.join(self.directory, 'sweep', *names)
+
+    # ----------
+    # Write the manifest and batches of a sweep (params, data and columns as in blis.runSweep)
+    # The sweep is written to a temporary directory that is then renamed to directory/sweep, so it appears complete
+    # or not at all. A queue holds a single sweep: only the first rename succeeds, so the same submit can be repeated
+    # by every job (or a restarted job) that works on the queue, a submit of a different sweep raises ValueError
+    # Returns True if this call submitted the sweep
+    # ----------
+    def submit(self, params, data, batchSize=1, columns=None):
+        if batchSize < 1:
+            raise ValueError("batchSize must be at least 1")
+        if isinstance(data, dict):
+            if 'dataFile' not in params.columns:
+                raise ValueError("params requires a 'dataFile' column to select one of several datasets")
+            names = params.loc[:, 'dataFile'].tolist()
+            missing = set(names) - set(data)
+            if len(missing) > 0:
+                raise ValueError("Unknown dataFile: " + ', '.join(str(name) for name in sorted(missing, key=str)))
+        else:
+            data = {None: data}
+            names = [None] * len(params)
+        if columns is None:
+            columns = sweep.sharedColumns
+
+        manifest = {'version': queueVersion, 'params': params, 'data': data, 'columns': list(columns)}
+        if not os.path.exists(self.getPath('manifest.pkl')):
+            self.removeStaging()
+            staging = tempfile.mkdtemp(dir=self.directory, prefix='.submit-')
+            try:
+                # mkdtemp creates the directory for its owner only
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(staging, 0o777 & ~umask)
+                for name in ['pending', 'running', 'done']:
+                    os.mkdir(os.path.join(staging, name))
+                cases = [(i, name, row) for i, (name, (index, row)) in enumerate(zip(names, params.iterrows()))]
+                for number, first in enumerate(range(0, len(cases), batchSize)):
+                    writeFile(os.path.join(staging, 'pending', 'batch%06d' % number), cases[first:first + batchSize])
+                writeFile(os.path.join(staging, 'manifest.pkl'), manifest)
+                os.rename(staging, self.getPath())
+                return True
+            except OSError:
+                # Submitted by another job (the sweep directory exists and is not empty)
+                if not os.path.exists(self.getPath('manifest.pkl')):
+                    raise
+            finally:
+                shutil.rmtree(staging, ignore_errors=True)
+
+        if not isSameSweep(readFile(self.getPath('manifest.pkl')), manifest):
+            raise ValueError("Queue " + self.directory + " holds a different sweep")
+        return False
+
+    # ----------
+    # Remove temporary directories of submits that did not finish (e.g. a job that was killed)
+    # ----------
+    def removeStaging(self):
+        now = time.time()
+        for entry in os.listdir(self.directory):
+            path = os.path.join(self.directory, entry)
+            try:
+                if entry.startswith('.submit-') and now - os.stat(path).st_mtime > self.timeout:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+    # ----------
+    # Numbers of batches in pending/, running/ and done/
+    # ----------
+    def getStatus(self):
+        return {name: len([entry for entry in os.listdir(self.getPath(name)) if entry.startswith('batch')])
+                for name in ['pending', 'running', 'done']}
+
+    # ----------
+    # Move batches of dead workers back to pending/
+    # ----------
+    def requeueStale(self):
+        now = time.time()
+        for entry in os.listdir(self.getPath('running')):
+            if not entry.startswith('batch'):
+                continue
+            path = self.getPath('running', entry)
+            try:
+                if now - os.stat(path).st_mtime > self.timeout:
+                    os.rename(path, self.getPath('pending', entry.split('.')[0]))
+                    print("Requeued " + entry + " (no heartbeat for " + str(self.timeout) + " s)")
+            except OSError:
+                # Finished, or requeued by another worker
+                pass
+
+    # ----------
+    # Claim a pending batch, returns its cases or None if no batch is pending
+    # ----------
+    def claim(self):
+        for entry in sorted(os.listdir(self.getPath('pending'))):
+            if not entry.startswith('batch'):
+                continue
+            pending = self.getPath('pending', entry)
+            path = self.getPath('running', entry + '.' + self.workerId)
+            try:
+                # Touched first, a rename keeps the time of the last heartbeat of a requeued batch
+                os.utime(pending, None)
+                os.rename(pending, path)
+            except OSError:
+                # Claimed by another worker
+                continue
+
+            # Finished by a worker that was presumed dead
+            if os.path.exists(self.getPath('done', entry)):
+                self.remove(path)
+                continue
+
+            self.current = path
+            return readFile(path)
+        return None
+
+    # ----------
+    # Store the results of the claimed batch, or return it to pending/
+    # ----------
+    def complete(self, results):
+        entry = os.path.basename(self.current).split('.')[0]
+        writeFile(self.getPath('done', entry), results)
+        self.remove(self.current)
+        self.current = None
+
+    def release(self):
+        try:
+            os.rename(self.current, self.getPath('pending', os.path.basename(self.current).split('.')[0]))
+        except OSError:
+            pass
+        self.current = None
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            # Requeued after its heartbeat stopped
+            pass
+
+    def beat(self):
+        while not self.stopped.wait(self.heartbeat):
+            current = self.current
+            if current is not None:
+                try:
+                    os.utime(current, None)
+                except OSError:
+                    pass
+
+    # ----------
+    # Work on the queue until every batch is done (build, engine and cache as in blis.runSweep)
+    # Waits for the manifest if the sweep is not submitted yet
+    # ----------
+    def work(self, build, engine='array', cache=None):
+        while not os.path.exists(self.getPath('manifest.pkl')):
+            time.sleep(pollInterval)
+        manifest = readFile(self.getPath('manifest.pkl'))
+        if manifest['version'] != queueVersion:
+            raise ValueError("Queue " + self.directory + " was created by another version of BLIS")
+
+        # Each dataset is loaded once by this worker
+        datasets = {name: sweep.getDataset(source, manifest['columns']) for name, source in manifest['data'].items()}
+        sweep.setWorker(datasets, build, engine, cache)
+
+        self.stopped.clear()
+        heartbeat = threading.Thread(target=self.beat, daemon=True)
+        heartbeat.start()
+        completed = 0
+        try:
+            while True:
+                self.requeueStale()
+                cases = self.claim()
+                if cases is None:
+                    status = self.getStatus()
+                    if status['pending'] == 0 and status['running'] == 0:
+                        break
+                    # Other workers are finishing the last batches, wait in case one of them dies
+                    time.sleep(pollInterval)
+                    continue
+
+                try:
+                    results = [(i, sweep.runCase((name, row))) for i, name, row in cases]
+                except BaseException:
+                    self.release()
+                    raise
+                self.complete(results)
+                completed = completed + len(results)
+                if debug:
+                    print("Worker " + self.workerId + ": " + str(completed) + " cases completed")
+        finally:
+            self.stopped.set()
+            sweep.setWorker({}, None, 'array', None)
+        return completed
+
+    # ----------
+    # params with the results of each case appended (missing results are NaN until every batch is done)
+    # ----------
+    def getResults(self):
+        manifest = readFile(self.getPath('manifest.pkl'))
+        params = manifest['params']
+        results = pd.DataFrame(index=range(len(params)), columns=attributes_results, dtype=float)
+        for entry in os.listdir(self.getPath('done')):
+            if entry.startswith('batch'):
+                for i, values in readFile(self.getPath('done', entry)):
+                    results.iloc[i] = values
+        if results.isnull().all(axis=1).any():
+            print("Warning: " + str(int(results.isnull().all(axis=1).sum())) + " cases are not completed yet")
+        results.index = params.index
+        return pd.concat([params, results], axis=1)
+
+
+# ========================================================================
+# Work on a queue with procs processes on this node (see sweep.getNumProcs if None), e.g. from each job of a
+# multi-node sweep. Returns once every batch of the queue is done
+# ========================================================================
+def workQueue(directory, build, procs=None, engine='array', cache=None, heartbeat=30.0, timeout=300.0):
+    if procs is None:
+        procs = sweep.getNumProcs()
+    if procs <= 1:
+        WorkQueue(directory, heartbeat=heartbeat, timeout=timeout).work(build, engine=engine, cache=cache)
+        return
+
+    workers = [multiprocessing.Process(target=runWorker, args=(directory, build, engine, cache, heartbeat, timeout))
+               for _ in range(procs)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    failed = [worker.exitcode for worker in workers if worker.exitcode != 0]
+    if len(failed) > 0:
+        raise RuntimeError(str(len(failed)) + " of " + str(procs) + " queue workers failed")
+
+
+def runWorker(directory, build, engine, cache, heartbeat, timeout):
+    WorkQueue(directory, heartbeat=heartbeat, timeout=timeout).work(build, engine=engine, cache=cache)
@@ -20,28 +20,21 @@ OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 """
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
 import pandas as pd
-import time
 import numpy as np
-from joblib import Parallel, delayed, parallel_backend
-from blis import defaultInputs, PowerPlant, Solar, Fuel, Battery, HRES
-import os
+from blis import defaultInputs, PowerPlant, Solar, Fuel, Battery, HRES, runSweep
 
 
 # =====================
-# Function to enable parameter sweep
+# Function to create the HRES of each case of the parameter sweep
+# data is loaded once by each worker process, inputs is one row of the parameter table
 # =====================
-def parameter_sweep(batt_size):
-    # Record time to solve
-    t0 = time.time()
-
-    # Load_Data - Expected Columns (units): DatetimeUTC (UTC format), t (min), dt (min), demand (MW), solar (MW)
-    data = pd.read_csv('data063_Oct30th.csv')
-
+def buildCase(data, inputs):
     # Solar Plant - All inputs are optional (default values shown below)
     solar = Solar(plantType='PV', capacity=31.2, cost_install=2004., cost_OM_fix=22.02)
 
     # Battery Storage - All inputs are optional (default values shown below)
-    batt = Battery(capacity=batt_size, rateMax=batt_size, roundTripEff=90.0, cost_install=2067., cost_OM_fix=35.6)
+    batt = Battery(capacity=inputs.battSize_MWh, rateMax=inputs.battSize_MWh, roundTripEff=90.0, cost_install=2067.,
+                   cost_OM_fix=35.6)
 
     # Fuel - All inputs are optional (default values shown below)
     fuel = Fuel(fuelType='NATGAS', cost=23.27, emissions=0.18)
@@ -55,17 +48,7 @@ def parameter_sweep(batt_size):
 
     # Create HRES (controller is built-in)
     # data and plant are only required inputs, all other components will revert to default if not specified
-    hres = HRES(data, plant, solar=solar, batt=batt, fuel=fuel, i=0.02, n=20)
-
-    # Run Simulation
-    results = hres.run()
-
-    # Display Elapsed Time
-    t1 = time.time()
-    print("Time Elapsed: " + str(round(t1 - t0, 2)) + " s")
-
-    # Extract LCOE
-    return results
+    return HRES(data, plant, solar=solar, batt=batt, fuel=fuel, i=0.02, n=20)
 
 
 # =====================
@@ -75,19 +58,13 @@ if __name__ == '__main__':
     # Parameter to vary
     param_array = np.linspace(0., 100., num=101)
     param_name = 'battSize_MWh'
+    df_in = pd.DataFrame({param_name: param_array})
 
-    # Number of cores to use
-    ncpus = -1  # int(os.getenv('NUM_PROCS'))
-
-    # Run Simulations
-    with parallel_backend('multiprocessing', n_jobs=ncpus):
-        output = Parallel(n_jobs=ncpus, verbose=5)(delayed(parameter_sweep)(param) for param in param_array)
+    # Load_Data - Expected Columns (units): DatetimeUTC (UTC format), t (min), dt (min), demand (MW), solar (MW)
+    dataFile = 'data063_Oct30th.csv'
 
-        # Move input and output into a dataframe
-    df_in = pd.DataFrame(param_array)
-    df_in.columns = [param_name]
-    df_out = pd.DataFrame(output)
-    df = pd.concat([df_in, df_out], axis=1)
+    # Run Simulations (number of cores from NUM_PROCS or Slurm, otherwise all available)
+    df = runSweep(df_in, buildCase, dataFile)
 
     # Save results
     df.to_csv('parameter_sweep_results.csv')
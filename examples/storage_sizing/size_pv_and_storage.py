@@ -20,25 +20,17 @@ OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 """
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
 import pandas as pd
-import time
 import numpy as np
-from joblib import Parallel, delayed, parallel_backend
-from blis import Solar, Grid, Battery, SBGS, monteCarloInputs
-import os
+from blis import Solar, Grid, Battery, SBGS, monteCarloInputs, runSweep
 
 
 # =====================
-# Function to enable parameter sweep
+# Function to create the SBGS of each case
+# data is loaded once by each worker process (and shared by its cases), inputs is one row of the Monte Carlo inputs
 # =====================
-def parameterSweep(inputs):
-    # Record time to solve
-    t0 = time.time()
-
-    # Load_Data - Expected Columns (units): DatetimeUTC (UTC format), t (min), dt (min), demand (MW), solar (MW)
-    data = pd.read_csv('data063.csv')
-
-    # Scale data to match provided pvSize
-    data.solar = data.solar * inputs.pvSize / 32.3
+def buildCase(data, inputs):
+    # Scale data to match provided pvSize (a new DataFrame, data is not modified)
+    data = data.assign(solar=data.solar * inputs.pvSize / 32.3)
 
     # Solar Plant - All inputs are optional (default values shown below)
     solar = Solar(plantType='PV', capacity=inputs.pvSize, cost_install=2004., cost_OM_fix=22.02)
@@ -53,19 +45,7 @@ def parameterSweep(inputs):
                 emissionCurve_pct=np.linspace(100, 100, 24), cost_OM_var=100.0)
 
     # Create SBGS (controller is built-in), data is only required inputs, all other components will revert to default if not specified
-    hres = SBGS(data, solar=solar, batt=batt, grid=grid, i=0.02, n=20)
-
-    # Run Simulation
-    results = hres.run()
-
-    # Display Elapsed Time
-    t1 = time.time()
-    print
-    "Time Elapsed: " + str(round(t1 - t0, 2)) + " s"
-
-    # Combine inputs and results into output and then return
-    output = pd.concat([inputs, results], axis=0)
-    return output
+    return SBGS(data, solar=solar, batt=batt, grid=grid, i=0.02, n=20)
 
 
 # =====================
@@ -78,6 +58,9 @@ if __name__ == '__main__':
     # ==============
     studyName = "results_sizing"
 
+    # Load_Data - Expected Columns (units): DatetimeUTC (UTC format), t (min), dt (min), demand (MW), solar (MW)
+    dataFile = 'data063.csv'
+
     # Monte Carlo Case Inputs (uses excel, each sheet is a separate study)
     xls_filename = "inputs_sizing.xlsx"
     # sheetnames = ["CAES", "BATT", "UTES", "Flywheel"]
@@ -87,8 +70,8 @@ if __name__ == '__main__':
     iterations = 500  # To test
     # iterations = 100 # Used in article
 
-    # Number of cores to use
-    num_cores = multiprocessing.cpu_count() - 1  # Consider saving one for other processes
+    # Number of cores to use (None: from NUM_PROCS or Slurm, otherwise all available)
+    num_cores = None
 
     # ==============
     # Run Simulations
@@ -102,18 +85,15 @@ if __name__ == '__main__':
         inputs = monteCarloInputs(xls_filename, sheetname, iterations)
 
         # Perform Simulations (Run all plant variations in parallel)
-        with parallel_backend('multiprocessing', n_jobs=num_cores):
-            output = Parallel(verbose=10)(
-                delayed(parameterSweep)(inputs.loc[index]) for index in range(iterations))
+        output = runSweep(inputs, buildCase, dataFile, procs=num_cores)
 
-            # Add output to all_outputs
-        all_outputs = all_outputs + output
-        # Move output to dataframe and save (if iterations greater than 10)
+        # Add output to all_outputs
+        all_outputs.append(output)
+        # Save output (if iterations greater than 10)
         if iterations > 10:
-            df = pd.DataFrame(output)
-            df.to_csv(studyName + '_pt' + str(count) + '.csv')
+            output.to_csv(studyName + '_pt' + str(count) + '.csv')
             count = count + 1
 
     # Combine outputs into single dataframe and save
-    df = pd.DataFrame(all_outputs)
+    df = pd.concat(all_outputs, ignore_index=True)
     df.to_csv(studyName + '.csv')
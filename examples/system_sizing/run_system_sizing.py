@@ -20,29 +20,39 @@ OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 """
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
 import pandas as pd
-import time
 import numpy as np
-from joblib import Parallel, delayed, parallel_backend
-from blis import Solar, Fuel, Battery, PowerPlant, defaultInputs, HRES
-import os
+from blis import Solar, Fuel, Battery, PowerPlant, defaultInputs, HRES, runSweep, ResultsStore
 
 
 # =====================
-# Function to enable parameter sweep
+# HRES that saves its time series once run (used for the first design of each sheet)
 # =====================
-def parameterSweep(dataFile, inputs, inputs2, index):
-    # Record time to solve
-    t0 = time.time()
+class SavedHRES(HRES):
 
-    # Load_Data - Expected Columns (units): DatetimeUTC (UTC format), t (min), dt (min), demand (MW), solar (MW)
-    data = pd.read_csv(dataFile)
-    data.loc[:, 'solar'] = data.loc[:, 'solar'] * inputs2.solarCapacity / 32.3
+    def __init__(self, *args, casename='Results', **kwargs):
+        HRES.__init__(self, *args, **kwargs)
+        self.casename = casename
+
+    def run(self, *args, **kwargs):
+        results = HRES.run(self, *args, **kwargs)
+        self.save(casename=self.casename)
+        return results
+
+
+# =====================
+# Function to create the HRES of each case
+# data is loaded once by each worker process (and shared by its cases), inputs is one row of the parameter table
+# (plant design inputs, plantSize, solarCapacity and battSize)
+# =====================
+def buildCase(data, inputs):
+    # Scale data to match solarCapacity (a new DataFrame, data is not modified)
+    data = data.assign(solar=data.loc[:, 'solar'] * inputs.solarCapacity / 32.3)
 
     # Solar Plant - All inputs are optional (default values shown below)
-    solar = Solar(plantType='PV', capacity=inputs2.solarCapacity, cost_install=2004., cost_OM_fix=22.02)
+    solar = Solar(plantType='PV', capacity=inputs.solarCapacity, cost_install=2004., cost_OM_fix=22.02)
 
     # Battery Storage - All inputs are optional (default values shown below)
-    batt = Battery(capacity=inputs2.battSize, rateMax=inputs2.battSize, roundTripEff=90.0, cost_install=2067.,
+    batt = Battery(capacity=inputs.battSize, rateMax=inputs.battSize, roundTripEff=90.0, cost_install=2067.,
                    cost_OM_fix=35.6, initCharge=100.0)
 
     # Fuel - All inputs are optional (default values shown below)
@@ -62,30 +72,18 @@ def parameterSweep(dataFile, inputs, inputs2, index):
     plant_inputs.cost_OM_fix = inputs.cost_OM_fix
     plant_inputs.cost_OM_var = inputs.cost_OM_var
     plant_inputs.co2CaptureEff = inputs.co2CaptureEff
-    plant_inputs.capacity = inputs2.plantSize  # MW
+    plant_inputs.capacity = inputs.plantSize  # MW
 
     # 2 - create power plant
     plant = PowerPlant(plant_inputs)
 
     # Create HRES (controller is built-in), data and plant are only required inputs
     # all other components will revert to default if not specified
-    hres = HRES(data, plant, solar=solar, batt=batt, fuel=fuel, i=0.02, n=20)
-
-    # Run Simulation
-    results = hres.run()
-
-    # Display Elapsed Time
-    t1 = time.time()
-    print("Time Elapsed: " + str(round(t1 - t0, 2)) + " s")
-
-    # Save simulation results
-    if index == 0:
-        casename = inputs.sheetname + '_PV' + str(inputs2.solarCapacity) + '_Batt' + str(inputs2.battSize)
-        hres.save(casename=casename)
-
-    # Combine inputs and results into output and then return
-    output = pd.concat([inputs, inputs2, results], axis=0)
-    return output
+    # Save simulation results of the first design
+    if inputs.name == 0:
+        casename = inputs.sheetname + '_PV' + str(inputs.solarCapacity) + '_Batt' + str(inputs.battSize)
+        return SavedHRES(data, plant, solar=solar, batt=batt, fuel=fuel, i=0.02, n=20, casename=casename)
+    return HRES(data, plant, solar=solar, batt=batt, fuel=fuel, i=0.02, n=20)
 
 
 # =============================================================================#
@@ -133,28 +131,22 @@ if __name__ == '__main__':
     xls_filename = "inputs_system_sizing.xlsx"
     sheetnames = ["sCO2", "OCGT", "CCGT", "sCO2_CCS", "CCGT_CCS"]
 
-    # Number of cores to use
-    ncpus = -1  # int(os.getenv('NUM_PROCS'))
+    # Number of cores to use (None: from NUM_PROCS or Slurm, otherwise all available)
+    ncpus = None
 
     # ==============
     # Run Simulations
     # ==============
+    # Results of each case are stored as soon as it finishes, a restarted study skips the stored cases
+    store = ResultsStore(studyName + '.sqlite')
     all_outputs = []
 
     # ------
     # Design Sweep Inputs
     # ------
-    count = 0
     cols = ['plantSize', 'solarCapacity', 'battSize']
-    inputs2 = pd.DataFrame(columns=cols)
-    # Iterate data files and corresponding solar capacity
-    for plantSize in plantSizes:
-        for solarCapacity in solarCapacities:
-            for battSize in battSizes:
-                s = pd.Series([plantSize, solarCapacity, battSize], index=cols)
-                s.name = count
-                count = count + 1
-                inputs2 = inputs2.append(s)
+    inputs2 = pd.DataFrame([[plantSize, solarCapacity, battSize] for plantSize in plantSizes
+                            for solarCapacity in solarCapacities for battSize in battSizes], columns=cols)
     n_cases = inputs2.shape[0]
 
     # ------
@@ -164,18 +156,9 @@ if __name__ == '__main__':
         inputs = designInputs(xls_filename, sheetname)
 
         # Perform Simulations (Run all plant variations in parallel)
-        with parallel_backend('multiprocessing', n_jobs=ncpus):
-            output = Parallel(n_jobs=ncpus, verbose=5)(
-                delayed(parameterSweep)(dataFile, inputs, inputs2.loc[index], index) for index in range(n_cases))
-
-        # Add output to all_outputs
-        all_outputs = all_outputs + output
-
-        # Back-up results for current plantType
-        df = pd.DataFrame(all_outputs)
-        df.to_csv(studyName + '_pt' + str(count) + '.csv')
-        count = count + 1
+        params = pd.concat([pd.DataFrame([inputs] * n_cases, index=inputs2.index), inputs2], axis=1)
+        all_outputs.append(runSweep(params, buildCase, dataFile, procs=ncpus, store=store))
 
-    # Combine outputs into single dataframe and save
-    df = pd.DataFrame(all_outputs)
+    # Combine outputs into single dataframe (in the order of the cases) and save
+    df = pd.concat(all_outputs, ignore_index=True)
     df.to_csv(studyName + '.csv')
@@ -20,28 +20,21 @@ OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 """
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
 import pandas as pd
-import time
-from joblib import Parallel, delayed, parallel_backend
-from blis import Solar, Fuel, Battery, PowerPlant, defaultInputs, HRES, monteCarloInputs
-import os
+from blis import Solar, Fuel, Battery, PowerPlant, defaultInputs, HRES, monteCarloInputs, runSweep, ResultsStore
 
 
 # =====================
-# Function to enable parameter sweep
+# Function to create the HRES of each case
+# data is loaded once by each worker process, inputs is one row of the parameter table (Monte Carlo inputs,
+# solarCapacity_MW, battSize_MW and dataFile)
 # =====================
-def parameterSweep(dataFile, solarCapacity, battSize, inputs, index):
-    # Record time to solve
-    t0 = time.time()
-
-    # Load_Data - Expected Columns (units): DatetimeUTC (UTC format), t (min), dt (min), demand (MW), solar (MW)
-    data = pd.read_csv(dataFile)
-
+def buildCase(data, inputs):
     # Solar Plant - All inputs are optional (default values shown below)
-    solar = Solar(plantType='PV', capacity=solarCapacity, cost_install=2004., cost_OM_fix=22.02)
+    solar = Solar(plantType='PV', capacity=inputs.solarCapacity_MW, cost_install=2004., cost_OM_fix=22.02)
 
     # Battery Storage - All inputs are optional (default values shown below)
-    batt = Battery(capacity=battSize, rateMax=battSize, roundTripEff=85.0, cost_install=2067., cost_OM_fix=35.6,
-                   initCharge=100.0)
+    batt = Battery(capacity=inputs.battSize_MW, rateMax=inputs.battSize_MW, roundTripEff=85.0, cost_install=2067.,
+                   cost_OM_fix=35.6, initCharge=100.0)
 
     # Fuel - All inputs are optional (default values shown below)
     fuel = Fuel(fuelType='NATGAS', cost=10.58, emissions=0.18)
@@ -67,20 +60,7 @@ def parameterSweep(dataFile, solarCapacity, battSize, inputs, index):
 
     # Create HRES (controller is built-in), data and plant are only required inputs
     # all other components will revert to default if not specified
-    hres = HRES(data, plant, solar=solar, batt=batt, fuel=fuel, i=0.02, n=20)
-
-    # Run Simulation
-    results = hres.run()
-
-    # Display Elapsed Time
-    t1 = time.time()
-    print("Time Elapsed: " + str(round(t1 - t0, 2)) + " s")
-
-    # Combine inputs and results into output and then return
-    s_solarCapacity = pd.Series([solarCapacity], index=['solarCapacity_MW'])
-    s_battSize = pd.Series([battSize], index=['battSize_MW'])
-    output = pd.concat([inputs, s_solarCapacity, s_battSize, results], axis=0)
-    return output
+    return HRES(data, plant, solar=solar, batt=batt, fuel=fuel, i=0.02, n=20)
 
 
 # =====================
@@ -110,20 +90,22 @@ if __name__ == '__main__':
     # Specify number of iterations per case
     # iterations = 10 # To test
     iterations = 100  # Used in article
+    seed = 0  # Random draws of each sheet are seeded, so that a restarted study draws the same cases
 
-    # Number of cores to use
-    ncpus = -1  # int(os.getenv('NUM_PROCS'))
+    # Number of cores to use (None: from NUM_PROCS or Slurm, otherwise all available)
+    ncpus = None
 
     # ==============
     # Run Simulations
     # ==============
+    # Results of each case are stored as soon as it finishes, a restarted study skips the stored cases
+    store = ResultsStore(studyName + '.sqlite')
     all_outputs = []
-    count = 0
 
     # Iterate each Monte Carlo case
-    for sheetname in sheetnames:
+    for i, sheetname in enumerate(sheetnames):
 
-        inputs = monteCarloInputs(xls_filename, sheetname, iterations)
+        inputs = monteCarloInputs(xls_filename, sheetname, iterations, seed=seed + i)
 
         # Iterate data files and corresponding solar capacity
         for (dataFile, solarCapacity) in zip(dataFiles, solarCapacities):
@@ -132,19 +114,9 @@ if __name__ == '__main__':
             for battSize in battSizes:
 
                 # Perform Simulations (Run all plant variations in parallel)
-                with parallel_backend('multiprocessing', n_jobs=ncpus):
-                    output = Parallel(n_jobs=ncpus, verbose=5)(
-                        delayed(parameterSweep)(dataFile, solarCapacity, battSize, inputs.loc[index], index) for index
-                        in range(iterations))
-
-                # Add output to all_outputs
-                all_outputs = all_outputs + output
-                # Move output to dataframe and save (if iterations greater than 10)
-                if iterations > 10:
-                    df = pd.DataFrame(output)
-                    df.to_csv(studyName + '_pt' + str(count) + '.csv')
-                    count = count + 1
-
-    # Combine outputs into single dataframe and save
-    df = pd.DataFrame(all_outputs)
+                params = inputs.assign(solarCapacity_MW=solarCapacity, battSize_MW=battSize, dataFile=dataFile)
+                all_outputs.append(runSweep(params, buildCase, dataFile, procs=ncpus, store=store))
+
+    # Combine outputs into single dataframe (in the order of the cases) and save
+    df = pd.concat(all_outputs, ignore_index=True)
     df.to_csv(studyName + '.csv')
@@ -0,0 +1,204 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Checks that the engines and alternative simulation modes give the same perf and results as the original
+# implementation (HRES.run(engine='pandas'))
+# Run from the main directory with: python -m pytest tests
+
+# General Imports:
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+# BLIS Imports:
+from blis import defaultInputs, PowerPlant, Fleet, Solar, Fuel, Battery, HRES, HRESBatch, ResultsCache, \
+    runDailyReset, runParallelTime
+from blis import kernels
+
+dataFile = os.path.join(os.path.dirname(__file__), '..', 'examples', 'hres', 'data063_Oct30th.csv')
+
+
+# ========================================================================
+# Single day case of examples/hres/run_single_case.py
+# ========================================================================
+@pytest.fixture(scope='module')
+def data():
+    return pd.read_csv(dataFile)
+
+
+def createHRES(data, storePerf=True):
+    solar = Solar(plantType='PV', capacity=32.3, cost_install=2004., cost_OM_fix=22.02)
+    batt = Battery(capacity=30.0, rateMax=30.0, roundTripEff=90.0, cost_install=2067., cost_OM_fix=35.6)
+    fuel = Fuel(fuelType='NATGAS', cost=23.27, emissions=0.18)
+    plant = PowerPlant(defaultInputs(plantType='CCGT'))
+    return HRES(data, plant, solar=solar, batt=batt, fuel=fuel, i=0.02, n=20, storePerf=storePerf)
+
+
+@pytest.fixture(scope='module')
+def reference(data):
+    hres = createHRES(data)
+    results = hres.run(engine='pandas')
+    return hres.perf.copy(), results.copy()
+
+
+def assertResults(results, expected, rtol=1.0e-12):
+    results = results.reindex(expected.index).values.astype(float)
+    assert np.allclose(results, expected.values.astype(float), rtol=rtol, atol=1.0e-9, equal_nan=True)
+
+
+# ========================================================================
+# Engines
+# ========================================================================
+@pytest.mark.parametrize('engine', ['array', 'jit'])
+def test_engine(data, reference, engine):
+    hres = createHRES(data)
+    results = hres.run(engine=engine)
+    assert np.array_equal(hres.perf.values, reference[0].values)
+    assertResults(results, reference[1])
+
+
+# Results of the case with the original implementation (before the engines were added), totals of a stored time
+# series are reduced in the same order so these are identical, not just close
+baseline = {'demand_MWh': 731.1202499999999,
+            'powerOutput_MWh': 618.609858472071,
+            'heatInput_MWh': 1319.921208508949,
+            'fuelCost_dollars': 30714.56652200324,
+            'LCOE': 0.09763097661082203,
+            'emissions_tons': 237.58581753161076,
+            'deficit_pct_time': 0.0,
+            'emissions_hr01': 9.896110538902702,
+            'emissions_hr13': 8.047568841243883,
+            'costs_hr07': 1435.7978393760836,
+            'demand_hr18': 31.873066666666666}
+
+
+@pytest.mark.parametrize('engine', ['array', 'jit', 'pandas'])
+def test_baseline(data, engine):
+    results = createHRES(data).run(engine=engine)
+    for name, value in baseline.items():
+        assert results[name] == value, name
+
+
+# perf of a run is kept when the HRES is reconfigured and run again
+@pytest.mark.parametrize('engine', ['array', 'jit', 'pandas'])
+def test_perf_kept(data, reference, engine):
+    hres = createHRES(data)
+    hres.run(engine=engine)
+    perf = hres.perf
+    hres.reconfigure(batt_capacity=0.0, batt_rateMax=0.0)
+    hres.run(engine=engine)
+    assert np.array_equal(perf.values, reference[0].values)
+    assert not np.array_equal(hres.perf.values, reference[0].values)
+
+
+@pytest.mark.parametrize('engine', ['array', 'jit', 'pandas'])
+def test_totals_only(data, reference, engine):
+    hres = createHRES(data, storePerf=False)
+    results = hres.run(engine=engine)
+    assert hres.perf is None
+    assertResults(results, reference[1])
+
+
+# A battery that cannot discharge (rateMax=0) keeps its charge
+@pytest.mark.parametrize('engine', ['array', 'jit', 'pandas'])
+def test_exact_no_discharge(data, engine):
+    batt = Battery(capacity=10, rateMax=0, initCharge=0.5, integration='exact')
+    hres = HRES(data, PowerPlant(defaultInputs('CCGT')), solar=Solar(), batt=batt, fuel=Fuel())
+    results = hres.run(engine=engine)
+    assert (hres.perf.battDischargeRate == 0.0).all()
+    assert (hres.perf.battCharge == 0.5 * 10 * 60.0).all()
+    assert np.isfinite(results.LCOE)
+
+
+def test_cache(data, reference, tmp_path):
+    cache = ResultsCache(str(tmp_path))
+    createHRES(data).run(cache=cache)
+    hres = createHRES(data)
+    results = hres.run(cache=cache)
+    assert hres.perf is None  # The time series is not cached
+    assertResults(results, reference[1])
+
+
+def test_cache_key_fleet_state(data, tmp_path):
+    # The initial state of each unit (restored by reset) is part of the key
+    cache = ResultsCache(str(tmp_path))
+    hres = [createHRES(data) for _ in range(2)]
+    for h in hres:
+        h.plant = Fleet([PowerPlant(defaultInputs(plantType='CCGT')) for _ in range(2)])
+    assert cache.getKey(hres[0]) == cache.getKey(hres[1])
+    hres[1].plant.initState['powerOutput'][1] = 30.0
+    assert cache.getKey(hres[0]) != cache.getKey(hres[1])
+
+
+# ========================================================================
+# Alternative simulation modes
+# ========================================================================
+def test_batch(data):
+    params = pd.DataFrame({'batt_capacity': [0.0, 10.0, 30.0], 'batt_rateMax': [0.0, 10.0, 30.0],
+                           'plant_rampRate': [64.94, 1.0, 5.0], 'solar_scale': [1.0, 2.0, 0.5]})
+    batch = HRESBatch(data, params, PowerPlant(defaultInputs('CCGT')), solar=Solar(), batt=Battery(), fuel=Fuel())
+    results = batch.run()
+    for index in params.index:
+        assertResults(results.loc[index], batch.getHRES(index).run(engine='pandas'), rtol=1.0e-9)
+
+
+@pytest.mark.parametrize('storePerf', [True, False])
+def test_daily_reset(data, reference, storePerf):
+    # A single day, so resetting every day is the same as a run
+    hres = createHRES(data, storePerf=storePerf)
+    results = runDailyReset(hres)
+    if storePerf:
+        assert np.allclose(hres.perf.values, reference[0].values, rtol=1.0e-12, atol=1.0e-9)
+    assertResults(results, reference[1], rtol=1.0e-9)
+
+
+@pytest.mark.skipif(not kernels.jit_available, reason='requires numba')
+def test_parallel_time(data, reference):
+    hres = createHRES(data)
+    results = runParallelTime(hres, segments=4, threads=2)
+    assert np.allclose(hres.perf.values, reference[0].values, rtol=1.0e-9, atol=1.0e-9)
+    assertResults(results, reference[1], rtol=1.0e-9)
+
+
+# ========================================================================
+# Fleet of several units (units are committed by the dispatch, see Fleet)
+# ========================================================================
+@pytest.mark.parametrize('units', [1, 2, 3])
+def test_fleet_energy_balance(data, reference, units):
+    # Units of the full capacity: extra units are stopped, so energy is the same as with a single plant
+    hres = createHRES(data)
+    hres.plant = Fleet([PowerPlant(defaultInputs(plantType='CCGT')) for _ in range(units)])
+    hres.run()
+    for name in ['PowerOutput', 'solarUsed', 'loadShed', 'gridUsed', 'deficit']:
+        assert np.allclose(hres.perf.loc[:, name].values, reference[0].loc[:, name].values, rtol=1.0e-9,
+                           atol=1.0e-9)
+
+
+def test_fleet_split_capacity(data):
+    # Units sharing the capacity of the plant meet the demand (energy balance without a deficit or shed load)
+    hres = createHRES(data)
+    inputs = defaultInputs(plantType='CCGT')
+    inputs.capacity = inputs.capacity / 3.0
+    hres.plant = Fleet([PowerPlant(inputs) for _ in range(3)])
+    hres.run()
+    assert (hres.perf.loc[:, 'loadShed'] < 1.0e-2).all()
+    assert (hres.perf.loc[:, 'deficit'].abs() < 1.0e-2).all()
@@ -0,0 +1,207 @@
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+"""
+BLIS - Balancing Load of Intermittent Solar:
+A characteristic-based transient power plant model
+
+Copyright (C) 2020. University of Virginia Licensing & Ventures Group (UVA LVG). All Rights Reserved.
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or substantial portions of the
+Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# Checks runSweep (worker processes, datasets and ResultsStore), WorkQueue and the binary files of loadData
+# Run from the main directory with: python -m pytest tests
+
+# General Imports:
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+# BLIS Imports:
+from blis import defaultInputs, PowerPlant, Solar, Fuel, Battery, HRES, runSweep, ResultsStore, loadData, \
+    WorkQueue, workQueue
+from blis import work_queue
+from blis.hres import attributes_results
+from blis.sweep import getDataset, SharedData, attach
+
+dataFile = os.path.join(os.path.dirname(__file__), '..', 'examples', 'hres', 'data063_Oct30th.csv')
+
+# Number of times buildCase was called in this process
+built = []
+
+
+# ========================================================================
+# Cases of a small sweep (the first hours of the sample day)
+# ========================================================================
+@pytest.fixture(scope='module')
+def data():
+    return pd.read_csv(dataFile).iloc[:240]
+
+
+@pytest.fixture(scope='module')
+def params():
+    return pd.DataFrame({'solarCapacity': [20.0, 40.0, 20.0, 60.0], 'battSize': [0.0, 10.0, 30.0, 30.0]})
+
+
+def buildCase(data, row):
+    built.append(row.name)
+    solar = Solar(capacity=row.solarCapacity)
+    batt = Battery(capacity=row.battSize, rateMax=row.battSize)
+    return HRES(data, PowerPlant(defaultInputs(plantType='CCGT')), solar=solar, batt=batt, fuel=Fuel(),
+                storePerf=False)
+
+
+def failCase(data, row):
+    raise RuntimeError("case " + str(row.name) + " should not be simulated")
+
+
+def assertSweep(output, params, data):
+    assert output.index.equals(params.index)
+    for index, row in params.iterrows():
+        expected = buildCase(data[row.get('dataFile')] if isinstance(data, dict) else data, row).run()
+        assert np.allclose(output.loc[index, attributes_results].values.astype(float), expected.values,
+                           rtol=1.0e-12, atol=1.0e-9, equal_nan=True)
+
+
+# ========================================================================
+# runSweep
+# ========================================================================
+@pytest.mark.parametrize('procs', [1, 2])
+def test_sweep(data, params, procs):
+    output = runSweep(params, buildCase, data, procs=procs)
+    assert output.loc[:, params.columns].equals(params)
+    assertSweep(output, params, data)
+
+
+def test_sweep_datasets(data, params):
+    datasets = {'day': data, 'high': data.assign(demand=data.loc[:, 'demand'] * 1.2)}
+    params = params.assign(dataFile=['day', 'high', 'high', 'day'])
+    output = runSweep(params, buildCase, datasets, procs=2)
+    assertSweep(output, params, datasets)
+
+    # Unknown dataset names and several datasets without a dataFile column
+    with pytest.raises(ValueError):
+        runSweep(params.assign(dataFile=['day', 'low', 'high', 'day']), buildCase, datasets, procs=1)
+    with pytest.raises(ValueError):
+        runSweep(params.drop(columns='dataFile'), buildCase, datasets, procs=1)
+
+
+def test_shared_inputs(data):
+    # The input arrays of an HRES built from a shared dataset are views of the shared memory
+    shared = SharedData({'day': getDataset(data, ['dt', 'hour', 'demand', 'solar'])})
+    try:
+        mapping, datasets = attach(shared.getDescriptor())
+        hres = HRES(datasets['day'], PowerPlant(defaultInputs(plantType='CCGT')), storePerf=False)
+        for values, column in zip(hres.getInputArrays(), ['dt', 'hour', 'demand', 'solar']):
+            assert np.shares_memory(values, datasets['day'].loc[:, column].to_numpy())
+        del hres, datasets, values
+        mapping.close()
+    finally:
+        shared.close()
+
+
+# ========================================================================
+# ResultsStore
+# ========================================================================
+def test_store_resume(data, params, tmp_path):
+    store = ResultsStore(str(tmp_path / 'sweep.sqlite'))
+    first = runSweep(params.iloc[:2], buildCase, data, procs=1, store=store)
+    assert len(store) == 2
+
+    # Stored cases are not simulated again, the others are added to the store
+    del built[:]
+    output = runSweep(params, buildCase, data, procs=1, store=store)
+    assert sorted(built) == [2, 3]
+    assert len(store) == 4
+    assert output.iloc[:2].equals(first)
+    assertSweep(output, params, data)
+
+    # Every case is stored (also after reopening the store)
+    store.close()
+    store = ResultsStore(str(tmp_path / 'sweep.sqlite'))
+    assert runSweep(params, failCase, data, procs=1, store=store).equals(output)
+    store.close()
+
+
+def test_store_dedup(data, params, tmp_path):
+    # Identical rows are the same case, simulated once
+    store = ResultsStore(str(tmp_path / 'sweep.sqlite'))
+    repeated = pd.concat([params, params.iloc[[1, 1]]], ignore_index=True)
+    del built[:]
+    output = runSweep(repeated, buildCase, data, procs=1, store=store)
+    assert sorted(built) == [0, 1, 2, 3]
+    assert len(store) == 4
+    assertSweep(output, repeated, data)
+    store.close()
+
+
+# ========================================================================
+# WorkQueue
+# ========================================================================
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(work_queue, 'pollInterval', 0.05)
+    return str(tmp_path / 'queue')
+
+
+def test_queue(data, params, queue):
+    assert WorkQueue(queue).submit(params, data, batchSize=3)
+    workQueue(queue, buildCase, procs=2, heartbeat=0.1, timeout=5.0)
+    output = WorkQueue(queue).getResults()
+    assert output.equals(runSweep(params, buildCase, data, procs=2))
+    assertSweep(output, params, data)
+
+    # The same sweep is submitted once, a different sweep is rejected
+    assert not WorkQueue(queue).submit(params, data, batchSize=3)
+    with pytest.raises(ValueError):
+        WorkQueue(queue).submit(params.assign(battSize=0.0), data, batchSize=3)
+
+
+def test_queue_stale(data, params, queue):
+    # A worker claims a batch and stops (no heartbeat), another worker requeues and completes it
+    dead = WorkQueue(queue, timeout=0.5)
+    dead.submit(params, data)
+    assert len(dead.claim()) == 1
+    path = dead.current
+    os.utime(path, (os.stat(path).st_atime - 1.0, os.stat(path).st_mtime - 1.0))
+    assert WorkQueue(queue, heartbeat=0.1, timeout=0.5).work(buildCase) == len(params)
+    assert not os.path.exists(path)
+    assert WorkQueue(queue).getStatus() == {'pending': 0, 'running': 0, 'done': len(params)}
+    assertSweep(WorkQueue(queue).getResults(), params, data)
+
+
+# ========================================================================
+# loadData
+# ========================================================================
+def test_load_data(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    data = pd.read_csv(dataFile).iloc[:60]
+    data.to_csv(path, index=False)
+    loaded = loadData(path)
+    assert os.path.exists(os.path.join(str(tmp_path), '.blis_cache'))
+    for column in ['dt', 'hour', 'demand', 'solar']:
+        assert np.array_equal(loaded.loc[:, column].values, data.loc[:, column].values)
+
+    # Same contents with a new modified time: the binary file is used
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert np.array_equal(loadData(path).loc[:, 'demand'].values, data.loc[:, 'demand'].values)
+
+    # Changed contents of the same size: the csv is converted again
+    changed = data.assign(demand=data.loc[:, 'demand'].values[::-1])
+    changed.to_csv(path, index=False)
+    assert os.stat(path).st_size == stat.st_size
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+    loaded = loadData(path)
+    assert np.array_equal(loaded.loc[:, 'demand'].values, changed.loc[:, 'demand'].values)